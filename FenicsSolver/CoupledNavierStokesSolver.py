@@ -39,6 +39,21 @@ General Galerkin (G2) stabilisaton (reference paper: ), but it still does not wo
 Turbulent flow will not be implemented: use third-party solvers like Oasis: a high-level/high-performance open source Navier-Stokes solver
 OpenFOAM solver.
 
+Iterative solver: set solver_settings['linear_solver_settings'] = {'method': 'gmres', 'preconditioner': 'fieldsplit'},
+the mixed space is split by the sub dof maps into velocity block, preconditioned by AMG,
+and pressure Schur complement, preconditioned by the pressure mass matrix scaled by 1/viscosity.
+If temperature is solved, the second split has pressure and temperature, Schur complement is approximated
+by PETSc 'selfp' (A11 - A10 inv(diag(A00)) A01). PETSc options of the splits with prefix `fieldsplit_u_`
+and `fieldsplit_p_` (or `fieldsplit_pT_`) can be overridden in 'petsc_options'. petsc4py is needed.
+
+Picard loop: if `using_nonlinear_solver` is False, see `default_picard_settings`, set by solver_settings['picard_settings'],
+with optional Anderson acceleration and adaptive relaxation, the matrix and its sparsity pattern,
+the assembler and the linear solver are kept for all iterations, vectors are updated in place
+
+Force monitor: solver_settings['force_settings'], see `default_force_settings`, drag and lift on the boundaries
+are assembled from the UFL stress expression (compiled once, no stress projection) every `frequency` steps,
+kept in `force_history` with the time at the end of the step, and appended to a CSV file in `case_folder` if `filename` is given
+
 TODO:
 1. temperature induced natural convection, need solve thermal, constant thermal expansion coeffi
     see paper:
@@ -58,7 +73,22 @@ reference_frame_settings = {'type': 'SRF',  'center_point': (0, 0, 0), 'omega':
 3. nonlinear viscosity model, nu(T), nu(U, p, T), curerntly diverging !
 """
 
-from .SolverBase import SolverBase
+from .SolverBase import SolverBase, SolverError
+
+# convergence is checked on the infinity norm of the Picard update
+default_picard_settings = {'maximum_iterations': 50, 'tolerance': 1e-4,
+                           'relaxation': 0.7,  # under relaxation ratio, also used as mixing parameter of Anderson acceleration
+                           'adaptive_relaxation': False,  # reduce relaxation if update grows, increase it otherwise
+                           'min_relaxation': 0.1, 'max_relaxation': 1.0,
+                           'anderson_depth': 0,  # number of previous iterations used by Anderson mixing, 0 to disable
+                           }
+
+# force on the boundaries of `boundary_ids`, e.g. the cylinder, axis index 0 for x-axis, 1 for y_axis
+default_force_settings = {'boundary_ids': None, 'drag_axis': 0, 'lift_axis': 1,
+                          'frequency': 1,  # evaluated every n time steps
+                          'filename': None,  # CSV file relative to case_folder, None to keep in memory only
+                          }
+
 class CoupledNavierStokesSolver(SolverBase):
     """  incompressible and laminar flow only with G2 stabilisaton
     """
@@ -80,6 +110,19 @@ class CoupledNavierStokesSolver(SolverBase):
             self.settings['mixed_variable'] = ('velocity', 'pressure')
         ## Define solver parameters, underreleax, tolerance, max_iter
         # solver_parameters
+        self.picard_settings = copy.copy(default_picard_settings)
+        if 'picard_settings' in self.solver_settings and self.solver_settings['picard_settings']:
+            self.picard_settings.update(self.solver_settings['picard_settings'])
+        self._picard_cache = {}
+        if 'force_settings' in self.solver_settings and self.solver_settings['force_settings']:
+            self.force_settings = copy.copy(default_force_settings)
+            self.force_settings.update(self.solver_settings['force_settings'])
+            if not self.force_settings['boundary_ids']:
+                raise SolverError('boundary_ids must be specified in force_settings')
+        else:
+            self.force_settings = None
+        self.force_history = []  # (step, time, drag, lift)
+        self._force_forms = None
 
     def generate_function_space(self, periodic_boundary):
         self.vel_degree = self.settings['fe_degree'] + 1  # order 3 is working for 2D elbow testing
@@ -114,6 +157,71 @@ class CoupledNavierStokesSolver(SolverBase):
         _w_prev = Function(self.function_space)  # on previous time-step mesh
         _w_prev.vector()[:] = self.w_prev.vector()[:]  # assuming no topo change
         self.w_prev = _w_prev  # 
+        self._linear_solver = None  # index sets of fieldsplit are changed
+
+    def get_petsc_options(self, linear_solver_settings=None):
+        options = SolverBase.get_petsc_options(self, linear_solver_settings)
+        if options.get('pc_type') == 'fieldsplit':
+            # default of block preconditioner, options given in `petsc_options` take precedence
+            second_split = 'fieldsplit_pT_' if self.solving_temperature else 'fieldsplit_p_'
+            fieldsplit_options = {'pc_fieldsplit_type': 'schur', 'pc_fieldsplit_schur_fact_type': 'upper',
+                                  'fieldsplit_u_ksp_type': 'preonly', 'fieldsplit_u_pc_type': 'hypre',
+                                  'fieldsplit_u_pc_hypre_type': 'boomeramg',
+                                  second_split + 'ksp_type': 'preonly'}
+            if self.solving_temperature:  # explicitly assembled by 'selfp', AMG is possible
+                fieldsplit_options['pc_fieldsplit_schur_precondition'] = 'selfp'
+                fieldsplit_options[second_split + 'pc_type'] = 'hypre'
+                fieldsplit_options[second_split + 'pc_hypre_type'] = 'boomeramg'
+            else:  # mass matrix is spectrally equivalent to its diagonal
+                fieldsplit_options[second_split + 'pc_type'] = 'jacobi'
+            fieldsplit_options.update(options)
+            options = fieldsplit_options
+        return options
+
+    def get_linear_solver(self):
+        if self._linear_solver is None:
+            solver = SolverBase.get_linear_solver(self)
+            if self.linear_solver_settings['preconditioner'] == 'fieldsplit':
+                self.set_fieldsplit(solver)
+        return self._linear_solver
+
+    def set_fieldsplit(self, solver):
+        """ set index sets of velocity and pressure (and temperature) from the sub dof maps of the mixed space,
+        pressure mass matrix is used to precondition the Schur complement for the incompressible flow
+        """
+        try:
+            from petsc4py import PETSc
+        except ImportError:
+            raise SolverError('petsc4py is needed by fieldsplit preconditioner of CoupledNavierStokesSolver')
+        W = self.function_space
+        # dofs() gives the global index of the dofs owned by this process
+        dofs_u = np.asarray(W.sub(0).dofmap().dofs(), dtype=PETSc.IntType)
+        dofs_p = np.asarray(W.sub(1).dofmap().dofs(), dtype=PETSc.IntType)
+        if self.solving_temperature:
+            dofs_p = np.sort(np.concatenate([dofs_p, np.asarray(W.sub(2).dofmap().dofs(), dtype=PETSc.IntType)]))
+            split_name = 'pT'
+        else:
+            split_name = 'p'
+        is_u = PETSc.IS().createGeneral(dofs_u)
+        is_p = PETSc.IS().createGeneral(dofs_p)
+        pc = solver.ksp().getPC()
+        pc.setType('fieldsplit')
+        pc.setFieldSplitIS(('u', is_u), (split_name, is_p))
+
+        if not self.solving_temperature:
+            trial = split(TrialFunction(W))
+            test = split(TestFunction(W))
+            p, q = trial[-1], test[-1]
+            M = as_backend_type(assemble(1.0/self.viscosity() * p*q*dx)).mat()
+            try:
+                Mp = M.createSubMatrix(is_p, is_p)
+            except AttributeError:  # petsc4py < 3.8
+                Mp = M.getSubMatrix(is_p, is_p)
+            pc.setFieldSplitSchurPreType(PETSc.PC.SchurPreType.USER, Mp)
+            self._schur_preconditioner = Mp  # keep it alive
+        self._fieldsplit_index_sets = (is_u, is_p)
+        self.logger.info('fieldsplit preconditioner with %d velocity dofs and %d %s dofs on this process',
+                         len(dofs_u), len(dofs_p), split_name)
 
     def get_body_source(self):
         # FIXME: source term type, centrifugal force is possible
@@ -128,7 +236,7 @@ class CoupledNavierStokesSolver(SolverBase):
 
     def get_initial_field(self):
         # assume: velocity is a tupe of constant, or string expression, or a function of the mixed functionspace
-        print("self.initial_values = ", self.initial_values)
+        self.logger.debug('initial_values = %s', self.initial_values)
 
         if isinstance(self.initial_values, (Function,)):
             try:
@@ -146,7 +254,7 @@ class CoupledNavierStokesSolver(SolverBase):
         up0 = interpolate(_initial_values_expr, self.function_space)
         return up0
 
-    def viscous_stress(self, up, T_space):
+    def viscous_stress(self, up, T_space=None):
         u, p = split(up)  # TODO: not general split
         if not T_space:
             T_space = TensorFunctionSpace(self.function_space.mesh(), 'CG', 1)
@@ -154,35 +262,53 @@ class CoupledNavierStokesSolver(SolverBase):
             solver_type = 'mumps')
         return sigma
 
+    def stress(self, up):
+        # Cauchy stress as UFL expression, dynamic viscosity = kinematic viscosity * density
+        u, p = split(up)[0], split(up)[1]
+        mu = self.viscosity(up) * self.material['density']
+        return mu*(grad(u) + grad(u).T) - p*Identity(self.dimension)
+
     def boundary_traction(self, up, target_space = None):
         # https://www.openfoam.com/documentation/cpp-guide/html/classFoam_1_1functionObjects_1_1externalCoupled.html#a1063d7a675858ee0e647e36abbefe463
-        sigma = self.viscous_stress(up)  # already included pressure
+        # traction on the fluid boundary as UFL expression, to be integrated on boundary facets
         n = FacetNormal(self.mesh)
-        # stress_normal = dot(n, dot(sigma, n))  #scalar, pressure
-        # (tangential stress vector) = dot(sigma, n) - stress_normal*n
-        #traction = dot(sigma, n)  # may need as_vector, can not project?
-        traction = sigma[i,j]*n[j]  # ufl.log.UFLException: Shapes do not match
-        #traction = Constant((1e2*self.current_step, 0))  # TODO: tmp bypass for test
-        #print('before traction project ...')
-        if target_space:
-            traction = interpolate(traction, target_space)  # project does not work
+        traction = dot(self.stress(up), n)
+        if target_space:  # global projection, expensive
+            traction = project(traction, target_space)
         return traction
 
     def calc_drag_and_lift(self, up, drag_axis_index, lift_axis_index, boundary_index_list):
-        # Compute force on cylinder,  axis_index: 0 for x-axis, 1 for y_axis
-        T = self.viscous_stress(up)
-        n = FacetNormal(self.mesh)
-        if (boundary_index_list and len(boundary_index_list)):
-            drag = -T[drag_axis_index,j]*n[j]*self.ds(boundary_index_list[0])
-            lift = -T[lift_axis_index,j]*n[j]*self.ds(boundary_index_list[0])
-            for _i in boundary_index_list[1:]:
-                drag -= T[drag_axis_index,j]*n[j]*self.ds(_i)  #  index j means summnation
-                lift -= T[lift_axis_index,j]*n[j]*self.ds(_i)
-            drag = assemble(drag)
-            lift = assemble(lift)
-            return drag, lift
-        else:
+        """ force on the body (e.g. cylinder) surrounded by fluid, axis_index: 0 for x-axis, 1 for y_axis
+        functionals are assembled directly from the stress expression, they are compiled only once
+        """
+        if not boundary_index_list:
             raise SolverError('Error: boundary_index_list must be specified to calc drag and lift forces')
+        key = (id(up), drag_axis_index, lift_axis_index, tuple(boundary_index_list))
+        if self._force_forms is None or self._force_forms[0] != key:
+            ds = Measure("ds", domain=self.mesh, subdomain_data=self.boundary_facets)
+            ds_body = ds(tuple(boundary_index_list))
+            # facet normal points out of the fluid, into the body
+            traction = -self.boundary_traction(up)
+            self._force_forms = (key, Form(traction[drag_axis_index]*ds_body), Form(traction[lift_axis_index]*ds_body))
+        return assemble(self._force_forms[1]), assemble(self._force_forms[2])
+
+    def monitor_current_step(self):
+        fs = self.force_settings
+        if fs and fs['frequency'] > 0 and self.current_step % fs['frequency'] == 0:
+            with self.profiler.phase('force_monitor'):
+                drag, lift = self.calc_drag_and_lift(self.w_current, fs['drag_axis'], fs['lift_axis'], fs['boundary_ids'])
+            # current_time is updated after this hook, the step is solved at the end of the time step
+            t = self.get_current_time() if self.transient_settings['transient'] else self.current_time
+            self.force_history.append((self.current_step, t, drag, lift))
+            self.logger.info('step %d: drag = %g, lift = %g', self.current_step, drag, lift)
+            if fs['filename'] and MPI.rank(self.mesh.mpi_comm()) == 0:
+                filename = os.path.join(self.settings['case_folder'], fs['filename'])
+                # a new file for a new run, appended if restarted
+                new_file = not os.path.exists(filename) or (len(self.force_history) == 1 and self.current_step == 0)
+                with open(filename, 'w' if new_file else 'a') as f:
+                    if new_file:
+                        f.write('step,time,drag,lift\n')
+                    f.write('{},{},{},{}\n'.format(self.current_step, t, drag, lift))
 
     def viscous_heat(self, u, p):
         # shear heating power,  FIXME: not tested code
@@ -216,7 +342,7 @@ class CoupledNavierStokesSolver(SolverBase):
         W = self.function_space
         ## boundary setup and update for each time step
 
-        print("Updating boundary at time iter = {}".format(time_iter_))
+        self.logger.debug('Updating boundary at time iter = %d', time_iter_)
         ds = Measure("ds", subdomain_data=self.boundary_facets)
         if time_iter_ == 0:
             plot(self.boundary_facets, title ="boundary colored by ID")  # diff color do visual diff boundary
@@ -252,25 +378,10 @@ class CoupledNavierStokesSolver(SolverBase):
             u_current, p_current, T_current = split(up_current)
             u_prev, p_prev, T_prev = split(up_prev)
 
-            #translate_setting, set the FunctionSpace
-            Tsettings = copy.copy(self.settings)
-            Tsettings['scalar_name'] = 'temperature'
-            Tsettings['mesh'] = None
-            Tsettings['function_space'] =  self.function_space.sub(2)
-            #Tsettings['convective_velocity'] = u_current  # can not use u_trial_function
-            #Tsettings['advection_settings'] = {'stabilization_method': 'SPUG', 'Pe': 1.0/(15.0/(4200*1000))}
-            # it is possible to use SPUG (not rotating velocity),  with and without body source
-            Tsettings['advection_settings'] = {'stabilization_method': 'IP', 'alpha': 0.1}
-            #Tsettings['body_source'] = # incomplate form?
-            import pprint
-            pprint.pprint(Tsettings)
-            from FenicsSolver import  ScalarTransportSolver
-            Tsolver = ScalarTransportSolver.ScalarTransportSolver(Tsettings)
-            #Tsover.is_mixed_function_space = False
-            
+            Tsolver = self.get_thermal_solver()
             #print('type(u_current)', u_current, type(u_current))  # ufl.tensors.ListTensor
             #print('type(u)', u, type(u))
-            Tsolver.convective_velocity = u_current
+            Tsolver.convective_velocity = u_current  # only the velocity is updated, for each form generation
             #ds should be passed to Tsolver? but they are actually same
             #convection stab can be a problem!
             F_T, T_bc = Tsolver.generate_form(time_iter_, T, Tq, T_current, T_prev)
@@ -280,11 +391,42 @@ class CoupledNavierStokesSolver(SolverBase):
             epsdot = 0.5 * (grad(u) + grad(u).T)
             viscous_heating = inner(epsdot, tau)  # method 1
             #viscous_heating =  2 * self.viscosity(up_current) * tr(dot(epsdot, epsdot))
-            print('type of viscous heating:', type(viscous_heating))
+            self.logger.debug('type of viscous heating: %s', type(viscous_heating))
             ## sigma * u:  heat flux,  sigma * grad(u) heat source
             #F_T -= viscous_heating *Tq*dx  # need sum to scalar!
             return F_T, T_bc
 
+    def get_thermal_solver(self):
+        """ thermal sub-solver on the temperature sub space, only created once for the function space,
+        it generates the thermal part of the coupled form
+        """
+        if not hasattr(self, '_thermal_solver') or self._thermal_solver_space is not self.function_space:
+            #translate_setting, set the FunctionSpace
+            Tsettings = copy.copy(self.settings)
+            Tsettings['scalar_name'] = 'temperature'
+            Tsettings['mesh'] = None
+            Tsettings['function_space'] =  self.function_space.sub(2)
+            #Tsettings['convective_velocity'] = u_current  # can not use u_trial_function
+            #Tsettings['advection_settings'] = {'stabilization_method': 'SPUG', 'Pe': 1.0/(15.0/(4200*1000))}
+            # it is possible to use SPUG (not rotating velocity),  with and without body source
+            Tsettings['advection_settings'] = {'stabilization_method': 'IP', 'alpha': 0.1}
+            #Tsettings['body_source'] = # incomplate form?
+            self.logger.debug('settings of thermal solver: %s', Tsettings)
+            from .ScalarTransportSolver import ScalarTransportSolver
+            self._thermal_solver = ScalarTransportSolver(Tsettings)
+            self._thermal_solver_space = self.function_space
+        # time-varying values of the thermal boundary are evaluated at the step of this solver
+        self._thermal_solver.current_step = getattr(self, 'current_step', 0)
+        for name in ('current_time', 'current_time_step', 'time_step_history'):
+            if hasattr(self, name):
+                setattr(self._thermal_solver, name, getattr(self, name))
+        return self._thermal_solver
+
+    def update_time_dependent_values(self):
+        SolverBase.update_time_dependent_values(self)
+        if self.solving_temperature and hasattr(self, '_thermal_solver'):  # coefficients in the reused thermal form
+            self.get_thermal_solver().update_time_dependent_values()
+
     def F_static(self, trial_function, test_function, up_0):
         if self.solving_temperature:
             u, p, T = split(trial_function)
@@ -352,7 +494,7 @@ class CoupledNavierStokesSolver(SolverBase):
             else:  # convection dominant, test_f<trial_f*h
                 U0_square = dot(advection_velocity, advection_velocity)
                 if self.transient:
-                    dt = self.get_time_step(time_iter_)
+                    dt = self.get_time_step_constant()
                     delta1 = ads['kappa1'] /2.0 * 1.0/sqrt(1.0/(dt*dt) + 1.0/U0_square/h/h)
                 else:
                     delta1 = ads['kappa1'] /2.0 * h/sqrt(U0_square)
@@ -378,7 +520,7 @@ class CoupledNavierStokesSolver(SolverBase):
         F = self.F_static(trial_function, test_function, up_current)
         #F_prev = self.F_static(prev, test_function, up_prev)  # should works for both Picard and Newton
         #TODO: it is backward Euler, not Crank-Nicolson (2nd , unconditionally stable for diffusion problem)
-        return F + (1 / self.get_time_step(time_iter_)) * inner(u - u_prev, v) * dx
+        return F + (1 / self.get_time_step_constant(time_iter_)) * inner(u - u_prev, v) * dx
 
     def update_boundary_conditions(self, time_iter_, trial_function, test_function, ds):
         # shared by compressible and incompressible fluid solver
@@ -421,7 +563,7 @@ class CoupledNavierStokesSolver(SolverBase):
                 bc_values = boundary['values'].values()
             for bc in bc_values:  # a list of boundary values or dict
                 if bc['variable'] == 'velocity':
-                    print(bc['value'])
+                    self.logger.debug('velocity boundary value: %s', bc['value'])
                     bvalue = self.translate_value(bc['value'])
                     '''  only velocity vector is acceptable, it must NOT be a magnitude scalar
                     if hasattr(bc['value'], '__len__') and len(bc['value']) == self.dimension:
@@ -432,7 +574,7 @@ class CoupledNavierStokesSolver(SolverBase):
                     '''
                     if bc['type'] == 'Dirichlet':
                         Dirichlet_bcs_up.append(DirichletBC(W.sub(i_velocity), bvalue, self.boundary_facets, boundary['boundary_id']) )
-                        print("found velocity boundary for id = {}".format(boundary['boundary_id']))
+                        self.logger.debug('found velocity boundary for id = %d', boundary['boundary_id'])
                     elif bc['type'] == 'Neumann':  # zero gradient, outflow
                         NotImplementedError('Neumann boundary for velocity is not implemented')
                     elif bc['type'] == 'symmetry':
@@ -443,14 +585,14 @@ class CoupledNavierStokesSolver(SolverBase):
                         F_bc.append(dot(grad(u), n)*v * ds(boundary['boundary_id']))
                         #velocity gradient is zero, do nothing here, no normal stress, see [COMSOL Multiphysics Modeling Guide]
                     else:
-                        print('velocity boundary type`{}` is not supported'.format(bc['type']))
+                        self.logger.warning('velocity boundary type `%s` is not supported', bc['type'])
                 elif bc['variable'] == 'pressure':
                     bvalue = self.translate_value(bc['value'])  # self.get_boundary_value(bc, 'pressure')
                     if bc['type'] == 'Dirichlet':  # pressure  inlet or outlet
                         Dirichlet_bcs_up.append(DirichletBC(W.sub(i_pressure), bvalue, self.boundary_facets, boundary['boundary_id']) )
                         F_bc.append(inner(bvalue*n, v)*ds(boundary['boundary_id'])) # very important to make sure convergence
                         F_bc.append(-nu*inner((grad(u) + grad(u).T)*n, v)*ds(boundary['boundary_id']))  #  pressure no viscous stress boundary
-                        print("found pressure boundary for id = {}".format(boundary['boundary_id']))
+                        self.logger.debug('found pressure boundary for id = %d', boundary['boundary_id'])
                     elif bc['type'] == 'symmetry':
                         pass # already set in velocity, should be natural zero gradient for pressure
                     elif bc['type'] == 'farfield':   # 'open' to large volume is same with farfield
@@ -458,7 +600,7 @@ class CoupledNavierStokesSolver(SolverBase):
                     elif bc['type'] == 'Neumann':  # zero gradient
                         NotImplementedError('Neumann boundary for pressure is not implemented')
                     else:
-                        print('pressure boundary type`{}` is not supported thus ignored'.format(bc['type']))
+                        self.logger.warning('pressure boundary type `%s` is not supported thus ignored', bc['type'])
 
                 elif bc['variable'] == 'temperature':  # TODO: how to share code and boundary setup with ScalarTransportSolver
                     if self.compressible:  # used by compressible NS solver
@@ -482,10 +624,10 @@ class CoupledNavierStokesSolver(SolverBase):
                             htc = self.translate_value(bc['value'])  # must be specified in Constant or Expressed in setup dict
                             integrals_N.append( htc*(Ta-T)*Tq*ds(i))
                         else:
-                            print('temperature boundary type`{}` is not supported thus ignored'.format(bc['type']))
+                            self.logger.warning('temperature boundary type `%s` is not supported thus ignored', bc['type'])
                         '''
                 else:
-                    print('boundary setup is done in scalar transport for incompressible flow'.format(bc['variable']))
+                    self.logger.debug('boundary of %s is set up in scalar transport for incompressible flow', bc['variable'])
         ## end of boundary setup
         return Dirichlet_bcs_up, F_bc
 
@@ -494,38 +636,110 @@ class CoupledNavierStokesSolver(SolverBase):
         if self.using_nonlinear_solver:
             return self.solve_nonlinear_problem(F, up_, Dirichlet_bcs_up, self.J)
         else:        # Solve Navier-Stokes problem with Picard method
-            iter_ = 0
-            max_iter = 50
-            eps = 1.0
-            tol = 1E-4
-            under_relax_ratio = 0.7
-            up_temp = Function(self.function_space)  # a temporal to save value in the Picard loop
-
-            timer_solver = Timer("TimerSolveStatic")
-            timer_solver.start()
-            while (iter_ < max_iter and eps > tol):
-                # solve the linear stokes flow to avoid up_s = 0
-
-                up_temp.assign(up_)
-                # other solving methods
-                up_ = self.solve_linear_problem(F, up_, Dirichlet_bcs_up)
-                #  AMG is not working with mixed function space
-                
-                #limiting result value, if the problem is highly nonlinear
-                diff_up = up_.vector().get_local() - up_temp.vector().get_local()
-                eps = np.linalg.norm(diff_up, ord=np.Inf)
-
-                print("iter = {:d}; eps_up = {:e}; time elapsed = {}\n".format(iter_, eps, timer_solver.elapsed()))
-
-                ## underreleax should be defined here, Courant number,
-                up_.vector()[:] = up_temp.vector().get_local() + diff_up * under_relax_ratio
-
-                iter_ += 1
-            ## end of Picard loop
-            timer_solver.stop()
-            print("*" * 10 + " end of Navier-Stokes Picard iteration" + "*" * 10)
-
-            return up_
+            return self.solve_picard(F, up_, Dirichlet_bcs_up)
+
+    def solve_picard(self, F, up_, Dirichlet_bcs_up):
+        """ fixed point iteration x = G(x), G(x) is the solution of the form linearized at x (up_),
+        relaxed update x += relaxation * (G(x) - x), with Anderson mixing of the previous `anderson_depth` iterations:
+        x += relaxation * f - sum(gamma_i * (dx_i + relaxation * df_i)), gamma minimizes |f - sum(gamma_i * df_i)|
+        """
+        ps = self.picard_settings
+        a, L = self.get_system(F)
+        cache = self._picard_cache
+        if cache.get('a') is not a or cache.get('bcs') is not Dirichlet_bcs_up:
+            with self.profiler.phase('form_compilation'):
+                cache['assembler'] = SystemAssembler(a, L, Dirichlet_bcs_up)
+            cache['A'] = PETScMatrix()  # sparsity pattern is built in the first assembly only
+            cache['b'] = PETScVector()
+            cache['a'] = a
+            cache['bcs'] = Dirichlet_bcs_up
+        assembler, A, b = cache['assembler'], cache['A'], cache['b']
+        if self.linear_solver_settings:
+            solver = self.get_linear_solver()
+        else:
+            if 'solver' not in cache:
+                cache['solver'] = LUSolver()
+            solver = cache['solver']
+
+        x = up_.vector()
+        g = x.copy()  # G(x)
+        f = x.copy()  # residual of fixed point, G(x) - x
+        depth = ps['anderson_depth']
+        if depth > 0:
+            x_old, f_old = x.copy(), x.copy()
+        dX, dF = [], []
+        relaxation = ps['relaxation']
+        eps_prev = None
+
+        iter_ = 0
+        eps = 1.0
+        timer_solver = Timer("TimerSolveStatic")
+        timer_solver.start()
+        while (iter_ < ps['maximum_iterations'] and eps > ps['tolerance']):
+            with self.profiler.phase('picard_iteration'):
+                with self.profiler.phase('assembly'):  # linearized at the current up_
+                    assembler.assemble(A, b)
+                solver.set_operator(A)
+                with self.profiler.phase('linear_solve'):
+                    iterations = solver.solve(g, b)
+                if self.linear_solver_settings:
+                    self.profiler.add_iterations('krylov', iterations)
+
+                f.zero()
+                f.axpy(1.0, g)
+                f.axpy(-1.0, x)
+                eps = f.norm('linf')
+                if ps['adaptive_relaxation'] and eps_prev is not None:
+                    if eps > eps_prev:
+                        relaxation = max(relaxation * 0.5, ps['min_relaxation'])
+                    else:
+                        relaxation = min(relaxation * 1.2, ps['max_relaxation'])
+                eps_prev = eps
+
+                if depth > 0:
+                    # no history in the first iteration
+                    gamma = self._anderson_coefficients(x, f, x_old, f_old, dX, dF, depth) if iter_ > 0 else []
+                    x_old.zero()
+                    x_old.axpy(1.0, x)
+                    f_old.zero()
+                    f_old.axpy(1.0, f)
+                    x.axpy(relaxation, f)
+                    for i, c in enumerate(gamma):
+                        x.axpy(-c, dX[i])
+                        x.axpy(-c * relaxation, dF[i])
+                else:
+                    x.axpy(relaxation, f)
+
+            self.logger.info('Picard iter = %d; eps_up = %e; relaxation = %g; time elapsed = %g',
+                             iter_, eps, relaxation, timer_solver.elapsed()[0])
+            iter_ += 1
+        ## end of Picard loop
+        timer_solver.stop()
+        if eps > ps['tolerance']:
+            self.logger.warning('Picard iteration is not converged after %d iterations, eps_up = %e', iter_, eps)
+        self.profiler.add_iterations('picard', iter_)
+        self.logger.debug('end of Navier-Stokes Picard iteration after %d iterations', iter_)
+        return up_
+
+    def _anderson_coefficients(self, x, f, x_old, f_old, dX, dF, depth):
+        # differences to the previous iteration are appended, the oldest vector is recycled if depth is reached
+        if len(dF) < depth:
+            dx, df = x.copy(), f.copy()
+        else:
+            dx, df = dX.pop(0), dF.pop(0)
+        dx.zero()
+        dx.axpy(1.0, x)
+        dx.axpy(-1.0, x_old)
+        df.zero()
+        df.axpy(1.0, f)
+        df.axpy(-1.0, f_old)
+        dX.append(dx)
+        dF.append(df)
+        # small least-squares problem of normal equations, inner products are reduced over all processes
+        m = len(dF)
+        H = np.array([[dF[i].inner(dF[j]) for j in range(m)] for i in range(m)])
+        r = np.array([dF[i].inner(f) for i in range(m)])
+        return np.linalg.lstsq(H, r, rcond=1e-10)[0]
 
     def plot_result(self):
         if self.solving_temperature:
@@ -23,8 +23,13 @@ from FenicsSolver.CoupledNavierStokesSolver import CoupledNavierStokesSolver
 from FenicsSolver.LargeDeformationSolver import LargeDeformationSolver
 from FenicsSolver.LinearElasticitySolver import LinearElasticitySolver
 from FenicsSolver.SolverBase import SolverBase, SolverError
+from FenicsSolver.ResultWriter import ResultWriter
+from FenicsSolver.Profiler import Profiler
 from dolfin import *
 import math, copy
+import logging
+import os.path
+import signal
 import numpy as  np
 
 _debug = False
@@ -36,11 +41,11 @@ class CoupledSolver():
     """
     def __init__(self, solver_input):
         self.settings = solver_input
+        self.profiler = Profiler()
 
     def solve_transient(self):
         #
         self.init_solver()
-        file = File("pressure_output.pvd", "compressed")
 
         # Define a parameters for a stationary loop
         self.transient_settings = self.settings['transient_settings']
@@ -52,6 +57,27 @@ class CoupledSolver():
         else:
             t_end = self.current_time+ 1
 
+        if 'checkpoint_settings' in self.settings and self.settings['checkpoint_settings']:
+            cps = self.settings['checkpoint_settings']
+        else:
+            cps = {'checkpoint_freq': 0}
+        checkpointing = ts['transient'] and cps['checkpoint_freq'] and cps['checkpoint_freq'] > 0
+        if checkpointing:
+            checkpoint_filename = cps['checkpoint_filename'] if 'checkpoint_filename' in cps else 'fsi_checkpoint.h5'
+            previous_handler = self.fluid_solver._install_termination_handler()
+        if 'restart_filename' in cps and cps['restart_filename']:
+            self.read_checkpoint(cps['restart_filename'])
+
+        if 'result_filename' in self.settings and self.settings['result_filename']:
+            result_filename = self.settings['result_filename']
+        else:
+            result_filename = 'fsi_fluid_result.xdmf'
+        if self.current_step > 0:  # restarted, result file can not be appended
+            root, ext = os.path.splitext(result_filename)
+            result_filename = root + '_from_step{}'.format(self.current_step) + ext
+        # fluid mesh is moving, so mesh is written for each time step
+        fluid_writer = ResultWriter(result_filename, self.fluid_solver.mesh, moving_mesh=True)
+
         cs = self.settings['coupling_settings']
         #print(ts, self.current_time, t_end)
         # Transient loop also works for steady, by set `t_end = self.time_step`
@@ -68,14 +94,13 @@ class CoupledSolver():
                 s.current_step = self.current_step
             ## overloaded by derived classes, maybe move out of temporal loop if boundary does not change form
             self.solve_current_step()
-            p_result = self.fluid_solver.w_current.split()[1]
-            p_result.rename('pressure', 'label')
-            file << (p_result, self.current_time)  # todo: moved to fluid_solver
-            u_result = self.fluid_solver.w_current.split()[0]
-            u_result.rename('velocity', 'label')
-            file << (u_result, self.current_time)  # todo: moved to fluid_solver
-
-            print("Current time = ", self.current_time, " TimerSolveAll = ", timer_solver_all.elapsed())
+            with self.profiler.phase('io'):
+                # current_time is not yet advanced, the solution is at the end of the step as in SolverBase
+                t = self.current_time + dt if ts['transient'] else self.current_time
+                fluid_writer.write(self.fluid_solver.get_result_fields(), t)
+            self.profiler.end_step(self.current_step, self.current_time, time_step = dt)
+
+            self.logger.info('Current step = %d, time = %g, TimerSolveAll = %g', self.current_step, self.current_time, timer_solver_all.elapsed()[0])
             # stop for steady case, or update time
 
             if not self.transient_settings['transient']:
@@ -84,20 +109,65 @@ class CoupledSolver():
             
             self.current_step += 1
             self.current_time += dt
+
+            if checkpointing:
+                comm = self.fluid_solver.mesh.mpi_comm()
+                terminating = MPI.max(comm, float(self.fluid_solver._terminating)) > 0
+                if terminating or (self.current_step % cps['checkpoint_freq'] == 0):
+                    with self.profiler.phase('io'):
+                        self.write_checkpoint(checkpoint_filename)
+                if terminating:
+                    self.logger.warning('time loop is terminated by signal at step %d, restart from `%s`', self.current_step, checkpoint_filename)
+                    break
         ## end of time loop
         timer_solver_all.stop()
-        self.plot_result()
+        with self.profiler.phase('io'):
+            fluid_writer.close()
+        if checkpointing and previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
+        with self.profiler.phase('plotting'):
+            self.plot_result()
 
         return [solver.result for solver in self.solver_list]
 
+    @property
+    def logger(self):
+        # share the configured logger of the first participant solver
+        return self.solver_list[0].logger
+
+    def _get_checkpoint_filenames(self, filename):
+        # one checkpoint file for each participant solver
+        root, ext = os.path.splitext(filename)
+        return [root + '_{}'.format(i) + ext for i in range(len(self.solver_list))]
+
+    def write_checkpoint(self, filename):
+        for solver, solver_filename in zip(self.solver_list, self._get_checkpoint_filenames(filename)):
+            solver.current_step = self.current_step
+            solver.current_time = self.current_time
+            solver.write_checkpoint(solver_filename)
+
+    def read_checkpoint(self, filename):
+        for solver, solver_filename in zip(self.solver_list, self._get_checkpoint_filenames(filename)):
+            solver.read_checkpoint(solver_filename)
+        self.current_step = self.solver_list[0].current_step
+        self.current_time = self.solver_list[0].current_time
+
     def init_solver(self):
         for solver in self.solver_list:
             solver.init_solver()
 
     def solve(self):
         self.result = self.solve_transient()
+        if 'profiling_file' in self.settings and self.settings['profiling_file']:
+            self.profiler.write(self.settings['profiling_file'], self.solver_list[0].mesh.mpi_comm())
         return self.result
 
+    def share_profiler(self, prefixes):
+        # participant solvers record their phases into the coupled solver profiler, named with the prefix
+        for solver, prefix in zip(self.solver_list, prefixes):
+            self.profiler.merge(solver.profiler, prefix)  # setup phases like mesh reading
+            solver.profiler = self.profiler
+
     def plot_result(self):
         for solver in self.solver_list:
             solver.plot()
@@ -111,10 +181,10 @@ class CoupledSolver():
             dt = float(self.transient_settings['time_step'])
         except:
             ts = self.transient_settings['time_series']
-            if len(ts) >= time_iter_:
-                dt = ts[time_iter_] - ts[time_iter_]
+            if len(ts) > time_iter_ + 1:
+                dt = ts[time_iter_ + 1] - ts[time_iter_]
             else:
-                print('time step can only be a sequence or scalar')
+                raise SolverError('time_series has no time point after step {}'.format(time_iter_))
         #self.mesh.hmin()  # Compute minimum cell diameter. courant number
         return dt
 
@@ -126,7 +196,7 @@ class CoupledSolver():
             if len(self.transient_settings['time_series']) >= time_iter_:
                 tp = self.transient_settings['time_series'][time_iter_]
             else:
-                print('time point can only be a sequence of time series or derived from constant time step')
+                raise SolverError('time point can only be a sequence of time series or derived from constant time step')
         return tp
 
 
@@ -135,6 +205,7 @@ class FSISolver(CoupledSolver):
     """
     def __init__(self, solver_input):
         self.settings = solver_input
+        self.profiler = Profiler()
         for s in self.settings['participants']:
             if s['solver_domain'] == "fluidic":
                 self.fluid_solver = CoupledNavierStokesSolver(s['settings'])
@@ -144,6 +215,7 @@ class FSISolver(CoupledSolver):
             else:
                 raise SolverError("unsupported subdomain solver: {}".format(s['solver_name']))
         self.solver_list = [self.fluid_solver, self.solid_solver]
+        self.share_profiler(['fluid', 'solid'])
         self.detect_interfaces()
         self.original_solid_mesh = copy.copy(self.solid_solver.mesh)
         self.original_fluid_mesh = copy.copy(self.fluid_solver.mesh)
@@ -247,24 +319,45 @@ class FSISolver(CoupledSolver):
 
     def solve_current_step(self):
         # only NS equation needs current value to build form
-        self.fluid_solver.solve_current_step()
+        with self.profiler.phase('fluid'):
+            self.fluid_solver.solve_current_step()
         if _debug:
             plot(self.fluid_solver.boundary_facets, title = "fluid boundary")
             plot(self.solid_solver.boundary_facets, title = "solid boundary")
             self.fluid_solver.plot()
 
         # self.up_trial_function, self.up_test_function, self.up_current, self.up_prev
-        self.update_solid_interface(self.fluid_solver.w_current)  # set solid boundary_conditions
+        with self.profiler.phase('fluid_to_solid_mapping'):
+            self.update_solid_interface(self.fluid_solver.w_current)  # set solid boundary_conditions
 
-        self.solid_solver.solve_current_step()
+        with self.profiler.phase('solid'):
+            self.solid_solver.solve_current_step()
         if _debug:
             self.solid_solver.plot()
 
         #move fluid mesh and set the boundary
-        mesh_disp = self.update_fluid_interface(self.solid_solver.w_current)  # set solid boundary_conditions, 
-        self.move_fluid_interface(mesh_disp)
+        with self.profiler.phase('mesh_motion'):
+            mesh_disp = self.update_fluid_interface(self.solid_solver.w_current)  # set solid boundary_conditions, 
+            self.move_fluid_interface(mesh_disp)
         # self.move_solid_interface()  # not necessary for submeshing no interpolation
 
+    def write_checkpoint(self, filename):
+        # fluid mesh displacement from the original mesh is also needed to restart
+        CoupledSolver.write_checkpoint(self, filename)
+        root, ext = os.path.splitext(filename)
+        hdf = HDF5File(self.fluid_solver.mesh.mpi_comm(), root + '_mesh' + ext, "w")
+        hdf.write(self.previous_fluid_mesh_disp, "/mesh_displacement")
+        hdf.close()
+
+    def read_checkpoint(self, filename):
+        root, ext = os.path.splitext(filename)
+        mesh_disp = Function(self.original_fb_vector_fs)
+        hdf = HDF5File(self.fluid_solver.mesh.mpi_comm(), root + '_mesh' + ext, "r")
+        hdf.read(mesh_disp, "/mesh_displacement")
+        hdf.close()
+        self.move_fluid_interface(mesh_disp)  # also update fluid function space
+        CoupledSolver.read_checkpoint(self, filename)
+
     def detect_interfaces(self, specific_type = 'FSI'):
         # matching by boundary name, not by coordinate coincidence, also comes from setting dict
         self.interfaces = {} # list of tuple of dict
@@ -285,7 +378,7 @@ class FSISolver(CoupledSolver):
             #bc_values = {'type': 'stress', 'value': boundary_stress}
             self.solid_solver.settings['boundary_conditions'][iface]['value'] = boundary_stress
             self.solid_solver.settings['boundary_conditions'][iface]['type'] = 'stress'
-            print("updated interface:", self.solid_solver.settings['boundary_conditions'][iface])
+            self.logger.debug('updated interface: %s', self.solid_solver.settings['boundary_conditions'][iface])
 
     def move_fluid_interface(self, mesh_disp):
         # assing no fluid mesh topo change
@@ -371,7 +464,8 @@ class FSISolver(CoupledSolver):
             bc_values = [{'variable': "velocity",'type': 'Dirichlet', 'value': boundary_velocity}]
             self.fluid_solver.settings['boundary_conditions'][iface]['value'] = bc_values
 
-        print('max mesh disp', np.max(mesh_disp.vector().get_local()))
+        if self.logger.isEnabledFor(logging.DEBUG):  # avoid the reduction if not logged
+            self.logger.debug('max mesh disp: %g', mesh_disp.vector().max())
         return mesh_disp
 
     def move_solid_interface(self):
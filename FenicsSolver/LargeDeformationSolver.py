@@ -42,10 +42,13 @@ class LargeDeformationSolver(NonlinearElasticitySolver):
         parameters['form_compiler']['representation'] = 'uflacs'
         parameters['form_compiler']['optimize'] = True
         parameters['form_compiler']['quadrature_degree'] = 4
+        # default Newton solver setting, unless specified in solver_settings['solver_parameters']
+        if 'newton_solver' not in self.solver_parameters:
+            self.solver_parameters['newton_solver'] = {"linear_solver":"mumps","absolute_tolerance":1e-9,"relative_tolerance":1e-7}
 
     def generate_function_space(self, periodic_boundary):
         self.is_mixed_function_space = True
-        print('self.is_mixed_function_space in the solver', self.is_mixed_function_space)
+        self.logger.debug('is_mixed_function_space in the solver: %s', self.is_mixed_function_space)
         V = VectorElement(self.settings['fe_family'], self.mesh.ufl_cell(), self.settings['fe_degree']) 
         Q = FiniteElement(self.settings['fe_family'], self.mesh.ufl_cell(), self.settings['fe_degree'])
         mixed_element = MixedElement([V, V, Q])  # displacement, velocity, pressure
@@ -64,7 +67,7 @@ class LargeDeformationSolver(NonlinearElasticitySolver):
         # _initial_values.append(0.0)
         _initial_values = (self.dimension*2+1)*(0.0,)
         _expr = tuple([str(v) for v in _initial_values])
-        print(_expr)
+        self.logger.debug('initial value expression: %s', _expr)
         _initial_values_expr = Expression( _expr, degree = self.settings['fe_degree'])
         up0 = interpolate(_initial_values_expr, self.function_space)
         return up0
@@ -72,7 +75,7 @@ class LargeDeformationSolver(NonlinearElasticitySolver):
 
     def get_flux(self, u, mag_vector): 
         F = Identity(self.dimension) + grad(u)
-        print("mag_vector", mag_vector)
+        self.logger.debug('mag_vector: %s', mag_vector)
         return det(F)*dot(inv(F).T, mag_vector)
 
     def generate_form(self, time_iter_, w_trial, w_test, w_current, w_prev):
@@ -110,7 +113,7 @@ class LargeDeformationSolver(NonlinearElasticitySolver):
             return S, pp
     
         if self.transient_settings['transient']:
-            dt = self.get_time_step(time_iter_)
+            dt = self.get_time_step_constant(time_iter_)
             q = 0.5  # time fwd scheme 0.5: crank-niklas
         else:
             raise SolverError("large deformation solver must be solved in a transient way")
@@ -147,9 +150,7 @@ class LargeDeformationSolver(NonlinearElasticitySolver):
         return F, bcs
 
     def solve_form(self, F, u_, bcs):
-        solve(F == 0, u_, bcs, J=self.J,
-                    solver_parameters={"newton_solver":{"linear_solver":"mumps","absolute_tolerance":1e-9,"relative_tolerance":1e-7}})
-        return u_
+        return self.solve_nonlinear_problem(F, u_, bcs, self.J)
 
     def displacement(self):
         if self.is_mixed_function_space:
@@ -170,23 +171,5 @@ class LargeDeformationSolver(NonlinearElasticitySolver):
         #v.rename("v", "velocity")
         #p.rename("p", "pressure")
         plot(u, mode="displacement", wireframe=True)
-    
-    def save(self, result_filename):
-        print("Error: save function has error, using SolverBase save()")
-        print("Suppress this error by provide this dummy save() in the subclass")
-        """
-        suffix = '.pvd'
-        assert result_filename[-4:] == '.pvd'
-        result_filename_root = result_filename[:-4]
-        ret = split(self.result)
-        for i, var in enumerate(ret):
-            var_name = self.settings['mixed_variable'][i]
-            # AttributeError: 'ListTensor' object has no attribute 'rename',  for LargeDeformationSolver
-            var.rename(var_name, "label")  # why renaming does not show in vtu file?
-            var_result_filename = result_filename_root + '_' + var_name + suffix
-            result_stream = File(var_result_filename)
-            result_stream << (var, self.current_time)
-        """
-        pass
     ####################################
 
@@ -26,7 +26,12 @@ Features:
 - thermal stress are implemented but with very basic example
 - modal analysis, not tested yet
 - boundary conditions: see member funtion `update_boundary_conditions()`
-- support 2D and 3D with nullspace accel
+- support 2D and 3D with nullspace accel, `using_amg` in 'solver_settings' (default True for 3D)
+    near nullspace, CG solver and AMG hierarchy are kept for all time steps, AMG is set up again only if
+    the bilinear form is changed. `amg_settings` in 'solver_settings', see `default_amg_settings` of SolverBase,
+    e.g. {'nonzero_initial_guess': True} to warm start from displacement of the previous step
+- several load cases (boundary values and body source) with one factorization: `solve_load_cases()` of SolverBase,
+    and `compliance_matrix()` of the load cases
 
 Todo:
 - Elastodynamics - or dynamics (acceleration * density can not be ignored) vibration, damping,
@@ -58,6 +63,10 @@ class LinearElasticitySolver(SolverBase):
         # solver specific setting
         self.solving_modal = False
         self.solving_dynamics = False  # not quasi-static,  structure's acceleration make impact
+        if 'using_amg' in self.solver_settings:
+            self.using_amg = self.solver_settings['using_amg']
+        else:
+            self.using_amg = (self.dimension == 3)  # smoothed aggregation AMG with near nullspace, default for 3D
 
     def sigma(self, u):
         # Stress computation for linear elasticity
@@ -118,7 +127,7 @@ class LinearElasticitySolver(SolverBase):
             i = bc_settings['boundary_id']
             bc = self.get_boundary_variable(bc_settings)
 
-            print(bc)
+            self.logger.debug('boundary condition: %s', bc)
             if bc['type'] =='Dirichlet' or bc['type'] =='displacement':
                 if not self.is_mixed_function_space:
                     bv = bc['value']  # translate_value() is not supported for value types: [1e-3, None, None]
@@ -156,8 +165,7 @@ class LinearElasticitySolver(SolverBase):
                             dbc = DirichletBC(V, self.translate_value(bv), self.boundary_facets, i)
                             bcs.append(dbc)
                         else:
-                            print(bc)
-                            raise SolverError('Error, boundary setting is not supported: ')
+                            raise SolverError('Error, boundary setting is not supported: {}'.format(bc))
 
                     else: # bc['values'] =[ {'variable': displacement' , 'value': dvalue}, { 'variable':'velocity', 'value': vvalue}
                         pass  # not yet needed
@@ -169,7 +177,7 @@ class LinearElasticitySolver(SolverBase):
                     bc_force = self.translate_value(bc['value'])
                     # calc the surface area and calc stress, normal and tangential?
                     bc_area = assemble(Constant(1)*ds(bc['boundary_id'], domain=self.mesh))
-                    print('boundary area (m2) for force boundary is', bc_area)
+                    self.logger.debug('boundary area (m2) for force boundary is %g', bc_area)
                     g = bc_force / bc_area
                     # FIXME: assuming all force are normal to mesh boundary
                     if 'direction' in bc and bc['direction']:
@@ -245,13 +253,21 @@ class LinearElasticitySolver(SolverBase):
         return F, bcs
 
     def solve_form(self, F, u_, bcs):
-        if self.dimension == 3:
+        if self.using_amg:
             u_ = self.solve_amg(F, u_, bcs)
         else:
             u_ = self.solve_linear_problem(F, u_, bcs)
         # calc boundingbox to make sure no large deformation?
         return u_
 
+    def compliance_matrix(self, load_cases):
+        """ C_ij = f_i . u_j, work of load case i on the displacement of load case j,
+        symmetric for homogeneous Dirichlet boundaries. Return (C, displacement Functions)
+        """
+        displacements = self.solve_load_cases(load_cases)
+        C = np.array([[f.inner(u.vector()) for u in displacements] for f in self.load_case_rhs])
+        return C, displacements
+
     def displacement(self):
         if self.is_mixed_function_space:
             raise SolverError('subclass with mixed_function_space must override this function')
@@ -283,8 +299,7 @@ class LinearElasticitySolver(SolverBase):
     def solve_modal_form(self, F, bcs):
         # Test for PETSc
         if not has_linear_algebra_backend("PETSc"):
-            print("DOLFIN has not been configured with PETSc. Exiting.")
-            exit()
+            raise SolverError("DOLFIN has not been configured with PETSc, modal analysis needs SLEPc")
         # Set backend to PETSC
         parameters["linear_algebra_backend"] = "PETSc"
 
@@ -297,13 +312,13 @@ class LinearElasticitySolver(SolverBase):
         eigensolver = SLEPcEigenSolver(A)
 
         # Compute all eigenvalues of A x = \lambda x
-        print("Computing eigenvalues. This can take a minute.")
+        self.logger.info('Computing eigenvalues. This can take a minute.')
         eigensolver.solve()
 
         # Extract largest (first) eigenpair
         r, c, rx, cx = eigensolver.get_eigenpair(0)
 
-        print("Largest eigenvalue: ", r)
+        self.logger.info('Largest eigenvalue: %g', r)
 
         # Initialize function and assign eigenvector
         ev = Function(self.function_space)
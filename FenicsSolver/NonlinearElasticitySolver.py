@@ -73,6 +73,7 @@ class NonlinearElasticitySolver(LinearElasticitySolver):
 
         # how about kinematic energy, only for dynamic process vibration
         if self.transient_settings['transient']:
+            dt = self.get_time_step_constant(time_iter_)
             vel = (u_current - u_prev) /dt
             Pi += 0.5*vel*vel*dx  # not yet tested code!
         
@@ -94,6 +95,5 @@ class NonlinearElasticitySolver(LinearElasticitySolver):
         return F, bcs
 
     def solve_form(self, F, u_, bcs):
-        solve(F == 0, u_, bcs, J=self.J)
-        return u_
+        return self.solve_nonlinear_problem(F, u_, bcs, self.J)
 
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+from __future__ import print_function, division, absolute_import
+
+"""
+Feature: run many variants of a case (material, boundary values, loads) on a local process pool
+
+usage:
+    sweep = ParameterSweep('case.json', {'material.thermal_conductivity': [0.1, 0.2, 0.4],
+                                         'boundary_conditions.hot.values.0.value': [350, 360]},
+                           output_folder = 'sweep', processes = 4)
+    sweep.run()
+
++ grid: dict of dotted path in the case settings -> list of values, all combinations are run,
+    integer path item is a list index. The last path varies fastest, so consecutive variants are neighbours
++ each worker is warmed up: dolfin is imported and mesh is read once (see `SolverBase.mesh_cache`),
+    the first variant is solved before others start, so forms are compiled only once into the JIT disk cache
++ steady cases use the solution of the nearest variant already solved by the same worker as initial guess
++ summary is streamed into a JSON-lines file, one record per variant with its `index`,
+    the result of each variant is saved into `variant_{index}.xdmf`
+"""
+
+import copy
+import itertools
+import json
+import math
+import multiprocessing
+import numbers
+import os.path
+from collections import OrderedDict
+from timeit import default_timer
+
+from .main import load_settings, create_solver
+
+# worker process states
+_base_settings = None
+_solutions = []  # [(parameters, vector local array)] of variants solved by this worker
+_max_stored_solutions = 8
+
+
+def set_by_path(settings, path, value):
+    """ set the value of nested dict/list by a dotted path, e.g. 'boundary_conditions.hot.values.0.value' """
+    keys = path.split('.')
+    d = settings
+    for k in keys[:-1]:
+        d = d[int(k)] if isinstance(d, list) else d[k]
+    k = keys[-1]
+    if isinstance(d, list):
+        d[int(k)] = value
+    else:
+        d[k] = value
+
+
+def _parameter_distance(p1, p2, scales):
+    # scaled distance, value of not a number counts as 1 if different
+    distance = 0.0
+    for k in p1:
+        if isinstance(p1[k], numbers.Number) and isinstance(p2[k], numbers.Number):
+            distance += abs(p1[k] - p2[k]) / scales[k]
+        elif p1[k] != p2[k]:
+            distance += 1.0
+    return distance
+
+
+def _init_worker(base_settings):
+    global _base_settings
+    _base_settings = base_settings
+    from .SolverBase import SolverBase
+    SolverBase.mesh_cache = {}
+    if isinstance(base_settings.get('mesh'), (str, type(u''))):
+        create_solver(copy.deepcopy(base_settings))  # import dolfin and read the mesh into cache
+
+
+def _set_initial_guess(solver, parameters, scales):
+    # the nearest previous solution of the same function space layout
+    from dolfin import Function
+    candidates = [s for s in _solutions if len(s[1]) == solver.function_space.dim()]
+    if not candidates:
+        return None
+    previous = min(candidates, key = lambda s: _parameter_distance(parameters, s[0], scales))
+    u0 = Function(solver.function_space)
+    if u0.vector().local_size() != len(previous[1]):
+        return None
+    u0.vector().set_local(previous[1])
+    u0.vector().apply('insert')
+    if solver.is_mixed_function_space:
+        solver.initial_values = u0
+    elif 'scalar_name' in solver.settings:
+        solver.initial_values[solver.settings['scalar_name']] = u0
+    else:
+        solver.initial_values[solver.settings['vector_name']] = u0
+    return previous[0]
+
+
+def _run_variant(args):
+    index, parameters, output_folder, using_initial_guess, scales = args
+    record = OrderedDict([('index', index), ('parameters', parameters)])
+    start = default_timer()
+    try:
+        settings = copy.deepcopy(_base_settings)
+        for path, value in parameters.items():
+            set_by_path(settings, path, value)
+        solver = create_solver(settings)
+        transient = solver.transient_settings['transient']
+        if using_initial_guess and not transient:
+            record['initial_guess'] = _set_initial_guess(solver, parameters, scales)
+        solver.solve()
+
+        result_filename = os.path.join(output_folder, 'variant_{:05d}.xdmf'.format(index))
+        solver.save(result_filename)
+        solver.close_result_writer()
+        record['result_filename'] = result_filename
+        record['field_range'] = OrderedDict((name, [f.vector().min(), f.vector().max()])
+                                            for name, f in solver.get_result_fields())
+        if not transient:
+            local_values = solver.w_current.vector().get_local()
+            _solutions.append((parameters, local_values))
+            if len(_solutions) > _max_stored_solutions:
+                _solutions.pop(0)
+        record['status'] = 'done'
+    except Exception as e:  # a failed variant should not stop the sweep
+        record['status'] = 'failed'
+        record['error'] = '{}: {}'.format(type(e).__name__, e)
+    record['wall_time'] = default_timer() - start
+    return record
+
+
+class ParameterSweep(object):
+    """ base_case: case settings dict or json file, the same input as `main.main()`
+    grid: OrderedDict of dotted path -> list of values
+    """
+    def __init__(self, base_case, grid, output_folder = 'sweep', processes = None,
+                 summary_filename = None, using_initial_guess = True):
+        self.base_settings = load_settings(base_case)
+        self.grid = OrderedDict(grid)
+        self.output_folder = output_folder
+        if processes:
+            self.processes = processes
+        else:
+            self.processes = multiprocessing.cpu_count()
+        if summary_filename:
+            self.summary_filename = summary_filename
+        else:
+            self.summary_filename = os.path.join(output_folder, 'summary.jsonl')
+        self.using_initial_guess = using_initial_guess
+
+        # plotting is not possible in worker process, result is saved by the worker
+        # dolfin is not imported in this process, it is imported by workers after fork
+        report_settings = copy.copy(self.base_settings.get('report_settings', {}))
+        report_settings.update({'plotting_freq': 0, 'plotting_interactive': False, 'saving_freq': 0})
+        self.base_settings['report_settings'] = report_settings
+
+    def get_variants(self):
+        keys = list(self.grid.keys())
+        return [OrderedDict(zip(keys, values)) for values in itertools.product(*self.grid.values())]
+
+    def _get_scales(self):
+        # range of numeric parameters to normalize the distance between variants
+        scales = {}
+        for k, values in self.grid.items():
+            numbers_ = [v for v in values if isinstance(v, numbers.Number)]
+            if len(numbers_) > 1 and max(numbers_) > min(numbers_):
+                scales[k] = float(max(numbers_) - min(numbers_))
+            else:
+                scales[k] = 1.0
+        return scales
+
+    def run(self):
+        """ return the list of summary records, ordered by variant index """
+        if not os.path.exists(self.output_folder):
+            os.makedirs(self.output_folder)
+        scales = self._get_scales()
+        tasks = [(i, p, self.output_folder, self.using_initial_guess, scales) for i, p in enumerate(self.get_variants())]
+        if not tasks:
+            return []
+
+        records = []
+        pool = multiprocessing.Pool(self.processes, _init_worker, (self.base_settings,))
+        try:
+            with open(self.summary_filename, 'w') as summary:
+                def write_record(record):
+                    summary.write(json.dumps(record) + '\n')
+                    summary.flush()  # summary can be read during the sweep
+                    records.append(record)
+                    print('variant {} is {}, wall time = {:.3f}'.format(record['index'], record['status'], record['wall_time']))
+
+                # JIT compilation is done by the first variant, before other workers start
+                write_record(pool.apply(_run_variant, (tasks[0],)))
+                # chunks of neighbouring variants to the same worker, for better initial guess
+                chunksize = max(1, int(math.ceil(len(tasks) / (4.0 * self.processes))))
+                for record in pool.imap_unordered(_run_variant, tasks[1:], chunksize):
+                    write_record(record)
+        finally:
+            pool.close()
+            pool.join()
+        return sorted(records, key = lambda r: r['index'])
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+from __future__ import print_function, division, absolute_import
+
+"""
+Feature: per-phase wall time and per-step iteration counts of a solver run
+
+Phases are timed exclusively, time spent in a nested phase is not counted into the outer phase,
+so the sum of all phases is the instrumented wall time. Nested phase is named by the path, e.g. 'fluid/linear_solve'. Iteration counts (Newton, Krylov, Picard)
+are accumulated for the current step and recorded by `end_step()`.
+`write()` dumps a JSON summary, or CSV tables (phases, and steps into `*_steps.csv`)
+"""
+
+import json
+import csv
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
+
+from dolfin import *
+
+
+class Profiler(object):
+    """ usage:
+    profiler = Profiler()
+    with profiler.phase('assembly'):
+        A = assemble(a)
+    profiler.add_iterations('newton', 5)
+    profiler.end_step(step, t)
+    profiler.write('profiling.json', mesh.mpi_comm())
+    """
+    def __init__(self):
+        self.phases = OrderedDict()  # name: [count, exclusive wall time]
+        self.steps = []
+        self._stack = []  # [name, start time, time of nested phases]
+        self._step_iterations = OrderedDict()
+        self._start = default_timer()
+        self._step_start = self._start
+
+    @contextmanager
+    def phase(self, name):
+        if self._stack:
+            name = self._stack[-1][0] + '/' + name
+        self._stack.append([name, default_timer(), 0.0])
+        try:
+            yield
+        finally:
+            name, start, nested = self._stack.pop()
+            elapsed = default_timer() - start
+            record = self.phases.setdefault(name, [0, 0.0])
+            record[0] += 1
+            record[1] += elapsed - nested
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def merge(self, other, prefix):
+        # collect phases of another profiler, e.g. setup of participant solvers of a coupled solver
+        for name, (count, t) in other.phases.items():
+            record = self.phases.setdefault(prefix + '/' + name, [0, 0.0])
+            record[0] += count
+            record[1] += t
+
+    def add_iterations(self, kind, n):
+        # kind: 'newton', 'krylov', 'picard', `n` can be None if the solver does not report it
+        if n is not None:
+            self._step_iterations[kind] = self._step_iterations.get(kind, 0) + int(n)
+
+    def set_step_value(self, name, value):
+        # other value of the current step, e.g. error ratio of predictor, recorded by `end_step()`
+        self._step_iterations[name] = value
+
+    def end_step(self, step, time, **kwargs):
+        now = default_timer()
+        record = OrderedDict([('step', step), ('time', float(time)), ('wall_time', now - self._step_start)])
+        record.update(self._step_iterations)
+        record.update(kwargs)
+        self.steps.append(record)
+        self._step_iterations = OrderedDict()
+        self._step_start = now
+
+    def summary(self):
+        phases = OrderedDict()
+        for name, (count, t) in self.phases.items():
+            phases[name] = OrderedDict([('count', count), ('wall_time', t)])
+        return OrderedDict([('total_wall_time', default_timer() - self._start),
+                            ('phases', phases),
+                            ('steps', self.steps),
+                            ('dolfin_timings', get_dolfin_timings())])
+
+    def write(self, filename, comm=None):
+        # only the root process writes, timing on other processes are similar
+        if comm is not None and MPI.rank(comm) != 0:
+            return
+        s = self.summary()
+        if filename[-5:] == ".json":
+            with open(filename, 'w') as f:
+                json.dump(s, f, indent=2)
+        elif filename[-4:] == ".csv":
+            with open(filename, 'w') as f:
+                writer = csv.writer(f)
+                writer.writerow(['phase', 'count', 'wall_time'])
+                for name, record in s['phases'].items():
+                    writer.writerow([name, record['count'], record['wall_time']])
+                writer.writerow(['total', 1, s['total_wall_time']])
+            if self.steps:
+                columns = []
+                for record in self.steps:
+                    columns += [k for k in record if k not in columns]
+                with open(filename[:-4] + '_steps.csv', 'w') as f:
+                    writer = csv.DictWriter(f, columns)
+                    writer.writeheader()
+                    writer.writerows(self.steps)
+        else:
+            raise ValueError('profiling file `{}` must have the suffix .json or .csv'.format(filename))
+
+    def report(self):
+        s = self.summary()
+        print("{:<24s} {:>8s} {:>12s}".format('phase', 'count', 'wall time'))
+        for name, record in s['phases'].items():
+            print("{:<24s} {:>8d} {:>12.4f}".format(name, record['count'], record['wall_time']))
+        print("{:<24s} {:>8d} {:>12.4f}".format('total', 1, s['total_wall_time']))
+
+
+def get_dolfin_timings():
+    """ table of dolfin internal timers as text, same as `list_timings()` """
+    try:
+        table = timings(TimingClear.keep, [TimingType.wall])  # Fenics 2018
+    except NameError:
+        table = timings(TimingClear_keep, [TimingType_wall])  # Fenics 2017
+    return table.str(True)
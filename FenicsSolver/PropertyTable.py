@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+
+from __future__ import print_function, division, absolute_import
+
+"""
+Feature: tabulated material property, e.g. measured thermal conductivity k(T)
+
+usage:
+    material['thermal_conductivity'] = PropertyTable([300, 400, 600, 800], [0.6, 0.65, 0.71, 0.74], 'pchip')
+
++ sorted breakpoints `x` and values `y`, interpolated by 'linear' or 'pchip' (monotone piecewise cubic Hermite),
+    value is kept constant out of the range of breakpoints
++ `evaluate()` and `derivative()` operate on numpy arrays, they are used by ScalarTransportSolver
+    to update property Functions in quadrature space for each Newton iteration
+"""
+
+import numpy as np
+
+supported_methods = {'linear', 'pchip'}
+
+
+class PropertyTable(object):
+    def __init__(self, x, y, method='linear'):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        if self.x.ndim != 1 or self.x.shape != self.y.shape or len(self.x) < 2:
+            raise ValueError('property table needs 1D breakpoints and values of the same length (>=2)')
+        if np.any(np.diff(self.x) <= 0):
+            raise ValueError('breakpoints of property table must be strictly increasing')
+        if method not in supported_methods:
+            raise ValueError('interpolation method `{}` is not supported, use one of {}'.format(method, supported_methods))
+        self.method = method
+        self._h = np.diff(self.x)
+        self._delta = np.diff(self.y) / self._h  # slope of each interval
+        if method == 'pchip':
+            self._slopes = self._pchip_slopes()
+
+    def _pchip_slopes(self):
+        # Fritsch-Carlson slopes, weighted harmonic mean of neighbouring secants, zero at local extremum
+        h, delta = self._h, self._delta
+        m = np.empty_like(self.y)
+        m[0], m[-1] = delta[0], delta[-1]
+        if len(delta) > 1:
+            w1 = 2 * h[1:] + h[:-1]
+            w2 = h[1:] + 2 * h[:-1]
+            same_sign = delta[:-1] * delta[1:] > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+            m[1:-1] = np.where(same_sign, harmonic, 0.0)
+        return m
+
+    def _locate(self, values):
+        # interval index and clipped values, out of range values are evaluated at the end points
+        v = np.clip(np.asarray(values, dtype=float), self.x[0], self.x[-1])
+        i = np.clip(np.searchsorted(self.x, v, side='right') - 1, 0, len(self.x) - 2)
+        return v, i
+
+    def evaluate(self, values):
+        v, i = self._locate(values)
+        if self.method == 'linear':
+            return self.y[i] + self._delta[i] * (v - self.x[i])
+        h = self._h[i]
+        t = (v - self.x[i]) / h
+        t2, t3 = t * t, t * t * t
+        return (2 * t3 - 3 * t2 + 1) * self.y[i] + (t3 - 2 * t2 + t) * h * self._slopes[i] \
+                + (-2 * t3 + 3 * t2) * self.y[i + 1] + (t3 - t2) * h * self._slopes[i + 1]
+
+    def derivative(self, values):
+        # d(property)/dx, zero out of the range of breakpoints
+        values = np.asarray(values, dtype=float)
+        v, i = self._locate(values)
+        if self.method == 'linear':
+            d = self._delta[i]
+        else:
+            h = self._h[i]
+            t = (v - self.x[i]) / h
+            t2 = t * t
+            d = ((6 * t2 - 6 * t) * self.y[i] + (3 * t2 - 4 * t + 1) * h * self._slopes[i]
+                 + (-6 * t2 + 6 * t) * self.y[i + 1] + (3 * t2 - 2 * t) * h * self._slopes[i + 1]) / h
+        return np.where((values < self.x[0]) | (values > self.x[-1]), 0.0, d)
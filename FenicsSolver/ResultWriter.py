@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+from __future__ import print_function, division, absolute_import
+
+"""
+Feature: long-lived result file for a solver case
+
+XDMF (default): mesh is written once, (sub)fields of all saved time steps are appended into a single HDF5 container,
+    it supports parallel IO under MPI, and the file can be opened by ParaView during the simulation
+pvd: legacy ascii VTK output, one pvd file for each (sub)field, vtu file for each time step
+"""
+
+from dolfin import *
+
+
+class ResultWriter(object):
+    """ a result file stream opened once per case, usage:
+    writer = ResultWriter('result.xdmf', mesh)
+    writer.write([('temperature', T)], t)
+    writer.close()
+    """
+    def __init__(self, filename, mesh, moving_mesh=False):
+        self.filename = filename
+        self.mesh = mesh
+        if filename[-5:] == ".xdmf":
+            self.format = 'xdmf'
+            self._xdmf = XDMFFile(mesh.mpi_comm(), filename)
+            self._xdmf.parameters["flush_output"] = True  # readable before closing, e.g. killed by batch queue
+            self._xdmf.parameters["functions_share_mesh"] = True  # all fields at one time step share one mesh
+            self._xdmf.parameters["rewrite_function_mesh"] = moving_mesh  # mesh is written only once if not moving
+        elif filename[-4:] == ".pvd":
+            self.format = 'pvd'
+            self._pvd_files = {}
+        else:
+            raise ValueError('result file `{}` must have the suffix .xdmf or .pvd'.format(filename))
+
+    def write(self, fields, t):
+        """ fields: a list of tuple (name, Function), sub function of mixed space should be collapsed by split(True)
+        """
+        for name, f in fields:
+            f.rename(name, name)  # the name shown in ParaView
+            if self.format == 'xdmf':
+                self._xdmf.write(f, float(t))
+            else:
+                if name not in self._pvd_files:
+                    if len(fields) == 1:
+                        pvd_filename = self.filename
+                    else:
+                        pvd_filename = self.filename[:-4] + '_' + name + '.pvd'
+                    self._pvd_files[name] = File(pvd_filename)
+                self._pvd_files[name] << (f, float(t))
+
+    def close(self):
+        if self.format == 'xdmf':
+            self._xdmf.close()
+        else:
+            self._pvd_files = {}
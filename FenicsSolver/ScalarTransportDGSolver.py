@@ -139,10 +139,10 @@ class ScalarTransportDGSolver(ScalarTransportSolver):
                 F = (a_int + a_fac + a_vel) * Constant(capacity)
 
             if integrals_N:
-                print("integrals_N", integrals_N)
+                self.logger.debug('integrals_N: %s', integrals_N)
                 F -= sum(integrals_N)  # FIXME: DG may need distinct newmann boundary flux
             # Linear form
-            if self.body_source:
+            if self.body_source is not None:
                 F -= Tq * self.body_source * dx
             return F
 
@@ -154,7 +154,7 @@ class ScalarTransportDGSolver(ScalarTransportSolver):
 
         if self.convective_velocity:  # convective heat conduction
             F = F_convective()
-            print('Discrete Galerkin method solves only advection-diffusion equation')
+            self.logger.warning('Discrete Galerkin method solves only advection-diffusion equation')
         else:
             F = None
             raise SolverError('Error: Discrete Galerkin method should be used with advection velocity')
@@ -162,13 +162,9 @@ class ScalarTransportDGSolver(ScalarTransportSolver):
         return F, bcs
 
     def solve_form(self, F, T_current, bcs):
-        if False:
-            self.solve_linear_problem(F, T_current, bcs)
-        else:
-            problem = LinearVariationalProblem(lhs(F), rhs(F), T_current, bcs)
-            solver = LinearVariationalSolver(problem)
-            solver.solve()
-            """
+        # `solver_parameters` and `linear_solver_settings` are applied by the base class
+        self.solve_linear_problem(F, T_current, bcs)
+        """
             a, L = lhs(F), rhs(F)
             print(a, L)
 
@@ -195,4 +191,5 @@ class ScalarTransportDGSolver(ScalarTransportSolver):
         _result = self.solve_transient()
         # Project solution to a continuous function space
         self.result = project(_result, V=self.function_space_CG)
+        self.write_profiling_report()
         return self.result
\ No newline at end of file
@@ -24,6 +24,8 @@
 
 from __future__ import print_function, division
 import math
+import copy
+import numbers
 import numpy as np
 
 from dolfin import *
@@ -35,10 +37,15 @@ electric_permittivity_in_vacumm = 8.854187817e-12
 # magnetic_potential is a vector, magnetostatics (static current) is solved in MaxwellEMSolver (permittivity/conductivity >> 1)
 # porous pressure, e.g. underground water pressure 
 
+# Kirchhoff transform of conductivity k(T) is tabulated in `temperature_range`, by default the breakpoints of PropertyTable
+default_kirchhoff_settings = {'temperature_range': None, 'samples': 2001}
+
 # thermal diffusivity = (thermal conductivity) / (density * specific heat)
 # thermal volumetric capacity = density * specific heat
 
-from .SolverBase import SolverBase, SolverError
+from .SolverBase import SolverBase, SolverError, default_linear_solver_settings
+from .PropertyTable import PropertyTable
+from .ViewFactorRadiation import ViewFactorRadiation, Stefan_constant
 class ScalarTransportSolver(SolverBase):
     """  general scalar transportation (diffusion and advection) solver, exampled by Heat Transfer
     # 4 types of boundaries supported: math, physical 
@@ -49,7 +56,12 @@ class ScalarTransportSolver(SolverBase):
     # Specific Heat Capacity, Cp:  J/(kg K)
     # thermal specific:
     # shear_heating: common in lubrication scinario, high viscosity and high shear speed, one kind of volume/body source
-    # radiation:  radiation_settings {}
+    # radiation:  radiation_settings {}, to ambient temperature from all boundaries, or surface to surface radiation
+    #     of `enclosure_boundary_ids` with `view_factor_settings`, see ViewFactorRadiation
+    # tabulated material property: PropertyTable of temperature, evaluated at quadrature points of degree
+    #     solver_settings['quadrature_degree'] (default 2*fe_degree) for each Newton iteration
+    # nonlinear_strategy: solver_settings['nonlinear_strategy'] = 'Kirchhoff', steady conduction with conductivity k(T)
+    #     is solved as one linear problem of the Kirchhoff variable, only Dirichlet, heat flux and symmetry boundaries
     """
     def __init__(self, s):
         SolverBase.__init__(self, s)
@@ -66,9 +78,30 @@ class ScalarTransportSolver(SolverBase):
             if callable(v):  # fixedme: if other material properties are functions, it will be regarded as nonlinear
                 self.nonlinear = True
 
+        if 'nonlinear_strategy' in self.solver_settings and self.solver_settings['nonlinear_strategy']:
+            self.nonlinear_strategy = self.solver_settings['nonlinear_strategy']
+        else:
+            self.nonlinear_strategy = 'Newton'
+        if self.nonlinear_strategy == 'Kirchhoff':
+            if self.transient_settings['transient'] or self.scalar_name != 'temperature':
+                raise SolverError('Kirchhoff transform is only applicable to steady heat conduction')
+            self.kirchhoff_settings = copy.copy(default_kirchhoff_settings)
+            if 'kirchhoff_settings' in self.solver_settings and self.solver_settings['kirchhoff_settings']:
+                self.kirchhoff_settings.update(self.solver_settings['kirchhoff_settings'])
+            self.nonlinear = False  # linear in the Kirchhoff variable
+        elif self.nonlinear_strategy != 'Newton':
+            raise SolverError('nonlinear_strategy `{}` is not supported'.format(self.nonlinear_strategy))
+        self._kirchhoff = None  # tabulated Kirchhoff transform
+
         if self.scalar_name == "eletric_potential":
             assert self.settings['transient_settings']['transient'] == False
         #delay the convective velocity and radiation setting detection in geneate_form()
+        self._velocity_function = None  # cached velocity Function on vector_function_space, updated in place
+        self._velocity_source = None  # setting value translated into the cached velocity Function
+        self._velocity_transfer = None  # (source function space, assigner, collapsed function, transfer matrix)
+        self._quadrature = None  # quadrature space and projector of the solution for PropertyTable material
+        self._property_tables = []  # (table, value Function, derivative Function) in quadrature space
+        self.enclosure_radiation = None  # ViewFactorRadiation, created once
 
     def capacity(self, T=None):
         # to calc diffusion coeff : conductivity/capacity, it must be number only for 
@@ -77,7 +110,12 @@ class ScalarTransportSolver(SolverBase):
         # if not found, calc it, otherwise, it is 
         elif self.scalar_name == "temperature":
             cp = self.material['specific_heat_capacity']
-            c = self.material['density'] * cp
+            if isinstance(cp, PropertyTable):
+                self.nonlinear_material = True
+                return self.material['density'] * self.get_property_table_value(cp, T)
+            if isinstance(cp, dict):
+                cp = self.get_material_value(cp)
+            c = self.get_material_value(self.material['density']) * cp
         elif self.scalar_name == "electric_potential":
             c = electric_permittivity_in_vacumm
         elif self.scalar_name == "spicies_concentration":
@@ -85,6 +123,9 @@ class ScalarTransportSolver(SolverBase):
         else:
             raise SolverError('material capacity property is not found for {}'.format(self.scalar_name))
         #print(type(c))
+        if isinstance(c, PropertyTable):
+            self.nonlinear_material = True
+            return self.get_property_table_value(c, T)
         from inspect import isfunction
         if isfunction(c):  # accept only function or lambda,  ulf.algebra.Product is also callable
             self.nonlinear_material = True
@@ -95,7 +136,7 @@ class ScalarTransportSolver(SolverBase):
         if 'diffusivity' in self.material:
             c = self.material['diffusivity']
         elif self.scalar_name == "temperature":
-            c = self.material['thermal_conductivity'] / self.capacity()
+            c = self.get_material_value(self.material['thermal_conductivity']) / self.capacity()
         elif self.scalar_name == "electric_potential":
             c = self.material['relative_electric_permittivity']
         elif self.scalar_name == "spicies_concentration":
@@ -122,26 +163,208 @@ class ScalarTransportSolver(SolverBase):
         else:
             c = self.diffusivity() * self.capacity()
         #print('conductivity', c)
+        if isinstance(c, PropertyTable):
+            self.nonlinear_material = True
+            return self.get_property_table_value(c, T)
         from inspect import isfunction
         if isfunction(c): 
             self.nonlinear_material = True
             return c(T)
         return self.get_material_value(c)  # todo: deal with nonlinear material
 
+    def using_property_table(self):
+        return any(isinstance(v, PropertyTable) for v in self.material.values())
+
+    def get_quadrature_degree(self):
+        if 'quadrature_degree' in self.solver_settings and self.solver_settings['quadrature_degree']:
+            return self.solver_settings['quadrature_degree']
+        return 2 * self.settings['fe_degree']
+
+    def setup_quadrature_space(self, T_current):
+        # solution is projected into quadrature space by a LocalSolver, which is factorized only once
+        if self._quadrature and self._quadrature['T_current'] is T_current:
+            return
+        degree = self.get_quadrature_degree()
+        element = FiniteElement('Quadrature', self.mesh.ufl_cell(), degree, quad_scheme='default')
+        Vq = FunctionSpace(self.mesh, element)
+        dxq = Measure('dx', domain=self.mesh, metadata={'quadrature_degree': degree, 'quadrature_scheme': 'default'})
+        projector = LocalSolver(inner(TrialFunction(Vq), TestFunction(Vq))*dxq, inner(T_current, TestFunction(Vq))*dxq)
+        projector.factorize()
+        self._quadrature = {'T_current': T_current, 'space': Vq, 'projector': projector, 'T': Function(Vq)}
+        self._property_tables = []
+
+    def get_property_table_value(self, table, T):
+        """ tabulated property as Functions in quadrature space, linearized at the projected solution T_q:
+        value(T_q) + slope(T_q) * (T - T_q), so the Jacobian by UFL derivative() includes the slope of the table
+        """
+        for entry in self._property_tables:
+            if entry[0] is table:
+                break
+        else:
+            Vq = self._quadrature['space']
+            entry = (table, Function(Vq), Function(Vq))
+            self._property_tables.append(entry)
+            self.update_property_tables()
+        value, slope = entry[1:]
+        if T is None:
+            return value
+        return value + slope * (T - self._quadrature['T'])
+
+    def update_property_tables(self):
+        # all tables are evaluated by numpy on the values of the solution at quadrature points
+        T_q = self._quadrature['T']
+        self._quadrature['projector'].solve_local_rhs(T_q)
+        T_values = T_q.vector().get_local()
+        for table, value, slope in self._property_tables:
+            value.vector().set_local(table.evaluate(T_values))
+            value.vector().apply('insert')
+            slope.vector().set_local(table.derivative(T_values))
+            slope.vector().apply('insert')
+
+    def update_nonlinear_coefficients(self, x):
+        if self._property_tables:
+            self.update_property_tables()
+        if self.enclosure_radiation is not None:
+            emissivity, T_ambient = self.get_radiation_properties()
+            self.enclosure_radiation.update(self._radiation_temperature, float(emissivity), float(T_ambient))
+
+    def setup_kirchhoff_transform(self):
+        """ Kirchhoff variable U = T_ref + 1/k_ref * integral(k(s), T_ref, T), k_ref = k(T_ref),
+        k(T) is tabulated by numpy on a fine temperature grid and integrated by trapezoidal rule,
+        out of the grid, k is constant as the end value. Return k_ref as the conductivity of the linear problem
+        """
+        if self._kirchhoff:
+            return self._kirchhoff['k_ref']
+        if 'conductivity' in self.material:
+            c = self.material['conductivity']
+        elif 'thermal_conductivity' in self.material:
+            c = self.material['thermal_conductivity']
+        else:
+            raise SolverError('conductivity material property is not found for Kirchhoff transform')
+        T_range = self.kirchhoff_settings['temperature_range']
+        if isinstance(c, PropertyTable):
+            k = c.evaluate
+            if not T_range:
+                T_range = (c.x[0], c.x[-1])
+        elif isinstance(c, numbers.Number):
+            k = lambda T: c
+        elif callable(c):
+            k = c  # function of T, it must accept numpy array
+        else:
+            raise SolverError('Kirchhoff transform needs a scalar conductivity, number, function of T or PropertyTable')
+        if not T_range:
+            raise SolverError('`temperature_range` in kirchhoff_settings is needed for conductivity {}'.format(c))
+
+        grid = np.linspace(T_range[0], T_range[1], self.kirchhoff_settings['samples'])
+        try:
+            k_grid = np.asarray(k(grid), dtype=float) * np.ones_like(grid)
+        except Exception as e:
+            raise SolverError('conductivity can not be evaluated on numpy array for Kirchhoff transform: {}'.format(e))
+        if np.any(k_grid <= 0):
+            raise SolverError('conductivity must be positive in the temperature range for Kirchhoff transform')
+        if 'temperature' in self.reference_values:
+            T_ref = self.reference_values['temperature']
+        else:
+            T_ref = grid[0]
+        k_ref = float(np.interp(T_ref, grid, k_grid))
+        U_grid = np.concatenate([[0.0], np.cumsum(0.5 * (k_grid[1:] + k_grid[:-1]) * np.diff(grid))]) / k_ref
+        self._kirchhoff = {'T': grid, 'k': k_grid, 'U': U_grid, 'k_ref': k_ref}
+        U_grid += T_ref - self.kirchhoff_transform(T_ref)  # U = T at reference temperature
+        self.logger.info('Kirchhoff transform in temperature range %s, k_ref = %g', T_range, k_ref)
+        return k_ref
+
+    def kirchhoff_transform(self, T):
+        # vectorized mapping T -> U, linear out of the grid
+        kt = self._kirchhoff
+        grid, U_grid, k_grid, k_ref = kt['T'], kt['U'], kt['k'], kt['k_ref']
+        T = np.asarray(T, dtype=float)
+        return np.interp(T, grid, U_grid) + np.minimum(T - grid[0], 0) * k_grid[0] / k_ref \
+                + np.maximum(T - grid[-1], 0) * k_grid[-1] / k_ref
+
+    def kirchhoff_inverse(self, U):
+        # vectorized mapping U -> T, U_grid is monotonic since conductivity is positive
+        kt = self._kirchhoff
+        grid, U_grid, k_grid, k_ref = kt['T'], kt['U'], kt['k'], kt['k_ref']
+        U = np.asarray(U, dtype=float)
+        return np.interp(U, U_grid, grid) + np.minimum(U - U_grid[0], 0) * k_ref / k_grid[0] \
+                + np.maximum(U - U_grid[-1], 0) * k_ref / k_grid[-1]
+
+    def kirchhoff_transform_value(self, T_bc):
+        # Dirichlet boundary value of the Kirchhoff variable
+        if isinstance(T_bc, (numbers.Number, Constant)):
+            return Constant(float(self.kirchhoff_transform(float(T_bc))))
+        U_bc = interpolate(T_bc, self.function_space)
+        U_bc.vector().set_local(self.kirchhoff_transform(U_bc.vector().get_local()))
+        U_bc.vector().apply('insert')
+        return U_bc
+
+    def get_velocity_function_space(self):
+        # created only once, generate_form() is called for each time step if form is not reused
+        if not hasattr(self, 'vector_function_space'):
+            self.vector_function_space = VectorFunctionSpace(self.mesh, 'CG', self.settings['fe_degree']+1)
+        return self.vector_function_space
+
     def get_convective_velocity_function(self, convective_velocity):
         import ufl.tensors  # used in coupled NS and energy form
-        if isinstance(convective_velocity, ufl.tensors.ListTensor):
-            return convective_velocity
+        if isinstance(convective_velocity, (ufl.tensors.ListTensor, Constant, Expression)):
+            return convective_velocity  # no interpolation is needed
+        elif isinstance(convective_velocity, Function):
+            # velocity field from a flow solver, values are copied into the cached velocity Function for each call
+            return self.transfer_velocity(convective_velocity)
         else:
-            self.vector_function_space = VectorFunctionSpace(self.mesh, 'CG', self.settings['fe_degree']+1)
-            vel = self.translate_value(convective_velocity, self.vector_function_space)
-            #print('type of convective_velocity', type(convective_velocity), type(vel))
-            #print("vel.ufl_shape", vel.ufl_shape)
-            return vel
+            if self._velocity_source is not convective_velocity:  # translated (interpolated) only once
+                self._velocity_function = self.translate_value(convective_velocity, self.get_velocity_function_space())
+                self._velocity_source = convective_velocity
+            return self._velocity_function
+
+    def get_velocity_transfer(self, V_source):
+        """ precomputed operator from the velocity space of flow solver to the velocity space of this solver,
+        FunctionAssigner if element and mesh are identical, otherwise a PETSc interpolation (transfer) matrix
+        """
+        if self._velocity_transfer and self._velocity_transfer[0] is V_source:
+            return self._velocity_transfer[1:]
+        V = self.get_velocity_function_space()
+        if V_source.ufl_element() == V.ufl_element() and V_source.mesh().id() == V.mesh().id():
+            assigner, collapsed, matrix = FunctionAssigner(V, V_source), None, None
+        else:
+            self.logger.debug('build transfer matrix for convective velocity from %s', V_source.ufl_element())
+            if len(V_source.component()):  # velocity sub space of the mixed space, e.g. up.split()[0]
+                V_collapsed = V_source.collapse()
+                assigner, collapsed = FunctionAssigner(V_collapsed, V_source), Function(V_collapsed)
+                V_source_collapsed = V_collapsed
+            else:
+                assigner, collapsed = None, None
+                V_source_collapsed = V_source
+            matrix = PETScDMCollection.create_transfer_matrix(V_source_collapsed, V)
+        self._velocity_transfer = (V_source, assigner, collapsed, matrix)
+        return self._velocity_transfer[1:]
+
+    def transfer_velocity(self, u):
+        assigner, collapsed, matrix = self.get_velocity_transfer(u.function_space())
+        if self._velocity_function is None or self._velocity_source is not None:
+            self._velocity_function = Function(self.get_velocity_function_space())
+            self._velocity_source = None  # the cached Function is updated from a Function
+        vel = self._velocity_function
+        if matrix is None:
+            assigner.assign(vel, u)
+        else:
+            if assigner:
+                assigner.assign(collapsed, u)
+                u = collapsed
+            matrix.mult(u.vector(), vel.vector())
+        return vel
+
+    def update_time_dependent_values(self):
+        SolverBase.update_time_dependent_values(self)
+        # the reused form holds the cached velocity Function, new values of the flow solver are copied in place
+        if isinstance(self.convective_velocity, Function):
+            self.transfer_velocity(self.convective_velocity)
 
     def update_boundary_conditions(self, time_iter_, T, Tq, ds):
         # test_function is removed from integrals_N items, so SPUG residual can include boundary condition
         capacity = self.capacity(T) # constant, experssion or tensor
+        # quadrature Function of PropertyTable can not be integrated on boundary facets
+        tabulated_capacity = any(isinstance(self.material.get(k), PropertyTable) for k in ('capacity', 'specific_heat_capacity'))
 
         bcs = []
         integrals_N = []
@@ -165,16 +388,24 @@ class ScalarTransportSolver(SolverBase):
         for name, bc_settings in self.boundary_conditions.items():
             i = bc_settings['boundary_id']
             bc = self.get_boundary_variable(bc_settings)  # should deal with 'value' and 'values = []'
+            if self.nonlinear_strategy == 'Kirchhoff':
+                if not (bc['type'] in ('Dirichlet', 'fixedValue', 'symmetry') or bc['type'].lower().find('flux')>=0) \
+                        or isinstance(bc['value'], DirichletBC):
+                    raise SolverError('boundary `{}` of type `{}` is not supported by Kirchhoff transform'.format(name, bc['type']))
 
             if bc['type'] == 'Dirichlet' or bc['type'] == 'fixedValue':
                 if not isinstance(bc['value'], DirichletBC):
                     T_bc = self.translate_value(bc['value'])
+                    if self.nonlinear_strategy == 'Kirchhoff':
+                        T_bc = self.kirchhoff_transform_value(T_bc)
                     dbc = DirichletBC(self.function_space, T_bc, self.boundary_facets, i)
                     bcs.append(dbc)
                 else:
                     bcs.append(bc['value'])
             elif bc['type'] == 'Neumann' or bc['type'] =='fixedGradient':  # unit: K/m
                 g = self.translate_value(bc['value'])
+                if tabulated_capacity and not self.using_diffusion_form:
+                    raise SolverError('gradient boundary `{}` is not supported for tabulated capacity, use heatFlux'.format(name))
                 if self.using_diffusion_form:
                     integrals_N.append(g*Tq*ds(i))
                 else:
@@ -212,15 +443,15 @@ class ScalarTransportSolver(SolverBase):
 
     def get_body_source_items(self, time_iter_, T, Tq, dx):
         bs = self.get_body_source()  # defined in base solver, has already translated value
-        print("body source: ", bs)
-        if bs and isinstance(bs, dict):
+        self.logger.debug('body source: %s', bs)
+        if isinstance(bs, dict):
             S = []
             for k,v in bs.items():
                 # it is good to using DG for multi-scale meshing, subdomain marking double
                 S.append(v['value']*Tq*dx(v['subdomain_id']))
             return S
         else:
-            if bs:
+            if bs is not None:  # truth value of a scalar UFL coefficient is not defined
                 return [bs*Tq*dx]
             else:
                 return None
@@ -229,11 +460,20 @@ class ScalarTransportSolver(SolverBase):
         # T, Tq can be shared between time steps, form is unified diffussion coefficient
         normal = FacetNormal(self.mesh)
 
-        dx= Measure("dx", subdomain_data=self.subdomains)  # cells
+        if self.using_property_table():
+            # property Functions in quadrature space must be integrated on the same points
+            self.setup_quadrature_space(T_current)
+            dx= Measure("dx", subdomain_data=self.subdomains,
+                        metadata={'quadrature_degree': self.get_quadrature_degree(), 'quadrature_scheme': 'default'})
+        else:
+            dx= Measure("dx", subdomain_data=self.subdomains)  # cells
         ds= Measure("ds", subdomain_data=self.boundary_facets)  #boundary cells
         #dS = Measure("dS", subdomain_data=self.boundary_facets)  
 
-        conductivity = self.conductivity(T) # constant, experssion or tensor, function of T for nonlinear
+        if self.nonlinear_strategy == 'Kirchhoff':  # linear conduction of the Kirchhoff variable
+            conductivity = Constant(self.setup_kirchhoff_transform())
+        else:
+            conductivity = self.conductivity(T) # constant, experssion or tensor, function of T for nonlinear
         #print('conductivity = ', conductivity)
         capacity = self.capacity(T)  # density * specific capacity -> volumetrical capacity
         #print('capacity = ', capacity)
@@ -246,6 +486,8 @@ class ScalarTransportSolver(SolverBase):
                 self.convective_velocity = self.settings['convective_velocity']
             else:
                 self.convective_velocity = None
+        if self.convective_velocity and self.nonlinear_strategy == 'Kirchhoff':
+            raise SolverError('convective heat transfer is not supported by Kirchhoff transform')
 
         if self.convective_velocity:
             if 'advection_settings' in self.settings:
@@ -258,7 +500,7 @@ class ScalarTransportSolver(SolverBase):
 
             if ads['stabilization_method'] == 'SPUG':
                 # Add SUPG stabilisation terms
-                print('solving convection by SPUG stablization')
+                self.logger.debug('solving convection by SPUG stablization')
                 #`Numerical simulations of advection-dominated scalar mixing with applications to spinal CSF flow and drug transport` page 20
                 # SPUG_method == 2, ref: 
                 vnorm = sqrt(dot(velocity, velocity))
@@ -285,7 +527,7 @@ class ScalarTransportSolver(SolverBase):
             return  inner(conductivity * grad(T), grad(Tq))*dx
 
         if self.transient_settings['transient']:
-            dt = self.get_time_step(time_iter_)
+            dt = self.get_time_step_constant(time_iter_)
             theta = Constant(0.5) # Crank-Nicolson time scheme
             # Define time discretized equation, it depends on scalar type:  Energy, Species,
             # FIXME: nonlinear capacity is not supported
@@ -310,7 +552,7 @@ class ScalarTransportSolver(SolverBase):
             else:
                 F += inner(velocity, grad(T))*Tq*capacity*dx
             if ads['stabilization_method'] and ads['stabilization_method'] == 'IP':
-                print('solving convection by interior penalty stablization')
+                self.logger.debug('solving convection by interior penalty stablization')
                 alpha = Constant(ads['alpha'])
                 F +=  alpha*avg(h)**2*inner(jump(grad(T),normal), jump(grad(Tq),normal))*capacity*dS
                 # http://www.karlin.mff.cuni.cz/~hron/fenics-tutorial/convection_diffusion/doc.html
@@ -329,7 +571,7 @@ class ScalarTransportSolver(SolverBase):
 
         using_mass_conservation = False # not well tested, Nitsche boundary
         if using_mass_conservation:
-            print('mass conservation compensation for zero mass flux on the curved boundary')
+            self.logger.debug('mass conservation compensation for zero mass flux on the curved boundary')
             sigma = Constant(2) # penalty parameter
             #he = self.mesh.ufl_cell().max_facet_edge_length,    T - Constant(300)
             #F -= inner(dot(velocity, normal), dot(grad(T), normal))*Tq*capacity*ds  # (1.0/ h**sigma) *
@@ -344,13 +586,19 @@ class ScalarTransportSolver(SolverBase):
             else:
                 self.has_radiation = False
 
+            if self.has_radiation and self.nonlinear_strategy == 'Kirchhoff':
+                raise SolverError('radiation boundary is not supported by Kirchhoff transform')
             if self.has_radiation:
                 #print(m_, radiation_flux, F)
                 self.nonlinear = True
-                F -= self.radiation_flux(T)*Tq*ds # for all surface, without considering view angle
+                if 'enclosure_boundary_ids' in self.radiation_settings and self.radiation_settings['enclosure_boundary_ids']:
+                    ids = tuple(self.radiation_settings['enclosure_boundary_ids'])
+                    F -= self.enclosure_radiation_flux(T, T_current)*Tq*ds(ids)
+                else:
+                    F -= self.radiation_flux(T)*Tq*ds # for all surface, without considering view angle
         
         #print(F)
-        if self.nonlinear_material:
+        if self.nonlinear_material and self.nonlinear_strategy != 'Kirchhoff':  # capacity is not in steady conduction
             self.nonlinear = True
         if self.nonlinear:
             F = action(F, T_current)  # API 1.0 still working ; newer API , replacing TrialFunction with Function for nonlinear 
@@ -358,8 +606,7 @@ class ScalarTransportSolver(SolverBase):
 
         return F, bcs
 
-    def radiation_flux(self, T):
-            Stefan_constant = 5.670367e-8  # W/m-2/K-4
+    def get_radiation_properties(self):
             if 'emissivity' in self.material:
                 emissivity = self.material['emissivity']  # self.settings['radiation_settings']['emissivity'] 
             elif 'emissivity' in self.radiation_settings:
@@ -370,18 +617,80 @@ class ScalarTransportSolver(SolverBase):
                 T_ambient_radiaton = self.radiation_settings['ambient_temperature']
             else:
                 T_ambient_radiaton = self.reference_values['temperature']
+            return emissivity, T_ambient_radiaton
+
+    def get_enclosure_radiation(self):
+        # view factors are computed (or loaded from cache file) only once
+        if self.enclosure_radiation is None:
+            if 'view_factor_settings' in self.radiation_settings and self.radiation_settings['view_factor_settings']:
+                vfs = copy.copy(self.radiation_settings['view_factor_settings'])
+            else:
+                vfs = {}
+            if 'cache_folder' not in vfs or not vfs['cache_folder']:
+                vfs['cache_folder'] = self.settings['case_folder']
+            with self.profiler.phase('view_factor'):
+                self.enclosure_radiation = ViewFactorRadiation(self.mesh, self.boundary_facets,
+                            self.radiation_settings['enclosure_boundary_ids'], vfs, self.logger)
+        return self.enclosure_radiation
+
+    def enclosure_radiation_flux(self, T, T_current):
+        # irradiation G is updated by radiosity solve at form generation and each Newton iteration, lagged in Jacobian
+        emissivity, T_ambient = self.get_radiation_properties()
+        model = self.get_enclosure_radiation()
+        self._radiation_temperature = T_current
+        model.update(T_current, float(emissivity), float(T_ambient))
+        return emissivity * (model.irradiation - Stefan_constant * pow(T, 4))
 
+    def radiation_flux(self, T):
+            emissivity, T_ambient_radiaton = self.get_radiation_properties()
             m_ = emissivity * Stefan_constant
             radiation_flux = m_*(T_ambient_radiaton**4 - pow(T, 4))  # it is nonlinear item
             return radiation_flux
 
+    def get_time_scheme_order(self):
+        return 2  # Crank-Nicolson
+
     def solve_form(self, F, T_current, bcs):
         if self.nonlinear:
-            print('solving by nonlinear solver')
+            self.logger.debug('solving by nonlinear solver')
+            if (self._property_tables or self.enclosure_radiation) and not self.linear_solver_settings:
+                # tables and irradiation must be updated for each Newton iteration, only done by the Newton solver path
+                self.logger.debug('Newton solver with LU is forced to update property tables and irradiation per iteration')
+                return self.solve_nonlinear_problem(F, T_current, bcs, self.J, dict(default_linear_solver_settings, method='lu'))
             return self.solve_nonlinear_problem(F, T_current, bcs, self.J)
+        elif self.nonlinear_strategy == 'Kirchhoff':
+            U = self.solve_linear_problem(F, T_current, bcs)
+            U.vector().set_local(self.kirchhoff_inverse(U.vector().get_local()))  # temperature at dof
+            U.vector().apply('insert')
+            return U
         else:
             return self.solve_linear_problem(F, T_current, bcs)
 
+    def capacitance_matrix(self, electrodes):
+        """ N x N capacitance (or conductance) matrix of electrodes, names in `boundary_conditions`,
+        for the load case j, electrode j is at unit potential and others are grounded, all cases share one factorization.
+        C_ij = integral(permittivity * grad(phi_i) . grad(phi_j)), which is symmetric. Return (C, potential Functions)
+        """
+        load_cases = []
+        for name in electrodes:
+            case = {}
+            for other in electrodes:
+                bc = dict((k, v) for k, v in self.boundary_conditions[other].items() if k != 'values')
+                bc['type'] = 'Dirichlet'
+                bc['value'] = Constant(1.0 if other == name else 0.0)
+                case[other] = bc
+            load_cases.append({'boundary_conditions': case})
+        potentials = self.solve_load_cases(load_cases)
+
+        u, v = TrialFunction(self.function_space), TestFunction(self.function_space)
+        K = assemble(inner(self.conductivity() * grad(u), grad(v))*dx)  # without boundary conditions
+        C = np.zeros((len(electrodes), len(electrodes)))
+        for j, phi_j in enumerate(potentials):
+            K_phi = K * phi_j.vector()
+            for i, phi_i in enumerate(potentials):
+                C[i, j] = phi_i.vector().inner(K_phi)
+        return C, potentials
+
     ############## public API ##########################
 
     def export(self):
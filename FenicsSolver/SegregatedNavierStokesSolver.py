@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+from __future__ import print_function, division, absolute_import
+
+"""
+Feature: segregated incremental pressure correction scheme (IPCS) for transient incompressible laminar flow
+
+same case settings and boundary_conditions dict as CoupledNavierStokesSolver, solution is kept in the same
+mixed function space (velocity, pressure), so result saving, plotting and checkpoint are shared.
+For each time step, 3 linear systems are solved, on the collapsed velocity and pressure function spaces:
+1. tentative velocity, Crank-Nicolson for viscous term, explicit convection
+2. pressure correction, Poisson equation
+3. velocity correction, mass matrix
+All matrices are assembled and boundary conditions are applied only once (matrix 1 is assembled again if time
+step changes), linear solvers are created once and keep the factorization or AMG preconditioner.
+
+`segregated_settings` in 'solver_settings': {'linear_solver': 'iterative'} (default, AMG preconditioned Krylov
+solvers warm started from the previous step) or 'direct' (LU factorized once).
+Velocity boundary types: Dirichlet, farfield; pressure boundary types: Dirichlet, farfield.
+If there is no pressure Dirichlet boundary, pressure is determined up to a constant, removed by nullspace.
+
+Limitation: transient only, Newtonian fluid, no temperature coupling, no ALE reference frame,
+no predictor since each step solves only linear systems.
+"""
+
+from dolfin import *
+
+from .SolverBase import SolverError
+from .CoupledNavierStokesSolver import CoupledNavierStokesSolver
+
+default_segregated_settings = {'linear_solver': 'iterative'}
+
+class SegregatedNavierStokesSolver(CoupledNavierStokesSolver):
+    """ incompressible and laminar transient flow by IPCS, a fractional step (projection) scheme
+    """
+    def __init__(self, case_input):
+        CoupledNavierStokesSolver.__init__(self, case_input)
+        if self.solving_temperature:
+            raise SolverError('temperature coupling is not supported by SegregatedNavierStokesSolver')
+        if not self.transient_settings['transient']:
+            raise SolverError('SegregatedNavierStokesSolver is only for transient flow')
+        if 'Newtonian' in self.material and (not self.material['Newtonian']):
+            raise SolverError('nonNewtonian viscosity is not supported by SegregatedNavierStokesSolver')
+        if 'reference_frame_settings' in self.settings and self.settings['reference_frame_settings']:
+            raise SolverError('reference_frame_settings is not supported by SegregatedNavierStokesSolver')
+        if self.predictor != 'constant':  # Krylov solvers are warm started from the previous step
+            raise SolverError('predictor is not supported by SegregatedNavierStokesSolver')
+        self.segregated_settings = dict(default_segregated_settings)
+        if 'segregated_settings' in self.solver_settings and self.solver_settings['segregated_settings']:
+            self.segregated_settings.update(self.solver_settings['segregated_settings'])
+        # time-varying boundary values are updated in place for each time step
+        self.reusing_form = True
+        self._ipcs = None
+
+    def generate_segregated_bcs(self, V, Q):
+        bcu = []
+        bcp = []
+        for key, boundary in self.boundary_conditions.items():
+            if 'coupling' in boundary and boundary['coupling'] == 'FSI':
+                if not 'values' in boundary:
+                    boundary['values'] = [{'variable': "velocity",'type': 'Dirichlet', 'value': self.dimension*(0.0,)}]
+            if 'values' in boundary and isinstance(boundary['values'], list):
+                bc_values = boundary['values']
+            else:
+                bc_values = boundary['values'].values()
+            for bc in bc_values:
+                if bc['variable'] == 'velocity':
+                    if bc['type'] == 'Dirichlet':
+                        bvalue = self.translate_value(bc['value'], V)
+                        bcu.append(DirichletBC(V, bvalue, self.boundary_facets, boundary['boundary_id']))
+                    elif bc['type'] != 'farfield':  # farfield is the natural boundary of tentative velocity step
+                        self.logger.warning('velocity boundary type `%s` is not supported thus ignored', bc['type'])
+                elif bc['variable'] == 'pressure':
+                    if bc['type'] == 'Dirichlet':
+                        bvalue = self.translate_value(bc['value'], Q)
+                        bcp.append(DirichletBC(Q, bvalue, self.boundary_facets, boundary['boundary_id']))
+                    elif bc['type'] != 'farfield':
+                        self.logger.warning('pressure boundary type `%s` is not supported thus ignored', bc['type'])
+                else:
+                    self.logger.debug('boundary of %s is ignored by segregated solver', bc['variable'])
+        return bcu, bcp
+
+    def create_step_solver(self, A, method, preconditioner):
+        if self.segregated_settings['linear_solver'] == 'direct':
+            solver = LUSolver(A)
+            if 'reuse_factorization' in solver.parameters:  # Fenics 2017, later version reuses factorization by default
+                solver.parameters['reuse_factorization'] = True
+        else:
+            solver = PETScKrylovSolver(method, preconditioner)
+            solver.set_operator(A)
+            if 'nonzero_initial_guess' in solver.parameters:  # warm start from the previous time step
+                solver.parameters['nonzero_initial_guess'] = True
+            if 'monitor_convergence' in solver.parameters:
+                solver.parameters['monitor_convergence'] = False
+        return solver
+
+    def setup_ipcs(self):
+        """ forms, matrices, boundary conditions and linear solvers, built only once """
+        W = self.function_space
+        V = W.sub(0).collapse()
+        Q = W.sub(1).collapse()
+        ipcs = {'V': V, 'Q': Q}
+        u, v = TrialFunction(V), TestFunction(V)
+        p, q = TrialFunction(Q), TestFunction(Q)
+        u_n, u_ = Function(V), Function(V)
+        p_n, p_ = Function(Q), Function(Q)
+        ipcs.update({'u_n': u_n, 'u_': u_, 'p_n': p_n, 'p_': p_})
+
+        dt = self.get_time_step(self.current_step)
+        k = Constant(dt)
+        rho = Constant(self.material['density'])
+        mu = Constant(self.material['kinematic_viscosity'] * self.material['density'])
+        n = FacetNormal(self.mesh)
+        ds = Measure("ds", subdomain_data=self.boundary_facets)
+        U = 0.5*(u_n + u)
+        def epsilon(u):
+            return sym(nabla_grad(u))
+        def sigma(u, p):
+            return 2*mu*epsilon(u) - p*Identity(len(u))
+
+        # tentative velocity
+        F1 = rho*dot((u - u_n) / k, v)*dx \
+           + rho*dot(dot(u_n, nabla_grad(u_n)), v)*dx \
+           + inner(sigma(U, p_n), epsilon(v))*dx \
+           + dot(p_n*n, v)*ds - dot(mu*nabla_grad(U)*n, v)*ds
+        if self.settings['body_source']:  # acceleration like gravity
+            F1 -= rho*dot(self.get_body_source(), v)*dx
+        ipcs['a1'], ipcs['L1'] = lhs(F1), rhs(F1)
+        # pressure correction
+        ipcs['a2'] = dot(nabla_grad(p), nabla_grad(q))*dx
+        ipcs['L2'] = dot(nabla_grad(p_n), nabla_grad(q))*dx - (rho/k)*div(u_)*q*dx
+        # velocity correction
+        ipcs['a3'] = dot(u, v)*dx
+        ipcs['L3'] = dot(u_, v)*dx - (k/rho)*dot(nabla_grad(p_ - p_n), v)*dx
+
+        bcu, bcp = self.generate_segregated_bcs(V, Q)
+        with self.profiler.phase('assembly'):
+            A1 = assemble(ipcs['a1'])
+            A2 = assemble(ipcs['a2'])
+            A3 = assemble(ipcs['a3'])
+        with self.profiler.phase('bc_application'):
+            for bc in bcu:
+                bc.apply(A1)
+            for bc in bcp:
+                bc.apply(A2)
+        ipcs.update({'k': k, 'dt': dt, 'A1': A1, 'A2': A2, 'A3': A3, 'bcu': bcu, 'bcp': bcp})
+
+        if not bcp:  # pressure is determined up to a constant
+            null_vector = p_.vector().copy()
+            null_vector[:] = 1.0
+            null_vector *= 1.0/null_vector.norm('l2')
+            ipcs['nullspace'] = VectorSpaceBasis([null_vector])
+            as_backend_type(A2).set_nullspace(ipcs['nullspace'])
+        else:
+            ipcs['nullspace'] = None
+
+        ipcs['solver1'] = self.create_step_solver(A1, 'bicgstab', 'hypre_amg')
+        if ipcs['nullspace'] and self.segregated_settings['linear_solver'] == 'direct':
+            self.logger.warning('pressure without Dirichlet boundary is singular, Krylov solver is used for pressure')
+            ipcs['solver2'] = PETScKrylovSolver('cg', 'hypre_amg')
+            ipcs['solver2'].set_operator(A2)
+        else:
+            ipcs['solver2'] = self.create_step_solver(A2, 'cg', 'hypre_amg')
+        ipcs['solver3'] = self.create_step_solver(A3, 'cg', 'sor')
+
+        # mixed function space <-> collapsed sub function space
+        ipcs['assigner_from_mixed'] = FunctionAssigner([V, Q], W)
+        ipcs['assigner_to_mixed'] = FunctionAssigner(W, [V, Q])
+        ipcs['assigner_from_mixed'].assign([u_, p_], self.w_current)  # initial guess of the Krylov solvers
+        self._ipcs = ipcs
+
+    def solve_step_system(self, solver, A, x, b, nullspace=None):
+        if nullspace:
+            nullspace.orthogonalize(b)
+        with self.profiler.phase('linear_solve'):
+            if self.segregated_settings['linear_solver'] == 'direct' and not nullspace:
+                solver.solve(x, b)
+            else:
+                iterations = solver.solve(x, b)
+                self.profiler.add_iterations('krylov', iterations)
+
+    def solve_current_step(self):
+        if self._ipcs is None:
+            self.setup_ipcs()
+        else:
+            self.update_time_dependent_values()
+            if not self._form_reusable:  # e.g. time-varying Expression, boundary dofs are not changed
+                self._ipcs['bcu'], self._ipcs['bcp'] = self.generate_segregated_bcs(self._ipcs['V'], self._ipcs['Q'])
+        ipcs = self._ipcs
+        dt = self.get_time_step(self.current_step)
+        if dt != ipcs['dt']:  # only matrix of the tentative velocity depends on time step
+            ipcs['k'].assign(Constant(dt))
+            ipcs['dt'] = dt
+            with self.profiler.phase('assembly'):
+                assemble(ipcs['a1'], tensor=ipcs['A1'])
+            with self.profiler.phase('bc_application'):
+                for bc in ipcs['bcu']:
+                    bc.apply(ipcs['A1'])
+            ipcs['solver1'].set_operator(ipcs['A1'])
+
+        # time levels are shifted as in SolverBase, used by adaptive time step
+        if self._w_ppp is not None:
+            self._w_ppp.zero()
+            self._w_ppp.axpy(1.0, self.w_pp.vector())
+        self.w_pp.assign(self.w_prev)
+        self.w_prev.assign(self.w_current)
+        u_n, u_, p_n, p_ = ipcs['u_n'], ipcs['u_'], ipcs['p_n'], ipcs['p_']
+        ipcs['assigner_from_mixed'].assign([u_n, p_n], self.w_prev)
+
+        with self.profiler.phase('tentative_velocity'):
+            with self.profiler.phase('assembly'):
+                b1 = assemble(ipcs['L1'])
+            for bc in ipcs['bcu']:
+                bc.apply(b1)
+            self.solve_step_system(ipcs['solver1'], ipcs['A1'], u_.vector(), b1)
+        with self.profiler.phase('pressure_correction'):
+            with self.profiler.phase('assembly'):
+                b2 = assemble(ipcs['L2'])
+            for bc in ipcs['bcp']:
+                bc.apply(b2)
+            self.solve_step_system(ipcs['solver2'], ipcs['A2'], p_.vector(), b2, ipcs['nullspace'])
+        with self.profiler.phase('velocity_correction'):
+            with self.profiler.phase('assembly'):
+                b3 = assemble(ipcs['L3'])
+            self.solve_step_system(ipcs['solver3'], ipcs['A3'], u_.vector(), b3)
+
+        ipcs['assigner_to_mixed'].assign(self.w_current, [u_, p_])
+        self.result = self.w_current
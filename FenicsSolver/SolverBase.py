@@ -27,11 +27,52 @@ from __future__ import print_function, division, absolute_import
 """
 Feature: provide basic shared methods like translate_value(), build mesh and function_space
 
+'mesh'
++ xml or xdmf mesh file, with marker files `*_facet_region.*` and `*_physical_region.*`, is converted on first load
+    into a HDF5 file (mesh, /subdomains, /boundaries) in `mesh_cache_folder` (default the mesh folder),
+    named by the hash of mesh and marker files, later loads read this file in parallel. Set `caching_mesh` False to disable
+
 'transient_settings'
 + default to fixed time step, specifying `time_step`, can specify a numpy.array of time_points
++ `adaptive_settings`: time step is adapted by local error estimation, see `default_adaptive_settings`,
+    error is estimated from the difference to extrapolation of previous solutions, linear (w_prev, w_pp) for
+    first order scheme like backward Euler, quadratic (and w_ppp) for second order scheme like Crank-Nicolson,
+    see `get_time_scheme_order()`. Step is rejected and repeated with a smaller step if the scaled error is above 1
 + temporal differentiation
     - Crank-Nicolson (2nd , unconditionally stable for diffusion problem) for ScalarTransportSolver
     - NS function, backward Euler for the time being.
++ `reusing_operator` in 'solver_settings': for linear problem with time-invariant bilinear form,
+    the matrix is assembled and factorized only once, only the right hand side is assembled for each time step
++ `predictor` in 'solver_settings': initial guess of each time step, 'constant' (default, previous solution),
+    'linear' or 'quadratic' extrapolation from previous time levels with non-uniform time step.
+    Ratio of error of the predicted to the constant guess and nonlinear iterations are recorded for each step
++ `checkpoint_settings` in 'solver_settings': time levels (w_current, w_prev, w_pp), step and time are written
+    into a HDF5 file every `checkpoint_freq` steps and on SIGTERM, to restart from `restart_filename`
++ `reusing_form` in 'solver_settings': form, boundary conditions and solver object are built only once,
+    time step and time-varying values (callable or time series) are wrapped into Constant/Function,
+    which are updated in place by `assign()` for each time step, see `update_time_dependent_values()`
++ `solver_parameters` in 'solver_settings': mapping to `solver.parameters` of Fenics, nested dict like
+    'newton_solver', 'krylov_solver' and 'lu_solver' is applied recursively
++ `linear_solver_settings` in 'solver_settings': PETSc KSP and PC for this solver instance, see `default_linear_solver_settings`,
+    `petsc_options` dict is passed to PETSc with the option prefix of this solver, so several solvers can coexist.
+    It is used by linear solve, and by the Newton solver of nonlinear problem
++ `nonlinear_solver_settings` in 'solver_settings': {'method': 'snes'} to solve nonlinear problem by PETSc SNES,
+    with line search, lagged Jacobian and preconditioner (modified Newton), Eisenstat-Walker inexact Newton,
+    see `default_nonlinear_solver_settings`, residual norm of each iteration is logged (petsc4py is needed)
++ `solve_load_cases()`: steady linear problem with several boundary value/body source configurations,
+    the operator is assembled and factorized once, right hand sides are solved as a dense block by PETSc in serial
+
+'material' and 'body_source'
++ multi-region value is a dict {'region1': {'subdomain_id': 1, 'value': 0.6}, ...} of number, vector or tensor value,
+    it is translated into a piecewise constant (DG0) Function by numpy indexing of `subdomains` markers,
+    so the form has one coefficient instead of one integral for each region
+
+'report_settings'
++ `logging_profile`: 'quiet' for production run, only warnings and errors are logged, convergence monitor
+    of linear solvers and dolfin log below warning are turned off. Under MPI, only rank 0 emits messages below ERROR
++ `profiling_file`: wall time of each phase (mesh, function space, form, compilation, assembly, BC, solve, IO, plot),
+    iteration numbers of each step and dolfin timings are written into a JSON or CSV file at the end of `solve()`
++ `result_filename`: XDMF file (default) keeps mesh and all saved (sub)fields in one HDF5 container, or legacy pvd
     
 """
 
@@ -51,28 +92,143 @@ else:
 
 import numbers
 import copy
+import hashlib
 import logging
 import numpy as np
 import os.path
+import signal
 
 # import math may cause error
 from dolfin import *
 
+from .ResultWriter import ResultWriter
+from .Profiler import Profiler
+
 class SolverError(Exception):
     pass
 
-default_report_settings  = {"logging_level": logging.DEBUG,  "logging_file": None,
+# global parameters, set once on import, instead of for each solver object
+parameters["linear_algebra_backend"] = "PETSc"  #UMFPACK: out of memory, PETSc divergent
+#parameters["linear_algebra_backend"] = "Eigen"  # 'uBLAS' is not supported any longer
+parameters["mesh_partitioner"] = "SCOTCH"
+#parameters["form_compiler"]["representation"] = "quadrature"
+parameters["form_compiler"]["optimize"] = True
+
+def get_world_rank():
+    try:
+        return MPI.rank(mpi_comm_world())
+    except:  # Fenics 2018.1:Rename mpi_comm_world() to MPI.comm_world.
+        return MPI.rank(MPI.comm_world)
+
+class MPIRankFilter(logging.Filter):
+    """ message below ERROR level is only emitted by the root process under MPI """
+    def __init__(self, rank):
+        logging.Filter.__init__(self)
+        self.rank = rank
+
+    def filter(self, record):
+        return self.rank == 0 or record.levelno >= logging.ERROR
+
+default_report_settings  = {"logging_level": logging.DEBUG,  "logging_file": None, "logging_profile": None,
                             "plotting_freq": 10, 'plotting_interactive': True, 'plotting_file': None,
-                            'saving_freq': 10, 'result_filename': None}
+                            'saving_freq': 10, 'result_filename': None, 'profiling_file': None}
 
 # directly mapping to solver.parameters of Fenics
 default_solver_parameters = {"relative_tolerance": 1e-5,
                              "maximum_iterations": 500,
                              "monitor_convergence": True,  # print to console
                              }
+# 'method': direct solver 'lu', 'mumps', 'superlu_dist', or PETSc KSP type like 'cg', 'gmres', 'bicgstab', 'minres'
+# 'preconditioner': 'hypre_amg' (BoomerAMG), 'gamg', 'ilu', 'icc', 'jacobi', 'sor', 'asm', 'fieldsplit', 'none' or 'default'
+# 'petsc_options': raw PETSc options without prefix and leading dash, e.g. {'pc_hypre_boomeramg_strong_threshold': 0.5},
+#     value None means a flag option like 'ksp_view'
+default_linear_solver_settings = {'method': 'gmres', 'preconditioner': 'default',
+                                  'relative_tolerance': 1e-8, 'absolute_tolerance': 1e-12, 'maximum_iterations': 1000,
+                                  'monitor_convergence': False, 'nonzero_initial_guess': False,
+                                  'petsc_options': {},
+                                  'prefix': None,  # default to lower case solver class name plus instance number
+                                  }
+# 'method': 'newton' for dolfin NewtonSolver, 'snes' for PETSc SNES, other keys are only used by SNES
+default_nonlinear_solver_settings = {'method': 'newton',
+                                     'line_search': 'bt',  # 'basic' (full Newton step), 'bt' (backtracking), 'cp', 'l2'
+                                     'lag_jacobian': 1,  # rebuild Jacobian every n iterations, -1: only once per solve
+                                     # (mapped to PETSc lag -2 "rebuild at next chance then never", re-armed for each solve)
+                                     'lag_preconditioner': 1,  # rebuild preconditioner (LU factorization) every n iterations
+                                     'eisenstat_walker': False,  # inexact Newton, only for Krylov linear solver
+                                     'relative_tolerance': 1e-9, 'absolute_tolerance': 1e-10, 'maximum_iterations': 50,
+                                     'reporting_residual': True,  # log residual history of each solve
+                                     'petsc_options': {},  # SNES options without prefix, e.g. {'snes_linesearch_damping': 0.8}
+                                     }
+# CG solver with smoothed aggregation AMG and near nullspace, used by `solve_amg()` of elasticity solver
+default_amg_settings = {'nonzero_initial_guess': False,  # warm start from current solution, e.g. previous load step
+                        'reusing_preconditioner': False,  # keep AMG hierarchy even if the operator is changed
+                        'petsc_options': {},  # without prefix, e.g. {'ksp_rtol': 1e-8}
+                        }
+_direct_solver_methods = ('lu', 'mumps', 'superlu_dist', 'umfpack', 'petsc')
+_preconditioner_names = {'hypre_amg': 'hypre', 'petsc_amg': 'gamg', 'amg': 'gamg'}
+
+def update_parameters(prm, values):
+    """ update dolfin Parameters by a nested dict, unknown keys are ignored and returned as a list """
+    ignored = []
+    for key in values:
+        if key not in prm:
+            ignored.append(key)
+        elif isinstance(values[key], dict):
+            ignored += [key + '/' + k for k in update_parameters(prm[key], values[key])]
+        else:
+            prm[key] = values[key]
+    return ignored
+
+def get_mat_solver_option_name():
+    """ PETSc option to select the LU package, `pc_factor_mat_solver_package` is renamed to `_type` in PETSc 3.9 """
+    try:
+        from petsc4py import PETSc
+        if PETSc.Sys.getVersion() < (3, 9, 0):
+            return 'pc_factor_mat_solver_package'
+    except ImportError:  # PETSc shipped with recent dolfin is newer than 3.9
+        pass
+    return 'pc_factor_mat_solver_type'
+
+class SolverNonlinearProblem(NonlinearProblem):
+    """ nonlinear problem for NewtonSolver with a user linear solver,
+    `update_nonlinear_coefficients(x)` of the solver is called before assembly of each Newton iteration
+    """
+    def __init__(self, solver, F, J, bcs):
+        NonlinearProblem.__init__(self)
+        self.solver = solver
+        self.assembler = SystemAssembler(J, F, bcs)
+
+    def form(self, *args):  # (A, b, x) in Fenics 2017, (A, P, b, x) in later version
+        self.solver.update_nonlinear_coefficients(args[-1])
+
+    def F(self, b, x):
+        self.assembler.assemble(b, x)
+
+    def J(self, A, x):
+        self.assembler.assemble(A)
+
+def extrapolation_coefficients(dt, dt1, dt2=None):
+    """ coefficients of previous solutions (t - dt, t - dt - dt1, t - dt - dt1 - dt2) for the linear,
+    or quadratic if dt2 is given, Lagrange polynomial evaluated at time t
+    """
+    if dt2 is None:
+        return (1 + dt/dt1, -dt/dt1)
+    return ((dt + dt1) * (dt + dt1 + dt2) / (dt1 * (dt1 + dt2)),
+            -dt * (dt + dt1 + dt2) / (dt1 * dt2),
+            dt * (dt + dt1) / ((dt1 + dt2) * dt2))
+
+# error is scaled by `absolute_tolerance + tolerance * norm(w_current, 'linf')`
+default_adaptive_settings = {'tolerance': 1e-3, 'absolute_tolerance': 1e-6,
+                             'min_time_step': 1e-6, 'max_time_step': 1e6,
+                             'safety_factor': 0.9, 'min_factor': 0.2, 'max_factor': 5,
+                             'keeping_factor': 1.2,  # dt is not increased by less than this factor, so operator can be reused
+                             'max_rejections': 10,
+                             }
+
 default_case_settings = {'solver_name': None,
                 'case_name': 'test', 'case_folder': "./",  'case_file': None,  # if used by GUI tool, may be removed later
                 'mesh':  None, 'fe_degree': 1, 'fe_family': "CG",
+                'caching_mesh': True, 'mesh_cache_folder': None,  # xml/xdmf mesh is converted into HDF5 on first load
                 'function_space': None, 'periodic_boundary': None, 
                 'boundary_conditions': None, # OrderedDict
                 'body_source': None,  # dict for different subdomains {"sub_name": {'subdomain_id': 1, 'value': 2}}
@@ -83,6 +239,9 @@ default_case_settings = {'solver_name': None,
                     'transient_settings': {'transient': False, 'starting_time': 0, 'time_step': 0.01, 'ending_time': 0.03},
                     'reference_values': {},
                     'solver_parameters': default_solver_parameters,
+                    'reusing_operator': False,  # reuse assembled and factorized matrix if bilinear form does not change
+                    'reusing_form': False,  # build form only once, update time-varying coefficients in place
+                    'checkpoint_settings': {'checkpoint_freq': 0, 'checkpoint_filename': 'checkpoint.h5', 'restart_filename': None},
                     },
                 "report_settings": default_report_settings
                 }
@@ -92,6 +251,11 @@ class SolverBase():
     solve(), plot(), get_variables(), 
     generate_form() and update_boundary_conditions() must be implemented by derived class
     """
+    # mesh file already read by this process is reused if set as a dict, e.g. by ParameterSweep worker,
+    # {(abspath, mtime): (mesh, subdomains, boundary_facets)}, the cached mesh must not be moved
+    mesh_cache = None
+    _instance_count = 0  # used to generate unique PETSc option prefix
+    _logger_count = 0  # used to generate unique logger name
     def __init__(self, case_input):
         if isinstance(case_input, (dict)):
             self.settings = case_input
@@ -123,13 +287,21 @@ class SolverBase():
         pp.pprint(self.settings)
 
     def load_settings(self, s):
+        self.profiler = Profiler()
+        # logger is needed by reading mesh
+        if 'report_settings' not in self.settings:
+            self.settings['report_settings'] = default_report_settings
+        self.report_settings = self.settings['report_settings'] 
+        self.set_logger(self.settings['report_settings'])
+
         if 'periodic_boundary' not in s:  # check: settings file can not store None element?
             s['periodic_boundary'] = None
         ## mesh and boundary
         self.boundary_conditions = s['boundary_conditions']  # used by generate_boundary_facets()
         if ('mesh' in s) and s['mesh']:
             if isinstance(s['mesh'], (str, unicode)):
-                self.read_mesh(s['mesh'])  # it also read boundary
+                with self.profiler.phase('mesh_reading'):
+                    self.read_mesh(s['mesh'])  # it also read boundary
             elif isinstance(s['mesh'], (Mesh,)):
                 self.mesh = s['mesh']
                 self.generate_boundary_facets()
@@ -139,7 +311,8 @@ class SolverBase():
                 s['fe_family'] = 'CG'
             if  not 'fe_degree' in s:
                 s['fe_degree'] = 1
-            self.generate_function_space(s['periodic_boundary'])
+            with self.profiler.phase('function_space'):
+                self.generate_function_space(s['periodic_boundary'])
         elif ('mesh' not in s or s['mesh']==None) and ('function_space' in s and s['function_space']):
             self.function_space = s['function_space']
             s['fe_degree']  = self.function_space._ufl_element.degree()
@@ -175,30 +348,106 @@ class SolverBase():
         self.solver_settings = s['solver_settings']
         self.transient_settings = s['solver_settings']['transient_settings']
         self.transient = self.transient_settings['transient']
-
-        if 'report_settings' not in self.settings:
-            self.settings['report_settings'] = default_report_settings
-        self.report_settings = self.settings['report_settings'] 
-        self.set_logger(self.settings['report_settings'])
+        if self.transient and 'adaptive_settings' in self.transient_settings and self.transient_settings['adaptive_settings']:
+            self.adaptive_settings = copy.copy(default_adaptive_settings)
+            self.adaptive_settings.update(self.transient_settings['adaptive_settings'])
+        else:
+            self.adaptive_settings = None
+        if 'reusing_operator' in self.solver_settings:
+            self.reusing_operator = self.solver_settings['reusing_operator']
+        else:
+            self.reusing_operator = False
+        self._operator_cache = {}
+        self._region_functions = []  # (dict value, DG0 Function), translated only once
+        if 'reusing_form' in self.solver_settings:
+            self.reusing_form = self.solver_settings['reusing_form']
+        else:
+            self.reusing_form = False
+        self._time_dependent_values = []  # tuple of (setting value, coefficient, evaluating function)
+        self._form_reusable = True
+        self._reused_form = None
+        self._solver_cache = {}
+        # copied, so derived solver can add default parameters without modifying the case settings
+        if 'solver_parameters' in self.solver_settings and self.solver_settings['solver_parameters']:
+            self.solver_parameters = copy.deepcopy(self.solver_settings['solver_parameters'])
+        else:
+            self.solver_parameters = {}
+        if 'linear_solver_settings' in self.solver_settings and self.solver_settings['linear_solver_settings']:
+            self.linear_solver_settings = copy.copy(default_linear_solver_settings)
+            self.linear_solver_settings.update(self.solver_settings['linear_solver_settings'])
+        else:
+            self.linear_solver_settings = None  # Fenics default solver, configured by `solver_parameters`
+        if 'nonlinear_solver_settings' in self.solver_settings and self.solver_settings['nonlinear_solver_settings']:
+            self.nonlinear_solver_settings = copy.copy(default_nonlinear_solver_settings)
+            self.nonlinear_solver_settings.update(self.solver_settings['nonlinear_solver_settings'])
+        else:
+            self.nonlinear_solver_settings = None
+        SolverBase._instance_count += 1
+        if self.linear_solver_settings and self.linear_solver_settings['prefix']:
+            self.linear_solver_prefix = self.linear_solver_settings['prefix']
+        else:
+            self.linear_solver_prefix = '{}{}_'.format(self.__class__.__name__.lower(), SolverBase._instance_count)
+        self._linear_solver = None
+        self.amg_settings = copy.copy(default_amg_settings)
+        if 'amg_settings' in self.solver_settings and self.solver_settings['amg_settings']:
+            self.amg_settings.update(self.solver_settings['amg_settings'])
+        self._amg_solver = None
+        self._amg_cache = {}
+        self._near_nullspace = None  # (function_space, basis)
+        if 'predictor' in self.solver_settings and self.solver_settings['predictor']:
+            self.predictor = self.solver_settings['predictor']
+            if self.predictor not in ('constant', 'linear', 'quadratic'):
+                raise SolverError('predictor must be one of constant, linear and quadratic, but got {}'.format(self.predictor))
+        else:
+            self.predictor = 'constant'
+        if 'checkpoint_settings' in self.solver_settings and self.solver_settings['checkpoint_settings']:
+            self.checkpoint_settings = self.solver_settings['checkpoint_settings']
+        else:
+            self.checkpoint_settings = {'checkpoint_freq': 0}
 
     def set_logger(self, s):
-        logger = logging.getLogger(self.__class__.__name__)
-        # create console handler and set level to debug
-        if ('logging_file' not in s) or (s['logging_file'] == None):
-            fh = logging.StreamHandler()
+        # handler is added only once for the same target to the logger shared by all instances of the same solver class,
+        # each instance logs into a child logger with its own level, named by case name and instance number
+        class_logger = logging.getLogger('FenicsSolver.' + self.__class__.__name__)
+        class_logger.propagate = False  # root logger may also have a handler
+        SolverBase._logger_count += 1
+        case_name = self.settings['case_name'] if 'case_name' in self.settings else 'case'
+        logger = logging.getLogger('{}.{}{}'.format(class_logger.name, case_name, SolverBase._logger_count))
+        self.quiet = 'logging_profile' in s and s['logging_profile'] == 'quiet'
+        if self.quiet:
+            level = logging.WARNING
+        elif 'logging_level' in s:
+            level = s['logging_level']
         else:
-            fh = logging.FileHandler(s['logging_file'])
-        if 'logging_level' in s:
-            fh.setLevel(s['logging_level'])
-        else:
-            fh.setLevel(logging.DEBUG)
-        # create formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        fh.setFormatter(formatter)
+            level = logging.DEBUG
+        logger.setLevel(level)  # message below the level is discarded before formatting
 
-        # add console stdout or log file to logger
-        logger.addHandler(fh)
-        self.logger = logger  # usage: self.logger.debug(msg)
+        if ('logging_file' not in s) or (s['logging_file'] == None):
+            target = None
+        else:
+            target = os.path.abspath(s['logging_file'])
+        handlers = [h for h in class_logger.handlers if hasattr(h, 'logging_target')]
+        if not any(h.logging_target == target for h in handlers):
+            for h in handlers:
+                class_logger.removeHandler(h)
+                h.close()
+            if target:
+                fh = logging.FileHandler(target)
+            else:
+                fh = logging.StreamHandler()
+            fh.logging_target = target
+            # create formatter
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            fh.setFormatter(formatter)
+            fh.addFilter(MPIRankFilter(get_world_rank()))
+            # add console stdout or log file to logger
+            class_logger.addHandler(fh)
+        if self.quiet:  # dolfin C++ log
+            try:
+                set_log_level(LogLevel.WARNING)
+            except NameError:  # Fenics 2017
+                set_log_level(WARNING)
+        self.logger = logger  # usage: self.logger.debug('value = %s', value), formatted only if emitted
 
     def _read_hdf5_mesh(self, filename):
         # path is identical to FenicsSolver.utility 
@@ -211,47 +460,134 @@ class SolverBase():
         if (hdf.has_dataset("/subdomains")):
             hdf.read(self.subdomains, "/subdomains")
         else:
-            print('Subdomain file is not provided')
+            self.logger.info('Subdomain file is not provided')
 
         if (hdf.has_dataset("/boundaries")):
             self.boundary_facets = MeshFunction("size_t", mesh, mesh.topology().dim()-1)
             hdf.read(self.boundary_facets, "/boundaries")
         else:
-            print('Boundary facets file is not provided, marked from boundary settings')
+            self.logger.info('Boundary facets file is not provided, marked from boundary settings')
             self.generate_boundary_facets()  # boundary marking from subdomain instance
 
+    def _write_hdf5_mesh(self, filename, has_subdomains, has_boundaries):
+        # markers generated from boundary settings are not written, they depend on case settings
+        comm = self.mesh.mpi_comm()
+        tmp_filename = filename + '.tmp'
+        hdf = HDF5File(comm, tmp_filename, "w")
+        hdf.write(self.mesh, "/mesh")
+        if has_subdomains:
+            hdf.write(self.subdomains, "/subdomains")
+        if has_boundaries:
+            hdf.write(self.boundary_facets, "/boundaries")
+        hdf.close()
+        MPI.barrier(comm)
+        if MPI.rank(comm) == 0:  # other process may read an incomplete file
+            os.rename(tmp_filename, filename)
+        MPI.barrier(comm)
+        self.logger.info('mesh is cached into HDF5 file: %s', filename)
+
+    def _get_marker_filenames(self, filename):
+        root, ext = os.path.splitext(filename)
+        return root + "_physical_region" + ext, root + "_facet_region" + ext
+
+    def get_mesh_cache_filename(self, filename):
+        """ HDF5 file name from the sha1 hash of path, size and modification time of the mesh file and existing marker files,
+        file content is not read, so it is cheap on every process, an edited input gets a new cache file
+        """
+        h = hashlib.sha1()
+        for f in (filename, ) + self._get_marker_filenames(filename):
+            if os.path.exists(f):
+                st = os.stat(f)
+                h.update('{}:{}:{!r}'.format(os.path.abspath(f), st.st_size, st.st_mtime).encode('utf-8'))
+        if 'mesh_cache_folder' in self.settings and self.settings['mesh_cache_folder']:
+            folder = self.settings['mesh_cache_folder']
+        else:
+            folder = os.path.dirname(os.path.abspath(filename))
+        root = os.path.splitext(os.path.basename(filename))[0]
+        return os.path.join(folder, root + '_' + h.hexdigest()[:16] + '.h5')
+
+    def _read_xdmf_marker(self, filename, dim):
+        mf = MeshFunction("size_t", self.mesh, dim)
+        f = XDMFFile(self.mesh.mpi_comm(), filename)
+        try:  # written by meshio
+            mvc = MeshValueCollection("size_t", self.mesh, dim)
+            f.read(mvc, "name_to_read")
+            mf = MeshFunction("size_t", self.mesh, mvc)
+        except RuntimeError:  # written by dolfin
+            f.read(mf)
+        f.close()
+        return mf
+
+    def _read_xdmf_mesh(self, filename):
+        mesh = Mesh()
+        f = XDMFFile(mesh.mpi_comm(), filename)
+        try:
+            f.read(mesh)
+        except TypeError:  # Fenics 2017.2
+            f.read(mesh, True)
+        f.close()
+        self.mesh = mesh
+
+        subdomain_meshfile, bmeshfile = self._get_marker_filenames(filename)
+        if os.path.exists(bmeshfile):
+            self.boundary_facets = self._read_xdmf_marker(bmeshfile, mesh.topology().dim()-1)
+        else:
+            self.logger.info('Boundary facets are not provided by xdmf input file, boundary will be marked from subdomain instance')
+            self.generate_boundary_facets()  # boundary marking from subdomain instance
+        if os.path.exists(subdomain_meshfile):
+            self.subdomains = self._read_xdmf_marker(subdomain_meshfile, mesh.topology().dim())
+        else:
+            self.subdomains = MeshFunction("size_t", mesh, mesh.topology().dim())
+
     def _read_xml_mesh(self, filename):
         mesh = Mesh(filename)
-        bmeshfile = filename[:-4] + "_facet_region.xml"
+        subdomain_meshfile, bmeshfile = self._get_marker_filenames(filename)
         self.mesh = mesh
 
         if os.path.exists(bmeshfile):
             self.boundary_facets = MeshFunction("size_t", mesh, bmeshfile)
         else:
-            print('Boundary facets are not provided by xml input file, boundary will be marked from subdomain instance')
+            self.logger.info('Boundary facets are not provided by xml input file, boundary will be marked from subdomain instance')
             self.generate_boundary_facets()  # boundary marking from subdomain instance
 
-        subdomain_meshfile = filename[:-4] + "_physical_region.xml"
         if os.path.exists(subdomain_meshfile):
             self.subdomains = MeshFunction("size_t", mesh, subdomain_meshfile)
         else:
             self.subdomains = MeshFunction("size_t", mesh, mesh.topology().dim())
 
     def read_mesh(self, filename):
-        print(filename, type(filename))
+        self.logger.debug('read mesh file: %s', filename)
         if sys.version_info[0]<3 and isinstance(filename, (unicode,)):
             filename = filename.encode('utf-8')
         if not os.path.exists(filename):
             raise SolverError('mesh file: {} , does not exist'. format(filename))
-        if filename[-5:] == ".xdmf":  # there are some new feature in 2017.2
-            mesh = Mesh()
-            f = XDMFFile(mpi_comm_world(), filename)
-            f.read(mesh, True)
-            self.generate_boundary_facets()
-            self.subdomains = MeshFunction("size_t", mesh, mesh.topology().dim())
-            self.mesh = mesh
-        elif filename[-4:] == ".xml":
-            self._read_xml_mesh(filename)
+        key = (os.path.abspath(filename), os.path.getmtime(filename))
+        if SolverBase.mesh_cache is not None and key in SolverBase.mesh_cache:
+            self.mesh, self.subdomains, self.boundary_facets = SolverBase.mesh_cache[key]
+            return
+        self._read_mesh_file(filename)
+        if SolverBase.mesh_cache is not None:
+            SolverBase.mesh_cache[key] = (self.mesh, self.subdomains, self.boundary_facets)
+
+    def _read_mesh_file(self, filename):
+        if filename[-5:] == ".xdmf" or filename[-4:] == ".xml":
+            caching = 'caching_mesh' not in self.settings or self.settings['caching_mesh']
+            if caching:
+                cache_filename = self.get_mesh_cache_filename(filename)
+                if os.path.exists(cache_filename):
+                    self.logger.info('read cached mesh file: %s', cache_filename)
+                    self._read_hdf5_mesh(cache_filename)
+                    return
+            if filename[-5:] == ".xdmf":  # there are some new feature in 2017.2
+                self._read_xdmf_mesh(filename)
+            else:
+                self._read_xml_mesh(filename)
+            if caching:
+                subdomain_meshfile, bmeshfile = self._get_marker_filenames(filename)
+                try:
+                    self._write_hdf5_mesh(cache_filename, os.path.exists(subdomain_meshfile), os.path.exists(bmeshfile))
+                except (IOError, OSError, RuntimeError) as e:  # e.g. read-only folder
+                    self.logger.warning('mesh can not be cached into %s: %s', cache_filename, e)
         elif filename[-3:] == ".h5" or filename[-5:] == ".hdf5":
             self._read_hdf5_mesh(filename)
         else:
@@ -317,8 +653,13 @@ class SolverBase():
                 u0 = Function(v0)  # same mesh and function space
             except:
                 u0 = project(v0, self.function_space)
-        elif os.path.exists(v0):  # a filename containg a GenericVector
-            Function(self.function_space, v0)
+        elif isinstance(v0, basestring) and os.path.exists(v0) and v0[-3:] == ".h5":  # checkpoint file
+            u0 = Function(self.function_space)
+            hdf = HDF5File(self.mesh.mpi_comm(), v0, "r")
+            hdf.read(u0, "/w_current")
+            hdf.close()
+        elif isinstance(v0, basestring) and os.path.exists(v0):  # a filename containg a GenericVector
+            u0 = Function(self.function_space, v0)
         else:
             raise SolverError('only number, file, another function, str expr are supported as initial values')
         return u0
@@ -329,22 +670,72 @@ class SolverBase():
                 if isinstance(value[0][0], (numbers.Number,)):
                     return as_matrix(value)
         elif isinstance(value, dict):  # inhomogeneous, multi-region values
-            return self._translate_dict_value(value)
+            return self._translate_dict_value_to_function(value)
         elif isinstance(value, (numbers.Number,)):
             return value
         # TODO: nonlinear, function/expression of temperature, or any variable
         else:  # linear homogenous material, str, Expression, numbers.Number, Constant, Callable
             return value # self.translate_value(value)
 
-    def _translate_dict_value_to_function(self, value):
-        """ body source, initial value or material for multiple subdomains 
-        dict input format: {'region1': {'subdomain_id': 1, 'material': metal_material}, ...}
-        for performance reason, numpy array is operated directly, or cpp expression
+    def _is_region_dict(self, value):
+        # multi-region dict of constant values, which can be translated into DG0 Function
+        if not isinstance(value, dict) or not value:
+            return False
+        for v in value.values():
+            if not isinstance(v, dict) or 'subdomain_id' not in v or 'value' not in v:
+                return False
+            try:
+                np.asarray(v['value'], dtype=float)
+            except (TypeError, ValueError):
+                return False
+        return True
+
+    def _translate_dict_value_to_function(self, value, filling_zero=False):
+        """ body source or material for multiple subdomains, as piecewise constant (DG0) Function
+        dict input format: {'region1': {'subdomain_id': 1, 'value': 0.6}, ...}, value is number, vector or tensor (matrix).
+        for performance reason, a region->value table is indexed by the cell markers of `subdomains` in numpy,
+        every subdomain must have a value for material, cells of subdomains not in the dict are set to zero
+        only if `filling_zero`, e.g. body source
         """
-        v0 = Function(self.function_space)
-        for k, v in value.item():
-            raise NotImplementedError('not yet implemented')
-        return v0
+        for source, f in self._region_functions:
+            if source is value:
+                return f
+        if not self._is_region_dict(value):
+            raise SolverError('multi-region value must be a dict of {"subdomain_id": int, "value": constant}')
+        ids = np.array([v['subdomain_id'] for v in value.values()], dtype=np.intp)
+        values = np.array([np.asarray(v['value'], dtype=float) for v in value.values()])
+        shape = values.shape[1:]
+        if len(shape) == 0:
+            V = FunctionSpace(self.mesh, 'DG', 0)
+        elif len(shape) == 1:
+            V = VectorFunctionSpace(self.mesh, 'DG', 0, dim=shape[0])
+        elif len(shape) == 2:
+            V = TensorFunctionSpace(self.mesh, 'DG', 0, shape=shape)
+        else:
+            raise SolverError('multi-region value of shape {} is not supported'.format(shape))
+
+        markers = self.subdomains.array().astype(np.intp)
+        table = np.zeros((max(markers.max(), ids.max()) + 1,) + shape)
+        table[ids] = values
+        missing = np.setdiff1d(np.unique(markers), ids)
+        if len(missing):
+            if not filling_zero:  # zero material property gives singular or wrong system
+                raise SolverError('subdomains {} have no value in multi-region dict'.format(missing))
+            self.logger.warning('subdomains %s have no value in multi-region dict, zero is used', missing)
+        cell_values = table[markers].reshape(len(markers), -1)  # (cells, components)
+
+        f = Function(V)
+        tdim = self.mesh.topology().dim()
+        local_values = f.vector().get_local()
+        for i in range(cell_values.shape[1]):
+            dofmap = V.dofmap() if len(shape) == 0 else V.sub(i).dofmap()
+            dofs = np.asarray(dofmap.entity_dofs(self.mesh, tdim), dtype=np.intp)  # dof of each cell
+            owned = dofs < len(local_values)
+            local_values[dofs[owned]] = cell_values[owned, i]
+        f.vector().set_local(local_values)
+        f.vector().apply('insert')
+        self._region_functions.append((value, f))
+        return f
 
     def translate_value(self, value, function_space = None):
         # for both internal and boundary values
@@ -363,9 +754,9 @@ class SolverBase():
                     value = Constant(tuple(value))
                 values_0 = interpolate(Expression(value, degree = _degree), W)
             elif self.transient_settings['transient'] and len(value) > self.dimension:
-                values_0 = value[self.current_step]
+                values_0 = self._translate_time_dependent_value(value, lambda: value[self.current_step])
             else:
-                print(' {} is supplied, but only tuple of number and string expr of dim = len(v) are supported'.format(type(value)))
+                self.logger.warning('%s is supplied, but only tuple of number and string expr of dim = len(v) are supported', type(value))
         elif isinstance(value, (numbers.Number)):
             values_0 = Constant(value)
         elif isinstance(value, (Constant, Function)):
@@ -374,7 +765,7 @@ class SolverBase():
             # FIXME can not interpolate an expression, not necessary?
             values_0 = value  # interpolate(value, W)
         elif callable(value) and self.transient_settings['transient']:  # Function is also callable
-            values_0 = value(self.get_current_time())
+            values_0 = self._translate_time_dependent_value(value, lambda: value(self.get_current_time()))
         elif isinstance(value, (str, )):  # file or string expression
             if os.path.exists(value):
                 # also possible continue from existent solution, or interpolate from diff mesh density
@@ -388,10 +779,51 @@ class SolverBase():
         elif value == None:
             raise TypeError('None type is supplied as value to be translated')
         else:
-            print('Warning: {} is supplied, not tuple, number, Constant,file name, Expression'.format(type(value)))
+            self.logger.warning('%s is supplied, not tuple, number, Constant,file name, Expression', type(value))
             values_0 = value
         return values_0
 
+    def _translate_time_dependent_value(self, value, evaluate):
+        """ wrap the time-varying setting value into a persistent Constant or Function if `reusing_form`,
+        it is updated in place by update_time_dependent_values(). Other types like Expression can not be updated,
+        then form will be regenerated for each time step
+        """
+        v = evaluate()
+        if not self.reusing_form:
+            return v
+        for source, coeff, _ in self._time_dependent_values:
+            if source is value:
+                return coeff
+        if isinstance(v, (numbers.Number, Constant)):
+            coeff = Constant(self._constant_values(v))
+        elif isinstance(v, Function):
+            coeff = Function(v.function_space())
+            coeff.assign(v)
+        else:
+            self.logger.warning('time-varying value of type %s can not be updated in place, form is rebuilt for each step', type(v))
+            self._form_reusable = False
+            return v
+        self._time_dependent_values.append((value, coeff, evaluate))
+        return coeff
+
+    def _constant_values(self, v):
+        if isinstance(v, Constant):
+            return v.values().reshape(v.ufl_shape)
+        return float(v)
+
+    def update_time_dependent_values(self):
+        # assign new values for the current time step to all coefficients of the reused form
+        if hasattr(self, '_time_step_constant'):
+            self._time_step_constant.assign(Constant(self.get_time_step(self.current_step)))
+        for source, coeff, evaluate in self._time_dependent_values:
+            v = evaluate()
+            if isinstance(coeff, Constant):
+                if not isinstance(v, (numbers.Number, Constant)):
+                    raise SolverError('time-varying value must keep the type Constant or number, but got {}'.format(type(v)))
+                coeff.assign(Constant(self._constant_values(v)))
+            else:
+                coeff.assign(v)
+
     def get_variable_name(self):
         if 'scalar_name' in self.settings:
             return self.settings['scalar_name']
@@ -426,42 +858,64 @@ class SolverBase():
         return translate_value(bvalue)
 
     def get_body_source(self):
+        if self._is_region_dict(self.body_source):  # constant value for each subdomain, a single DG0 coefficient
+            return self._translate_dict_value_to_function(self.body_source, filling_zero=True)
         if isinstance(self.body_source, (dict)):  # a dict of subdomain, perhaps easier by giving an Expression
             vdict = copy.copy(self.body_source)
             for k in vdict:
                 vdict[k]['value'] = self.translate_value(self.body_source[k]['value'])
             return vdict
         else:
-            if self.body_source:
+            if self.body_source is not None:  # truth value of a scalar Constant is not defined
                 return self.translate_value(self.body_source)
             else:
                 return None
 
     def get_time_step(self, time_iter_):
-        ## fixed step, but could be supplied with an np.array/list
+        ## fixed step, but could be supplied with an np.array/list, or adapted by error estimation
+        if self.adaptive_settings:
+            if time_iter_ in self.time_step_history:
+                return self.time_step_history[time_iter_]
+            return self.current_time_step
         try:
             dt = float(self.transient_settings['time_step'])
         except:
             ts = self.transient_settings['time_series']
-            if len(ts) >= time_iter_:
-                dt = ts[time_iter_] - ts[time_iter_]
+            if len(ts) > time_iter_ + 1:
+                dt = ts[time_iter_ + 1] - ts[time_iter_]
             else:
-                print('time step can only be a sequence or scalar')
+                raise SolverError('time_series has no time point after step {}'.format(time_iter_))
         #self.mesh.hmin()  # Compute minimum cell diameter. courant number
         return dt
 
+    def get_time_step_constant(self, time_iter_=None):
+        """ time step as a Constant coefficient, so the form (and the JIT compiled code) does not depend on dt value
+        """
+        if time_iter_ is None:
+            time_iter_ = self.current_step
+        dt = self.get_time_step(time_iter_)
+        if not hasattr(self, '_time_step_constant'):
+            self._time_step_constant = Constant(dt)
+        else:
+            self._time_step_constant.assign(Constant(dt))
+        return self._time_step_constant
+
     def get_current_time(self, time_iter_=None):
-        if not time_iter_:
+        """ time at the end of the step `time_iter_` (default the current step), where the implicit step is solved,
+        time-varying values are evaluated at this time point for fixed, time series and adaptive time step
+        """
+        if time_iter_ is None:
             time_iter_ = self.current_step
-        #self.current_time
+        if self.adaptive_settings:  # time points are not known in advance, only for the current step
+            return self.current_time + self.get_time_step(time_iter_)
         try:
             dt = float(self.transient_settings['time_step'])
-            tp = self.transient_settings['starting_time'] + dt * (time_iter_ - 1)
+            tp = self.transient_settings['starting_time'] + dt * (time_iter_ + 1)
         except:
-            if len(self.transient_settings['time_series']) >= time_iter_:
-                tp = self.transient_settings['time_series'][time_iter_]
+            if len(self.transient_settings['time_series']) > time_iter_ + 1:
+                tp = self.transient_settings['time_series'][time_iter_ + 1]
             else:
-                print('time point can only be a sequence of time series or derived from constant time step')
+                raise SolverError('time point can only be a sequence of time series or derived from constant time step')
         return tp
 
     def init_solver(self):
@@ -473,6 +927,15 @@ class SolverBase():
         self.w_prev.assign(self.w_current)
         self.w_pp = Function(self.function_space)  # previous previous value, for dynamic and high order temporal scheme
         self.w_pp.assign(self.w_current)
+        self._reused_form = None  # form will be generated in the first call of solve_current_step()
+        if self.predictor == 'quadratic' or (self.adaptive_settings and self.get_time_scheme_order() >= 2):
+            # the third previous value, only as vector
+            self._w_ppp = self.w_current.vector().copy()
+        else:
+            self._w_ppp = None
+        if self.adaptive_settings:
+            self.current_time_step = float(self.transient_settings['time_step'])  # initial time step
+            self.time_step_history = {}  # accepted time step of each step
 
     def get_acceleration(self, time_iter_):
         # FIXME:  it does not works for non-uniform time step
@@ -483,14 +946,197 @@ class SolverBase():
 
     def solve_current_step(self):
         # only NS equation needs current value to build form
-        F, Dirichlet_bcs_up = self.generate_form(self.current_step, self.trial_function, self.test_function, self.w_current, self.w_prev)
+        if self._reused_form:
+            self.update_time_dependent_values()
+            F, Dirichlet_bcs_up = self._reused_form
+        else:
+            with self.profiler.phase('form_generation'):
+                F, Dirichlet_bcs_up = self.generate_form(self.current_step, self.trial_function, self.test_function, self.w_current, self.w_prev)
+            if self.reusing_form and self._form_reusable:
+                self._reused_form = (F, Dirichlet_bcs_up)
+        if self._w_ppp is not None:
+            self._w_ppp.zero()
+            self._w_ppp.axpy(1.0, self.w_pp.vector())
         self.w_pp.assign(self.w_prev)
         self.w_prev.assign(self.w_current)
+        predicted = self.predict_current_step()
         self.w_current = self.solve_form(F, self.w_current, Dirichlet_bcs_up)  # solve for each time step, up_prev tis not needed
         self.result = self.w_current
+        if predicted is not None:
+            self.report_predictor(predicted)
+
+    def predict_current_step(self):
+        """ extrapolate w_current from previous time levels as the initial guess for nonlinear solver,
+        Lagrange polynomial through the previous solutions at non-uniform time points is evaluated at current time,
+        return a copy of predicted vector, or None if the previous solution is used
+        """
+        # time levels are shifted, w_prev is the solution of the previous step, step 0 starts from the initial value
+        order = {'constant': 0, 'linear': 1, 'quadratic': 2}[self.predictor]
+        order = min(order, self.current_step)
+        if not self.transient_settings['transient'] or order == 0:
+            return None
+        dt = self.get_time_step(self.current_step)
+        dt1 = self.get_time_step(self.current_step - 1)
+        if order == 1:
+            coeffs = extrapolation_coefficients(dt, dt1)
+            levels = (self.w_prev.vector(), self.w_pp.vector())
+        else:
+            coeffs = extrapolation_coefficients(dt, dt1, self.get_time_step(self.current_step - 2))
+            levels = (self.w_prev.vector(), self.w_pp.vector(), self._w_ppp)
+        x = self.w_current.vector()
+        x.zero()
+        for c, v in zip(coeffs, levels):
+            x.axpy(c, v)
+        return x.copy()
+
+    def report_predictor(self, predicted):
+        # error of the predicted value relative to error of the previous solution as the guess, less than 1 is better
+        change = self.w_current.vector() - self.w_prev.vector()
+        error = self.w_current.vector() - predicted
+        change_norm = change.norm('l2')
+        ratio = error.norm('l2') / change_norm if change_norm > 0 else 0.0
+        self.profiler.set_step_value('predictor_error_ratio', ratio)
+        self.logger.debug('error ratio of %s predictor to constant predictor: %g', self.predictor, ratio)
+
+    def monitor_current_step(self):
+        # called once the current step is accepted, derived class can evaluate functionals like boundary force
+        pass
+
+    def get_time_scheme_order(self):
+        # order of accuracy of the time scheme in the form, backward Euler by default, used by adaptive time step
+        return 1
+
+    def estimate_local_error(self, dt, dt_prev, dt_prev2=None):
+        """ local error of the step, estimated by the difference between the solution and the extrapolation
+        of previous solutions (non-uniform step), linear for first order and quadratic for second order scheme.
+        The difference is scaled to the local error: backward Euler dt^2/2 * u'', Crank-Nicolson dt^3/12 * u'''.
+        Then it is scaled by tolerance, so the step is acceptable if the returned value is not bigger than 1.0
+        """
+        ads = self.adaptive_settings
+        e = self.w_current.vector().copy()
+        if self.get_time_scheme_order() == 1:
+            levels = (self.w_prev.vector(), self.w_pp.vector())
+            coeffs = extrapolation_coefficients(dt, dt_prev)
+            ratio = dt / (dt + dt_prev)
+        else:
+            levels = (self.w_prev.vector(), self.w_pp.vector(), self._w_ppp)
+            coeffs = extrapolation_coefficients(dt, dt_prev, dt_prev2)
+            ratio = dt**2 / (2 * (dt + dt_prev) * (dt + dt_prev + dt_prev2))
+        for c, v in zip(coeffs, levels):
+            e.axpy(-c, v)
+        e_norm = ratio * e.norm('linf')
+        scale = ads['absolute_tolerance'] + ads['tolerance'] * self.w_current.vector().norm('linf')
+        return e_norm / scale
+
+    def solve_adaptive_step(self, t_end):
+        """ solve current step and estimate the error, the step is repeated with smaller step if rejected,
+        then time step of the next step is predicted from the error, return the accepted time step
+        """
+        ads = self.adaptive_settings
+        w_pp_backup = self.w_pp.copy(deepcopy=True)  # solve_current_step() shifts time levels
+        w_ppp_backup = self._w_ppp.copy() if self._w_ppp is not None else None
+        rejections = 0
+        while True:
+            self.current_time_step = min(self.current_time_step, t_end - self.current_time)
+            dt = self.current_time_step
+            self.solve_current_step()
+            order = self.get_time_scheme_order()
+            previous_steps = [self.current_step - i for i in range(1, order + 1)]
+            if self.current_step < order + 1 or any(s not in self.time_step_history for s in previous_steps):
+                # no error estimation without enough previous solutions in this run, initial step is kept
+                self.time_step_history[self.current_step] = dt
+                return dt
+            err = self.estimate_local_error(dt, *[self.time_step_history[s] for s in previous_steps])
+            # local error is proportional to dt**(order + 1)
+            factor = ads['safety_factor'] * (1.0 / max(err, 1e-10)) ** (1.0 / (order + 1))
+            factor = min(max(factor, ads['min_factor']), ads['max_factor'])
+            if err <= 1.0 or dt <= ads['min_time_step'] or rejections >= ads['max_rejections']:
+                if err > 1.0:
+                    self.logger.warning('step %d is accepted with scaled error %g > 1, time step = %g', self.current_step, err, dt)
+                self.time_step_history[self.current_step] = dt
+                if factor < 1.0 or factor >= ads['keeping_factor']:
+                    self.current_time_step = min(max(dt * factor, ads['min_time_step']), ads['max_time_step'])
+                return dt
+            rejections += 1
+            self.logger.info('step %d is rejected with scaled error %g, time step is reduced from %g to %g',
+                                self.current_step, err, dt, max(dt * factor, ads['min_time_step']))
+            self.w_current.assign(self.w_prev)
+            self.w_prev.assign(self.w_pp)
+            self.w_pp.assign(w_pp_backup)
+            if w_ppp_backup is not None:
+                self._w_ppp.zero()
+                self._w_ppp.axpy(1.0, w_ppp_backup)
+            self.current_time_step = max(dt * factor, ads['min_time_step'])
+
+    def write_checkpoint(self, filename):
+        """ write all time levels, current step and time into HDF5 file, in parallel
+        data is written into a temporary file then renamed, so the previous checkpoint survives if killed while writing
+        """
+        comm = self.mesh.mpi_comm()
+        tmp_filename = filename + '.tmp'
+        hdf = HDF5File(comm, tmp_filename, "w")
+        hdf.write(self.w_current, "/w_current")
+        hdf.write(self.w_prev, "/w_prev")
+        hdf.write(self.w_pp, "/w_pp")
+        if self._w_ppp is not None:  # only a vector, written as Function so mesh partition can be different
+            w_ppp = Function(self.function_space)
+            w_ppp.vector().axpy(1.0, self._w_ppp)
+            hdf.write(w_ppp, "/w_ppp")
+        attr = hdf.attributes("/w_current")
+        attr['current_step'] = float(self.current_step)
+        attr['current_time'] = float(self.current_time)
+        if self.adaptive_settings:
+            attr['current_time_step'] = float(self.current_time_step)
+            if self.time_step_history:  # accepted time step of each step, needed by error estimation after restart
+                steps = sorted(self.time_step_history)
+                attr['time_step_history_steps'] = np.array(steps, dtype=float)
+                attr['time_step_history_values'] = np.array([self.time_step_history[s] for s in steps], dtype=float)
+        hdf.close()
+        MPI.barrier(comm)
+        if MPI.rank(comm) == 0:
+            os.rename(tmp_filename, filename)
+        MPI.barrier(comm)
+        self.logger.info('write checkpoint file `%s` at step: %d, time: %g', filename, self.current_step, self.current_time)
+
+    def read_checkpoint(self, filename):
+        # function space must be identical with the one writing the checkpoint, mesh partition can be different
+        if not os.path.exists(filename):
+            raise SolverError('checkpoint file: {} , does not exist'.format(filename))
+        hdf = HDF5File(self.mesh.mpi_comm(), filename, "r")
+        hdf.read(self.w_current, "/w_current")
+        hdf.read(self.w_prev, "/w_prev")
+        hdf.read(self.w_pp, "/w_pp")
+        if self._w_ppp is not None and hdf.has_dataset("/w_ppp"):
+            w_ppp = Function(self.function_space)
+            hdf.read(w_ppp, "/w_ppp")
+            self._w_ppp.zero()
+            self._w_ppp.axpy(1.0, w_ppp.vector())
+        attr = hdf.attributes("/w_current")
+        self.current_step = int(round(attr['current_step']))
+        self.current_time = attr['current_time']
+        if self.adaptive_settings:
+            self.current_time_step = attr['current_time_step']
+            if 'time_step_history_steps' in attr.list_attributes():
+                steps = attr['time_step_history_steps']
+                values = attr['time_step_history_values']
+                self.time_step_history = dict((int(round(s)), float(v)) for s, v in zip(steps, values))
+        hdf.close()
+        self.logger.info('restart from checkpoint file `%s` at step: %d, time: %g', filename, self.current_step, self.current_time)
+
+    def _on_termination_signal(self, signum, frame):
+        # checkpoint is written after the current step is completed, then time loop stops
+        self._terminating = True
+
+    def _install_termination_handler(self):
+        self._terminating = False
+        try:
+            return signal.signal(signal.SIGTERM, self._on_termination_signal)
+        except ValueError:  # signal can only be set in the main thread
+            return None
 
     def solve_transient(self):
-        # boundary and source change does not change left hand side (stiffness matrix) which should be reusable
+        # boundary and source change does not change left hand side (stiffness matrix),
+        # it is reused if solver_settings['reusing_operator'] is True, see solve_linear_problem()
         self.init_solver()
 
         ts = self.transient_settings
@@ -502,12 +1148,23 @@ class SolverBase():
         else:
             t_end = self.current_time+ 1
 
+        cs = self.checkpoint_settings
+        checkpointing = ts['transient'] and cs['checkpoint_freq'] and cs['checkpoint_freq'] > 0
+        if checkpointing:
+            checkpoint_filename = cs['checkpoint_filename'] if 'checkpoint_filename' in cs else 'checkpoint.h5'
+            previous_handler = self._install_termination_handler()
+        if 'restart_filename' in cs and cs['restart_filename']:
+            self.read_checkpoint(cs['restart_filename'])
+
         sf = self.report_settings['saving_freq']
         if sf and sf>0:
             if 'result_filename' in self.report_settings and self.report_settings['result_filename']:
                 result_filename = self.report_settings['result_filename']
             else:
-                result_filename = 'result_file.pvd'  # default filename
+                result_filename = 'result_file.xdmf'  # default filename
+            if self.current_step > 0:  # restarted, result file can not be appended
+                root, ext = os.path.splitext(result_filename)
+                result_filename = root + '_from_step{}'.format(self.current_step) + ext
 
         #print(ts, self.current_time, t_end)
         # Transient loop also works for steady, by set `t_end = self.time_step`
@@ -520,31 +1177,70 @@ class SolverBase():
                 dt = 1
 
             ## overloaded by derived classes, maybe move out of temporal loop if boundary does not change form
-            self.solve_current_step()
+            if self.adaptive_settings:
+                dt = self.solve_adaptive_step(t_end)
+            else:
+                self.solve_current_step()
+            self.monitor_current_step()
 
-            print("Current step = ", self.current_step, "time = ", self.current_time, " TimerSolveAll = ", timer_solver_all.elapsed())
+            self.logger.info('Current step = %d, time = %g, time step = %g, TimerSolveAll = %g',
+                             self.current_step, self.current_time, dt, timer_solver_all.elapsed()[0])
             pf = self.report_settings['plotting_freq']
             if pf>0 and self.current_step> 0 and (self.current_step % pf == 0):
-                self.plot()
+                with self.profiler.phase('plotting'):
+                    self.plot()
             # stop for steady case, or update time
 
             if sf and sf>0:
                 if self.current_step > 0 and (self.current_step % sf == 0):
-                    self.save(result_filename)  # 
-                    print("save data to file `{}` at step: {} , at time: {}". format(result_filename, self.current_step , self.current_time))
+                    with self.profiler.phase('io'):
+                        # current_time is not yet advanced, the solution is at the end of the step
+                        self.save(result_filename, self.get_current_time() if ts['transient'] else self.current_time)
+                    self.logger.info('save data to file `%s` at step: %d , at time: %g', result_filename, self.current_step, self.current_time)
+            self.profiler.end_step(self.current_step, self.current_time, time_step = dt)
             if not self.transient_settings['transient']:
                 break
             self.current_step += 1
             self.current_time += dt
+
+            if checkpointing:
+                # all processes must agree on stopping, since writing checkpoint is collective
+                terminating = MPI.max(self.mesh.mpi_comm(), float(self._terminating)) > 0
+                if terminating or (self.current_step % cs['checkpoint_freq'] == 0):
+                    with self.profiler.phase('io'):
+                        self.write_checkpoint(checkpoint_filename)
+                if terminating:
+                    self.logger.warning('time loop is terminated by signal at step %d, restart from `%s`', self.current_step, checkpoint_filename)
+                    break
         ## end of time loop
         timer_solver_all.stop()
+        self.report_predictor_summary()
+        with self.profiler.phase('io'):
+            self.close_result_writer()
+        if checkpointing and previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
 
         return self.w_current
 
+    def report_predictor_summary(self):
+        # compare nonlinear iterations per step with a run of 'constant' predictor to see the saving
+        steps = [s for s in self.profiler.steps if 'predictor_error_ratio' in s]
+        if steps:
+            ratios = [s['predictor_error_ratio'] for s in steps]
+            iterations = [s.get('newton', 0) + s.get('picard', 0) for s in steps]
+            self.logger.info('%s predictor for %d steps: mean error ratio to constant predictor = %g, '
+                             'nonlinear iterations per step = %g', self.predictor, len(steps), np.mean(ratios), np.mean(iterations))
+
     def solve(self):
         self.result = self.solve_transient()
+        self.write_profiling_report()
         return self.result
 
+    def write_profiling_report(self):
+        if 'profiling_file' in self.report_settings and self.report_settings['profiling_file']:
+            self.profiler.write(self.report_settings['profiling_file'], self.mesh.mpi_comm())
+            self.logger.info('write profiling report into file `%s`', self.report_settings['profiling_file'])
+
     def plot(self):
         try:
             ver = dolfin.dolfin_version().split('.')
@@ -567,116 +1263,503 @@ class SolverBase():
             import matplotlib.pyplot as plt
             plt.show()
 
-    def save(self, result_filename):
-        #currently support only pvd, this format support parallel IO
-        #XDMFFile is preferred for parallel IO, checkpoint
-        #how to deal with DG and higher order element? velocity of NS has order 2
+    def get_result_fields(self):
+        # list of (name, Function) to save, sub functions of mixed space are collapsed
         if (not self.is_mixed_function_space):
-            result_stream = File(result_filename)
-            result_stream << (self.w_current, self.current_time)
-        else:
-            # write all var into one pvd is possible as multiblock dataset
-            suffix = '.pvd'
-            assert result_filename[-4:] == '.pvd'
-            result_filename_root = result_filename[:-4]
-            ret = split(self.result)
-            for i, var in enumerate(ret):
-                var_name = self.settings['mixed_variable'][i]
-                # AttributeError: 'ListTensor' object has no attribute 'rename',  for LargeDeformationSolver
-                var.rename(var_name, "label")  # why renaming does not show in vtu file?
-                var_result_filename = result_filename_root + '_' + var_name + suffix
-                result_stream = File(var_result_filename)
-                result_stream << (var, self.current_time)
+            return [(self.get_variable_name(), self.w_current)]
+        else:
+            # ufl split() returns ListTensor which can not be saved, Function.split(True) gives collapsed functions
+            sub_functions = self.w_current.split(True)
+            return [(self.settings['mixed_variable'][i], var) for i, var in enumerate(sub_functions)]
+
+    def save(self, result_filename, t=None):
+        # result file is opened once and kept until the end of solve_transient()
+        # XDMF is preferred for parallel IO, mesh is written only once. pvd is still supported
+        if not hasattr(self, 'result_writer') or self.result_writer.filename != result_filename:
+            self.close_result_writer()
+            self.result_writer = ResultWriter(result_filename, self.mesh)
+        if t is None:
+            t = self.current_time
+        self.result_writer.write(self.get_result_fields(), t)
+
+    def close_result_writer(self):
+        if hasattr(self, 'result_writer'):
+            self.result_writer.close()
+            del self.result_writer
 
     ####################################
+    def get_operator_key(self, a):
+        """ fingerprint of the bilinear form, return None if the operator depends on time level functions
+        form structure and float literal like `1/dt` are included into ufl signature, but values of Constant are not.
+        Expression and Function (other than time level functions) coefficients are assumed to be time-invariant
+        """
+        time_level_functions = [getattr(self, name) for name in ('w_current', 'w_prev', 'w_pp') if hasattr(self, name)]
+        constant_values = []
+        for c in a.coefficients():
+            if any(c is w for w in time_level_functions):
+                return None
+            if isinstance(c, Constant):
+                constant_values.append(tuple(c.values()))
+        return (id(self.function_space), a.signature(), tuple(constant_values))
+
+    def solve_linear_problem_reusing_operator(self, a, L, key, u, Dirichlet_bcs):
+        # Dirichlet boundary dofs are assumed fixed, only boundary values can change between time steps
+        cache = self._operator_cache
+        if cache.get('key') != key:
+            self.logger.info('assemble and factorize the operator, it will be reused until bilinear form changes')
+            with self.profiler.phase('assembly'):
+                A = assemble(a)
+            with self.profiler.phase('bc_application'):
+                for bc in Dirichlet_bcs:
+                    if isinstance(bc, DirichletBC):
+                        bc.apply(A)
+            if self.linear_solver_settings:
+                solver = self.get_linear_solver()
+                solver.set_operator(A)
+            else:
+                solver = LUSolver(A)
+                if 'reuse_factorization' in solver.parameters:  # Fenics 2017, later version reuses factorization by default
+                    solver.parameters['reuse_factorization'] = True
+            cache['key'] = key
+            cache['A'] = A
+            cache['solver'] = solver
+        with self.profiler.phase('assembly'):
+            b = assemble(L)
+        with self.profiler.phase('bc_application'):
+            for bc in Dirichlet_bcs:
+                bc.apply(b)  # apply Dirichlet BC and PointSource
+        with self.profiler.phase('linear_solve'):  # factorization is done in the first solve
+            iterations = cache['solver'].solve(u.vector(), b)
+        if self.linear_solver_settings:
+            self.profiler.add_iterations('krylov', iterations)
+        return u
+
+    def get_system(self, F):
+        # split into bilinear and linear form only once for the same form object
+        if self._operator_cache.get('form') is not F:
+            self._operator_cache['form'] = F
+            self._operator_cache['system'] = system(F)
+        return self._operator_cache['system']
+
     def solve_linear_problem(self, F, u, Dirichlet_bcs):
+        if self.reusing_operator:
+            a, L = self.get_system(F)
+            key = self.get_operator_key(a)
+            if key is not None:
+                return self.solve_linear_problem_reusing_operator(a, L, key, u, Dirichlet_bcs)
         if  'point_source' in self.settings and self.settings['point_source']:
             a_T, L_T = system(F)
-            A_T = assemble(a_T)
-            b_T = assemble(L_T)
+            with self.profiler.phase('assembly'):
+                A_T = assemble(a_T)
+                b_T = assemble(L_T)
             #for bc in bcs: print(type(bc))
-            for bc in Dirichlet_bcs:
-                if isinstance(bc, DirichletBC):
-                    bc.apply(A_T, b_T)  # apply Dirichlet BC and PointSource
-                else:
-                    bc.apply(b_T)  # apply Dirichlet BC and PointSource
-            solver = LinearSolver()  # default LU solver
-            self.set_solver_parameters(solver)
-
-            solver.solve(A_T, u.vector(), b_T)
+            with self.profiler.phase('bc_application'):
+                for bc in Dirichlet_bcs:
+                    if isinstance(bc, DirichletBC):
+                        bc.apply(A_T, b_T)  # apply Dirichlet BC and PointSource
+                    else:
+                        bc.apply(b_T)  # apply Dirichlet BC and PointSource
+            if self.linear_solver_settings:
+                solver = self.get_linear_solver()
+            else:
+                solver = LinearSolver()  # default LU solver
+                self.set_solver_parameters(solver)
+
+            with self.profiler.phase('linear_solve'):
+                iterations = solver.solve(A_T, u.vector(), b_T)
+            if self.linear_solver_settings:
+                self.profiler.add_iterations('krylov', iterations)
+        elif self.linear_solver_settings:
+            a, L = self.get_system(F)
+            with self.profiler.phase('assembly'):  # BC are applied symmetrically during assembly
+                A, b = assemble_system(a, L, Dirichlet_bcs)
+            solver = self.get_linear_solver()
+            solver.set_operator(A)
+            with self.profiler.phase('linear_solve'):
+                iterations = solver.solve(u.vector(), b)
+            self.profiler.add_iterations('krylov', iterations)
         else:
-            problem = LinearVariationalProblem(lhs(F), rhs(F), u, Dirichlet_bcs)
-            solver = LinearVariationalSolver(problem)
-            self.set_solver_parameters(solver)
-
-            solver.solve()
+            solver = self._get_cached_solver('linear', F, u, Dirichlet_bcs)
+            if not solver:
+                with self.profiler.phase('form_compilation'):  # JIT is done (or loaded from cache) by the problem
+                    problem = LinearVariationalProblem(lhs(F), rhs(F), u, Dirichlet_bcs)
+                solver = LinearVariationalSolver(problem)
+                self.set_solver_parameters(solver)
+                self._set_cached_solver('linear', F, u, Dirichlet_bcs, solver)
+
+            with self.profiler.phase('linear_solve'):  # assembly and BC application are included
+                solver.solve()
         return u
 
-    def solve_nonlinear_problem(self, F, u_current, Dirichlet_bcs, J):
-        problem = NonlinearVariationalProblem(F, u_current, Dirichlet_bcs, J)
-        solver = NonlinearVariationalSolver(problem)
-
-        #TODO: set nonlinear solver parameters from settings dict, same option as linear solver?
-        #[print(p) for p in solver.parameters['newton_solver']]
-        # see all default parameters: <https://github.com/FEniCS/dolfin/blob/master/dolfin/nls/NewtonSolver.cpp>
-
-        self.set_solver_parameters(solver)
+    def solve_load_cases(self, load_cases):
+        """ solve a steady linear problem for a list of load cases, each is a dict to update settings:
+        {'boundary_conditions': {name: boundary settings}, 'body_source': value}, boundaries not given keep the settings.
+        Dirichlet boundaries must be on the same dofs and the bilinear form (including Constant coefficients like HTC)
+        must be the same for all cases, only the values can change, then the operator is assembled and factorized only once.
+        SolverError is raised if a case does not share the operator of the first case.
+        Return a list of solution Functions, the right hand side vectors are kept in `self.load_case_rhs`
+        """
+        if self.transient_settings['transient'] or (hasattr(self, 'nonlinear') and self.nonlinear):
+            raise SolverError('load cases are only supported for steady linear problem')
+        if not hasattr(self, 'trial_function'):
+            self.init_solver()
+        boundary_conditions, body_source = self.boundary_conditions, self.body_source
+        A = None
+        self.load_case_rhs = []
+        try:
+            for i, case in enumerate(load_cases):
+                self.boundary_conditions = copy.copy(boundary_conditions)
+                if 'boundary_conditions' in case and case['boundary_conditions']:
+                    self.boundary_conditions.update(case['boundary_conditions'])
+                self.body_source = case['body_source'] if 'body_source' in case else body_source
+                with self.profiler.phase('form_generation'):
+                    F, Dirichlet_bcs = self.generate_form(0, self.trial_function, self.test_function, self.w_current, self.w_prev)
+                a, L = system(F)
+                key = self.get_operator_key(a)
+                dirichlet_dofs = set()
+                for bc in Dirichlet_bcs:
+                    if isinstance(bc, DirichletBC):
+                        dirichlet_dofs.update(bc.get_boundary_values().keys())
+                if A is None:
+                    if key is None:
+                        raise SolverError('operator depends on the solution, load cases can not share the operator')
+                    first_key, first_dofs = key, dirichlet_dofs
+                    with self.profiler.phase('assembly'):
+                        A = assemble(a)
+                    with self.profiler.phase('bc_application'):
+                        for bc in Dirichlet_bcs:
+                            if isinstance(bc, DirichletBC):
+                                bc.apply(A)
+                elif key != first_key:
+                    raise SolverError('bilinear form of load case {} is different from the first case'.format(i))
+                elif MPI.max(self.mesh.mpi_comm(), float(dirichlet_dofs != first_dofs)) > 0:  # collective
+                    raise SolverError('Dirichlet boundary dofs of load case {} are different from the first case'.format(i))
+                with self.profiler.phase('assembly'):
+                    b = assemble(L)
+                with self.profiler.phase('bc_application'):
+                    for bc in Dirichlet_bcs:
+                        bc.apply(b)  # apply Dirichlet BC and PointSource
+                self.load_case_rhs.append(b)
+        finally:
+            self.boundary_conditions, self.body_source = boundary_conditions, body_source
+
+        solutions = [Function(self.function_space) for b in self.load_case_rhs]
+        self.solve_multiple_rhs(A, self.load_case_rhs, solutions)
+        self.logger.info('%d load cases are solved with one operator', len(solutions))
+        return solutions
+
+    def solve_multiple_rhs(self, A, rhs_vectors, solutions):
+        # one factorization (or preconditioner setup) is shared by all right hand sides
+        if not self.linear_solver_settings and MPI.size(self.mesh.mpi_comm()) == 1:
+            try:
+                return self.solve_block_rhs(A, rhs_vectors, solutions)
+            except Exception as e:  # petsc4py is not available or factor does not support MatMatSolve
+                self.logger.debug('block solve is not available, right hand sides are solved one by one: %s', e)
+        if self.linear_solver_settings:
+            solver = self.get_linear_solver()
+            solver.set_operator(A)
+        else:
+            solver = LUSolver(A)
+            if 'reuse_factorization' in solver.parameters:  # Fenics 2017, later version reuses factorization by default
+                solver.parameters['reuse_factorization'] = True
+        for b, u in zip(rhs_vectors, solutions):
+            with self.profiler.phase('linear_solve'):  # factorization is done in the first solve
+                iterations = solver.solve(u.vector(), b)
+            if self.linear_solver_settings:
+                self.profiler.add_iterations('krylov', iterations)
+
+    def solve_block_rhs(self, A, rhs_vectors, solutions):
+        # serial only: LU factorization by PETSc, all right hand sides are solved by MatMatSolve as a dense matrix
+        from petsc4py import PETSc
+        A_mat = as_backend_type(A).mat()
+        comm = A_mat.getComm()
+        with self.profiler.phase('linear_solve'):
+            ksp = PETSc.KSP().create(comm)
+            ksp.setOperators(A_mat)
+            ksp.setType('preonly')
+            ksp.getPC().setType('lu')
+            ksp.setUp()  # factorization
+            n, m = A_mat.getSize()[0], len(rhs_vectors)
+            B = PETSc.Mat().createDense((n, m), array=np.asfortranarray(np.column_stack([b.get_local() for b in rhs_vectors])), comm=comm)
+            B.assemble()
+            X = PETSc.Mat().createDense((n, m), comm=comm)
+            X.setUp()
+            X.assemble()
+            ksp.getPC().getFactorMatrix().matSolve(B, X)
+            values = X.getDenseArray()
+        for i, u in enumerate(solutions):
+            u.vector().set_local(np.ascontiguousarray(values[:, i]))
+            u.vector().apply('insert')
+
+    def _get_cached_solver(self, kind, F, u, bcs):
+        # variational solver is reused, if it is called with the same form, e.g. reused form or Picard loop
+        cache = self._solver_cache.get(kind)
+        if cache and cache[0] is F and cache[1] is u and cache[2] is bcs:
+            return cache[3]
+        return None
+
+    def _set_cached_solver(self, kind, F, u, bcs, solver):
+        self._solver_cache[kind] = (F, u, bcs, solver)
+
+    def solve_nonlinear_problem(self, F, u_current, Dirichlet_bcs, J, linear_solver_settings=None):
+        # `linear_solver_settings` given for this call selects the Newton solver path without changing the solver object
+        if self.nonlinear_solver_settings and self.nonlinear_solver_settings['method'] == 'snes':
+            return self.solve_nonlinear_problem_snes(F, u_current, Dirichlet_bcs, J)
+        if linear_solver_settings or self.linear_solver_settings:
+            return self.solve_nonlinear_problem_newton(F, u_current, Dirichlet_bcs, J, linear_solver_settings)
+        solver = self._get_cached_solver('nonlinear', F, u_current, Dirichlet_bcs)
+        if not solver:
+            with self.profiler.phase('form_compilation'):
+                problem = NonlinearVariationalProblem(F, u_current, Dirichlet_bcs, J)
+            solver = NonlinearVariationalSolver(problem)
+
+            # nested dict 'newton_solver' in `solver_parameters` is applied
+            # see all default parameters: <https://github.com/FEniCS/dolfin/blob/master/dolfin/nls/NewtonSolver.cpp>
+            self.set_solver_parameters(solver)
+            self._set_cached_solver('nonlinear', F, u_current, Dirichlet_bcs, solver)
 
-        solver.solve()
+        with self.profiler.phase('nonlinear_solve'):  # assembly and BC application are included
+            ret = solver.solve()
+        if ret:  # (iterations, converged)
+            self.profiler.add_iterations('newton', ret[0])
         return u_current
 
-    def set_solver_parameters(self, solver):
-        # Define a dolfin linear algobra solver parameters
+    def solve_nonlinear_problem_newton(self, F, u_current, Dirichlet_bcs, J, linear_solver_settings=None):
+        # Newton solver using the linear solver configured by `linear_solver_settings` of this call or of this solver
+        cached = self._get_cached_solver('newton', F, u_current, Dirichlet_bcs)
+        if not cached:
+            with self.profiler.phase('form_compilation'):
+                problem = SolverNonlinearProblem(self, F, J, Dirichlet_bcs)
+            if linear_solver_settings:
+                linear_solver = self.create_linear_solver(self.linear_solver_prefix + 'newton_', linear_solver_settings)
+            else:
+                linear_solver = self.get_linear_solver()
+            newton_solver = NewtonSolver(self.mesh.mpi_comm(), linear_solver, PETScFactory.instance())
+            if 'newton_solver' in self.solver_parameters:
+                self.set_solver_parameters(newton_solver, self.solver_parameters['newton_solver'])
+            cached = (problem, newton_solver)
+            self._set_cached_solver('newton', F, u_current, Dirichlet_bcs, cached)
+
+        problem, newton_solver = cached
+        with self.profiler.phase('nonlinear_solve'):
+            iterations, converged = newton_solver.solve(problem, u_current.vector())
+        self.profiler.add_iterations('newton', iterations)
+        return u_current
 
-        parameters["linear_algebra_backend"] = "PETSc"  #UMFPACK: out of memory, PETSc divergent
-        #parameters["linear_algebra_backend"] = "Eigen"  # 'uBLAS' is not supported any longer
+    def solve_nonlinear_problem_snes(self, F, u_current, Dirichlet_bcs, J):
+        cached = self._get_cached_solver('snes', F, u_current, Dirichlet_bcs)
+        if not cached:
+            with self.profiler.phase('form_compilation'):
+                problem = SolverNonlinearProblem(self, F, J, Dirichlet_bcs)
+            cached = (problem, self.create_snes_solver())
+            self._set_cached_solver('snes', F, u_current, Dirichlet_bcs, cached)
+
+        problem, snes_solver = cached
+        if self.nonlinear_solver_settings['lag_jacobian'] == -1:
+            try:  # PETSc turns lag -2 into -1 (never rebuild) after the first build, so it is reset for each solve
+                snes_solver.snes().setLagJacobian(-2)
+            except Exception as e:
+                self.logger.debug('lag of Jacobian can not be reset, petsc4py is needed: %s', e)
+        with self.profiler.phase('nonlinear_solve'):
+            iterations, converged = snes_solver.solve(problem, u_current.vector())
+        self.profiler.add_iterations('newton', iterations)
+        if not converged:
+            self.logger.warning('SNES solver is not converged after %d iterations', iterations)
+        if self.nonlinear_solver_settings['reporting_residual']:
+            self.report_residual_history(snes_solver)
+        return u_current
 
-        parameters["mesh_partitioner"] = "SCOTCH"
-        #parameters["form_compiler"]["representation"] = "quadrature"
-        parameters["form_compiler"]["optimize"] = True
+    def create_snes_solver(self):
+        """ PETSc SNES solver, configured by `nonlinear_solver_settings` and `linear_solver_settings`,
+        all options are set into PETSc options database with the prefix of this solver
+        """
+        nss = self.nonlinear_solver_settings
+        prefix = self.linear_solver_prefix + 'snes_'
+        # PETSc lag -1 means the Jacobian is never rebuilt, once per solve is -2
+        lag_jacobian = -2 if nss['lag_jacobian'] == -1 else nss['lag_jacobian']
+        options = {'snes_type': 'newtonls', 'snes_linesearch_type': nss['line_search'],
+                   'snes_lag_jacobian': lag_jacobian, 'snes_lag_preconditioner': nss['lag_preconditioner'],
+                   'snes_rtol': nss['relative_tolerance'], 'snes_atol': nss['absolute_tolerance'],
+                   'snes_max_it': nss['maximum_iterations']}
+        if nss['eisenstat_walker']:
+            options['snes_ksp_ew'] = None
+        if self.linear_solver_settings:
+            options.update(self.get_petsc_options())
+        else:  # same as default linear solver of dolfin Newton solver
+            options.update({'ksp_type': 'preonly', 'pc_type': 'lu'})
+        options.update(nss['petsc_options'])
+        for key, value in options.items():
+            if value is None:
+                PETScOptions.set(prefix + key)
+            else:
+                PETScOptions.set(prefix + key, value)
+
+        solver = PETScSNESSolver(self.mesh.mpi_comm())
+        # dolfin parameters are also set, in case dolfin applies them after PETSc options
+        update_parameters(solver.parameters, {'method': 'newtonls', 'line_search': nss['line_search'],
+                                              'relative_tolerance': nss['relative_tolerance'],
+                                              'absolute_tolerance': nss['absolute_tolerance'],
+                                              'maximum_iterations': nss['maximum_iterations'],
+                                              'report': not self.quiet})
+        solver.set_options_prefix(prefix)
+        solver.set_from_options()
+        try:
+            solver.snes().setConvergenceHistory(reset=True)  # petsc4py is needed
+        except Exception as e:
+            self.logger.debug('residual history of SNES solver is not available: %s', e)
+        self.logger.info('SNES solver with PETSc option prefix `%s`: %s', prefix, options)
+        return solver
 
-        if 'solver_parameters' in self.solver_settings:
-            for key in self.solver_settings['solver_parameters']:
-                if key in solver.parameters:
-                    solver.parameters[key] = self.solver_settings['solver_parameters'][key]
+    def report_residual_history(self, snes_solver):
+        try:
+            residual_norms, linear_iterations = snes_solver.snes().getConvergenceHistory()
+        except Exception:
+            return
+        self.residual_history = list(residual_norms)
+        if len(linear_iterations):
+            self.profiler.add_iterations('krylov', int(np.sum(linear_iterations)))
+        self.logger.info('SNES residual norm history: %s', ', '.join('{:.3e}'.format(r) for r in residual_norms))
+
+    def update_nonlinear_coefficients(self, x):
+        """ called before assembly in each Newton iteration by `solve_nonlinear_problem_newton()`,
+        derived class can update coefficients evaluated from the current solution vector x
+        """
+        pass
+
+    def set_solver_parameters(self, solver, solver_parameters=None):
+        # map `solver_parameters` dict, which may have nested dict, into solver.parameters of dolfin
+        if solver_parameters is None:
+            solver_parameters = self.solver_parameters
+        ignored = update_parameters(solver.parameters, solver_parameters)
+        if ignored:
+            self.logger.debug('solver parameters not applicable to %s: %s', type(solver).__name__, ignored)
+        if self.quiet and 'monitor_convergence' in solver.parameters:
+            solver.parameters['monitor_convergence'] = False
+
+    def get_petsc_options(self, linear_solver_settings=None):
+        # translate `linear_solver_settings` (default of this solver) into PETSc options without prefix
+        lss = linear_solver_settings if linear_solver_settings else self.linear_solver_settings
+        options = {}
+        if lss['method'] in _direct_solver_methods:
+            options['ksp_type'] = 'preonly'
+            options['pc_type'] = 'lu'
+            if lss['method'] != 'lu':
+                options[get_mat_solver_option_name()] = lss['method']
+        else:
+            options['ksp_type'] = lss['method']
+            pc = lss['preconditioner']
+            if pc and pc != 'default':
+                options['pc_type'] = _preconditioner_names.get(pc, pc)
+                if pc == 'hypre_amg':
+                    options['pc_hypre_type'] = 'boomeramg'
+            options['ksp_rtol'] = lss['relative_tolerance']
+            options['ksp_atol'] = lss['absolute_tolerance']
+            options['ksp_max_it'] = lss['maximum_iterations']
+            if lss['nonzero_initial_guess']:
+                options['ksp_initial_guess_nonzero'] = True
+        if lss['monitor_convergence'] and not self.quiet:
+            options['ksp_monitor'] = None
+            options['ksp_converged_reason'] = None
+        if lss['petsc_options']:
+            options.update(lss['petsc_options'])
+        return options
+
+    def get_linear_solver(self):
+        """ PETSc KSP solver configured by `linear_solver_settings`, created once for this solver object,
+        options are set into PETSc options database with the prefix of this solver
+        """
+        if self._linear_solver is None:
+            self._linear_solver = self.create_linear_solver(self.linear_solver_prefix)
+        return self._linear_solver
+
+    def create_linear_solver(self, prefix, linear_solver_settings=None):
+        options = self.get_petsc_options(linear_solver_settings)
+        for key, value in options.items():
+            if value is None:
+                PETScOptions.set(prefix + key)
+            else:
+                PETScOptions.set(prefix + key, value)
+        solver = PETScKrylovSolver()
+        solver.set_options_prefix(prefix)
+        solver.set_from_options()
+        self.logger.info('linear solver with PETSc option prefix `%s`: %s', prefix, options)
+        return solver
 
     def solve_amg(self, F, u, bcs):
-        A, b = assemble_system(lhs(F), rhs(F), bcs)
-        # Create near null space basis (required for smoothed aggregation AMG).
-        # The solution vector is passed so that it can be copied to generate compatible vectors for the nullspace.
-        null_space = self.build_nullspace(self.function_space, u.vector())
-        # Attach near nullspace to matrix
-        as_backend_type(A).set_near_nullspace(null_space)
-
-        # Create PETSC smoothed aggregation AMG preconditioner and attach near null space
-        pc = PETScPreconditioner("petsc_amg")
-
-        # Use Chebyshev smoothing for multigrid
-        PETScOptions.set("mg_levels_ksp_type", "chebyshev")
-        PETScOptions.set("mg_levels_pc_type", "jacobi")
-
-        # Improve estimate of eigenvalues for Chebyshev smoothing
-        PETScOptions.set("mg_levels_esteig_ksp_type", "cg")
-        PETScOptions.set("mg_levels_ksp_chebyshev_esteig_steps", 50)
-
-        # Create CG Krylov solver and turn convergence monitoring on
-        solver = PETScKrylovSolver("cg", pc)
-        solver.parameters["monitor_convergence"] = True
-
-        # Set matrix operator
-        solver.set_operator(A)
+        """ CG solver with smoothed aggregation AMG, Krylov solver and near nullspace are created only once,
+        operator is assembled and AMG is set up again only if the bilinear form is changed, see `get_operator_key()`
+        """
+        a, L = self.get_system(F)
+        cache = self._amg_cache
+        if cache.get('a') is not a or cache.get('bcs') is not bcs:
+            with self.profiler.phase('form_compilation'):  # BC are applied symmetrically during assembly
+                cache['assembler'] = SystemAssembler(a, L, bcs)
+            cache['a'] = a
+            cache['bcs'] = bcs
+        solver = self.get_amg_solver()
+        key = self.get_operator_key(a)
+        b = PETScVector()
+        if key is None or key != cache.get('key'):
+            A = PETScMatrix()
+            with self.profiler.phase('assembly'):
+                cache['assembler'].assemble(A, b)
+            # Attach near nullspace to matrix, it is required for smoothed aggregation AMG
+            A.set_near_nullspace(self.get_near_nullspace(u.vector()))
+            solver.set_operator(A)  # AMG is set up in the next solve, unless `reusing_preconditioner`
+            cache['key'] = key
+            cache['A'] = A
+        else:
+            with self.profiler.phase('assembly'):
+                cache['assembler'].assemble(b)
 
-        # Compute solution
-        solver.solve(u.vector(), b)
-        
+        with self.profiler.phase('linear_solve'):
+            iterations = solver.solve(u.vector(), b)
+        self.profiler.add_iterations('krylov', iterations)
         return u
+
+    def get_amg_solver(self):
+        if self._amg_solver is None:
+            prefix = self.linear_solver_prefix + 'amg_'
+            options = {'ksp_type': 'cg', 'pc_type': 'gamg',
+                       # Use Chebyshev smoothing for multigrid
+                       'mg_levels_ksp_type': 'chebyshev', 'mg_levels_pc_type': 'jacobi',
+                       # Improve estimate of eigenvalues for Chebyshev smoothing
+                       'mg_levels_esteig_ksp_type': 'cg', 'mg_levels_ksp_chebyshev_esteig_steps': 50}
+            if self.amg_settings['nonzero_initial_guess']:
+                options['ksp_initial_guess_nonzero'] = True
+            options.update(self.amg_settings['petsc_options'])
+            for key, value in options.items():
+                if value is None:
+                    PETScOptions.set(prefix + key)
+                else:
+                    PETScOptions.set(prefix + key, value)
+            solver = PETScKrylovSolver()
+            solver.set_options_prefix(prefix)
+            solver.set_from_options()
+            if 'monitor_convergence' in solver.parameters:
+                solver.parameters["monitor_convergence"] = not self.quiet
+            if 'nonzero_initial_guess' in solver.parameters:  # Fenics 2017 overrides PETSc option by this parameter
+                solver.parameters['nonzero_initial_guess'] = self.amg_settings['nonzero_initial_guess']
+            if self.amg_settings['reusing_preconditioner']:
+                solver.set_reuse_preconditioner(True)
+            self._amg_solver = solver
+        return self._amg_solver
+
+    def get_near_nullspace(self, x):
+        # rigid body modes are built only once for the function space
+        if self._near_nullspace is None or self._near_nullspace[0] is not self.function_space:
+            # The solution vector is passed so that it can be copied to generate compatible vectors for the nullspace.
+            self._near_nullspace = (self.function_space, self.build_nullspace(self.function_space, x))
+        return self._near_nullspace[1]
     
     def build_nullspace(self, V, x):
         """Function to build null space for 2D and 3D elasticity"""
 
-        # Create list of vectors for null space
+        # Create list of vectors for null space, copies of x hold the solution values and must be zeroed
         if self.dimension == 3:
             nullspace_basis = [x.copy() for i in range(6)]
+            for v in nullspace_basis:
+                v.zero()
             # Build translational null space basis
             V.sub(0).dofmap().set(nullspace_basis[0], 1.0);
             V.sub(1).dofmap().set(nullspace_basis[1], 1.0);
@@ -691,6 +1774,13 @@ class SolverBase():
             V.sub(1).set_x(nullspace_basis[5], -1.0, 2);
         elif self.dimension == 2:
             nullspace_basis = [x.copy() for i in range(3)]
+            for v in nullspace_basis:
+                v.zero()
+            # Build translational null space basis
+            V.sub(0).dofmap().set(nullspace_basis[0], 1.0);
+            V.sub(1).dofmap().set(nullspace_basis[1], 1.0);
+
+            # Build rotational null space basis
             V.sub(0).set_x(nullspace_basis[2], -1.0, 1);
             V.sub(1).set_x(nullspace_basis[2], 1.0, 0);
         else:
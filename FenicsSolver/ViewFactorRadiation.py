@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+
+from __future__ import print_function, division, absolute_import
+
+"""
+Feature: surface-to-surface (enclosure) radiation of gray diffuse boundary facets
+
++ facet-to-facet view factor matrix is computed once by numpy, integrated on `samples` points of each facet,
+    centroid-to-centroid rays are checked against all radiating facets for obstruction (2D segment, 3D triangle)
++ view factors are symmetrized by reciprocity A_i F_ij = A_j F_ji, rows summing above 1 (quadrature error)
+    are scaled down symmetrically to keep reciprocity, `1 - sum(F_ij)` of each facet goes to ambient
++ the matrix is cached in `view_factors_<sha1>.npz`, hash of the facet coordinates and settings,
+    in `cache_folder` (default the case folder), so transient steps and later runs reuse it
++ `update()` solves radiosity of all facets from the facet temperature, the irradiation `G` is a DGT Function,
+    net heat flux into the solid surface is `emissivity * (G - sigma * T^4)`
++ only serial run is supported, the dense matrix has size of the number of radiating facets
+"""
+
+import os.path
+import hashlib
+import numpy as np
+
+from dolfin import *
+
+from .SolverBase import SolverError
+
+Stefan_constant = 5.670367e-8  # W/m-2/K-4
+default_view_factor_settings = {'samples': 2, 'obstruction': True, 'cache_folder': None}
+
+
+class ViewFactorRadiation(object):
+    def __init__(self, mesh, boundary_facets, boundary_ids, settings, logger):
+        if MPI.size(mesh.mpi_comm()) > 1:
+            raise SolverError('enclosure radiation with view factor is only supported in serial')
+        self.mesh = mesh
+        self.logger = logger
+        self.settings = dict(default_view_factor_settings)
+        if settings:
+            self.settings.update(settings)
+        self.dim = mesh.geometry().dim()
+        tdim = mesh.topology().dim()
+        if self.dim != tdim or tdim not in (2, 3):
+            raise SolverError('view factor is only implemented for 2D and 3D solid mesh')
+        mesh.init(tdim - 1, tdim)  # outward normal of boundary facets
+        self.facets = np.where(np.isin(boundary_facets.array(), list(boundary_ids)))[0]
+        if not len(self.facets):
+            raise SolverError('no facet is marked by enclosure boundary ids {}'.format(boundary_ids))
+        self.vertices = np.array([Facet(mesh, int(f)).entities(0) for f in self.facets], dtype=np.intp)
+        self.normals = np.array([Facet(mesh, int(f)).normal().array()[:self.dim] for f in self.facets])
+        self.points = mesh.coordinates()[self.vertices]  # (facets, vertices of facet, dim)
+        self.centroids = self.points.mean(axis=1)
+        if self.dim == 2:
+            self.areas = np.linalg.norm(self.points[:, 1] - self.points[:, 0], axis=1)
+        else:
+            self.areas = 0.5 * np.linalg.norm(np.cross(self.points[:, 1] - self.points[:, 0],
+                                                       self.points[:, 2] - self.points[:, 0]), axis=1)
+
+        self.view_factors = self.load_or_compute_view_factors()
+        self.ambient_view_factors = np.maximum(1.0 - self.view_factors.sum(axis=1), 0.0)
+
+        self.function_space = FunctionSpace(mesh, 'DGT', 0)  # one value for each facet
+        dofmap = self.function_space.dofmap()
+        try:
+            self.dofs = np.asarray(dofmap.entity_dofs(mesh, tdim - 1, self.facets))
+        except TypeError:  # Fenics 2017
+            self.dofs = np.asarray(dofmap.entity_dofs(mesh, tdim - 1))[self.facets]
+        self.irradiation = Function(self.function_space)  # G, W/m2
+        self._radiosity_operator = None  # (emissivity, inverse of radiosity matrix)
+
+    def get_cache_filename(self):
+        h = hashlib.sha1()
+        h.update(np.ascontiguousarray(self.points).tobytes())
+        h.update(repr((self.settings['samples'], self.settings['obstruction'])).encode('utf-8'))
+        folder = self.settings['cache_folder'] or '.'
+        return folder + os.path.sep + 'view_factors_{}.npz'.format(h.hexdigest())
+
+    def load_or_compute_view_factors(self):
+        filename = self.get_cache_filename()
+        if os.path.exists(filename):
+            self.logger.info('load cached view factors from %s', filename)
+            return np.load(filename)['view_factors']
+        self.logger.info('computing view factors of %d facets', len(self.facets))
+        F = self.compute_view_factors()
+        np.savez_compressed(filename, view_factors=F, areas=self.areas)
+        self.logger.info('view factors are cached into %s', filename)
+        return F
+
+    def get_sample_points(self):
+        # integration points and weights of each facet, (facets, samples, dim) and (facets, samples)
+        s = self.settings['samples']
+        if self.dim == 2:
+            t, w = np.polynomial.legendre.leggauss(s)
+            a, b = self.points[:, 0], self.points[:, 1]
+            X = 0.5 * (a + b)[:, None, :] + 0.5 * t[None, :, None] * (b - a)[:, None, :]
+            W = 0.5 * w[None, :] * self.areas[:, None]
+        elif s == 1:
+            X = self.centroids[:, None, :]
+            W = self.areas[:, None]
+        else:  # 3 points rule on triangle
+            bary = np.array([[2.0/3, 1.0/6, 1.0/6], [1.0/6, 2.0/3, 1.0/6], [1.0/6, 1.0/6, 2.0/3]])
+            X = np.einsum('qv,fvd->fqd', bary, self.points)
+            W = np.repeat(self.areas[:, None] / 3.0, 3, axis=1)
+        return X, W
+
+    def compute_view_factors(self):
+        X, W = self.get_sample_points()
+        n = self.normals
+        N = len(self.facets)
+        F = np.zeros((N, N))
+        for i in range(N):  # vectorized for all pairs of sample points of facet i and all other facets
+            d = X[None, :, :, :] - X[i][:, None, None, :]  # (samples of i, facets, samples, dim)
+            r2 = np.einsum('aqsd,aqsd->aqs', d, d)
+            r2[:, i, :] = np.inf
+            r = np.sqrt(r2)
+            cos_i = np.einsum('aqsd,d->aqs', d, n[i]) / r
+            cos_j = -np.einsum('aqsd,qd->aqs', d, n) / r
+            if self.dim == 2:
+                kernel = cos_i * cos_j / (2.0 * r)
+            else:
+                kernel = cos_i * cos_j / (np.pi * r2)
+            kernel[(cos_i <= 0) | (cos_j <= 0)] = 0.0
+            F[i] = np.einsum('a,aqs,qs->q', W[i], kernel, W) / self.areas[i]
+            if self.settings['obstruction']:
+                F[i, self.obstructed(i)] = 0.0
+        AF = self.areas[:, None] * F
+        AF = 0.5 * (AF + AF.T)  # reciprocity
+        # AF_ij is divided by the larger excess of row i and j, so row sums are <= 1 and AF stays symmetric
+        scale = np.maximum(AF.sum(axis=1) / self.areas, 1.0)
+        AF /= np.maximum(scale[:, None], scale[None, :])
+        return AF / self.areas[:, None]
+
+    def obstructed(self, i, eps=1e-9):
+        # centroid-to-centroid rays from facet i, which are blocked by any other facet
+        o = self.centroids[i]
+        D = self.centroids - o  # (rays, dim)
+        p = self.points
+        if self.dim == 2:
+            e = p[:, 1] - p[:, 0]
+            ao = p[:, 0] - o  # (facets, dim)
+            cross = lambda u, v: u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+            denom = cross(D[:, None, :], e[None, :, :])  # (rays, facets)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = cross(ao[None, :, :], e[None, :, :]) / denom
+                u = cross(ao[None, :, :], D[:, None, :]) / denom
+                blocked = (np.abs(denom) > eps) & (t > eps) & (t < 1 - eps) & (u >= 0) & (u <= 1)
+        else:  # Moller-Trumbore ray-triangle intersection
+            e1 = p[:, 1] - p[:, 0]
+            e2 = p[:, 2] - p[:, 0]
+            h = np.cross(D[:, None, :], e2[None, :, :])  # (rays, facets, dim)
+            a = np.einsum('qd,rqd->rq', e1, h)
+            s = o - p[:, 0]
+            q = np.cross(s, e1)  # (facets, dim)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                f = 1.0 / a
+                u = f * np.einsum('qd,rqd->rq', s, h)
+                v = f * np.einsum('rd,qd->rq', D, q)
+                t = f * np.einsum('qd,qd->q', e2, q)[None, :]
+                blocked = (np.abs(a) > eps) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > eps) & (t < 1 - eps)
+        blocked[:, i] = False
+        blocked[np.arange(len(D)), np.arange(len(D))] = False  # target facet itself
+        return blocked.any(axis=1)
+
+    def update(self, T, emissivity, T_ambient):
+        """ solve radiosity J = emissivity * Eb + (1 - emissivity) * G, G = F * J + F_ambient * Eb_ambient,
+        from the facet temperature of Function T, then update the irradiation Function G
+        """
+        T_vertex = T.compute_vertex_values(self.mesh)
+        Eb = Stefan_constant * np.mean(T_vertex[self.vertices]**4, axis=1)
+        G_ambient = self.ambient_view_factors * Stefan_constant * T_ambient**4
+        if self._radiosity_operator is None or self._radiosity_operator[0] != emissivity:
+            # the dense matrix is inverted only once, for the constant view factors and emissivity
+            A = np.eye(len(self.facets)) - (1.0 - emissivity) * self.view_factors
+            self._radiosity_operator = (emissivity, np.linalg.inv(A))
+        J = self._radiosity_operator[1].dot(emissivity * Eb + (1.0 - emissivity) * G_ambient)
+        G = self.view_factors.dot(J) + G_ambient
+        values = self.irradiation.vector().get_local()
+        values[self.dofs] = G
+        self.irradiation.vector().set_local(values)
+        self.irradiation.vector().apply('insert')
+        return G
@@ -3,18 +3,7 @@ __author__ = 'Qingfeng Xia'
 
 #__all__ = []
 
-# a function can be execute here to enable
-# python3 -m FenicsSolver config.json
+# command line entry `python3 -m FenicsSolver config.json` is in __main__.py,
+# so importing this package by other script does not parse the arguments of that script
 
-import sys
-from .main import main
-
-#print(sys.argv)
-if len(sys.argv) < 2:
-    print("Not enough input argument, Usage: `python - FenicsSolver case_input` \n  to run simulation")
-    #  must start this solver in FenicsSolver folder
-
-else:
-    config_file = sys.argv[1]
-    print("run FenicsSolver with config file", config_file)
-    main(config_file)
\ No newline at end of file
+from .main import main
\ No newline at end of file
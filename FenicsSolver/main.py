@@ -74,23 +74,29 @@ def load_settings(case_input):
         raise TypeError('{} is not supported by Fenics as case input, only path string or dict'.format(type(case_input)))
     return settings
 
-def main(case_input):
-    settings = load_settings(case_input)
+def create_solver(settings):
+    # solver object is constructed according to `solver_name`, mesh is read and function space is built
     solver_name = settings['solver_name']
     if solver_name == "CoupledNavierStokesSolver":
         from . import CoupledNavierStokesSolver
         solver = CoupledNavierStokesSolver.CoupledNavierStokesSolver(settings)
-        solver.solve()
+    elif solver_name == "SegregatedNavierStokesSolver":
+        from . import SegregatedNavierStokesSolver
+        solver = SegregatedNavierStokesSolver.SegregatedNavierStokesSolver(settings)
     elif solver_name == "ScalarTransportSolver":
         from . import ScalarTransportSolver
         solver = ScalarTransportSolver.ScalarTransportSolver(settings)
-        solver.solve()
     elif solver_name == "LinearElasticitySolver":
         from . import LinearElasticitySolver
         solver = LinearElasticitySolver.LinearElasticitySolver(settings)
-        solver.solve()
     else:
         raise NameError('Solver name : {} is not supported by Fenics'.format(solver_name))
+    return solver
+
+def main(case_input):
+    settings = load_settings(case_input)
+    solver = create_solver(settings)
+    solver.solve()
     #plot may be done by ParaView or by fenics solver.plot()
     solver.plot()
 
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+"""
+Standardized benchmark cases derived from examples/, parameterized by mesh resolution `n`
+(number of cells along the unit length), with generated meshes, no plotting and no result file.
+
+Each case function returns a solver object ready to call `solve()`, mesh generation is not timed.
+"""
+
+from __future__ import print_function, division
+import copy
+import logging
+from collections import OrderedDict
+
+from dolfin import *
+from FenicsSolver import SolverBase
+
+# no plotting, no result file, profiling is collected by solver.profiler
+benchmark_report_settings = {'logging_level': logging.ERROR, 'logging_file': None,
+                             'plotting_freq': 0, 'plotting_interactive': False, 'plotting_file': None,
+                             'saving_freq': 0, 'result_filename': None, 'profiling_file': None}
+
+T_hot = 360
+T_cold = 300
+
+
+def _default_settings():
+    s = copy.deepcopy(SolverBase.default_case_settings)  # default dict must not be changed by cases
+    s['report_settings'] = copy.copy(benchmark_report_settings)
+    return s
+
+
+def heat_conduction(n, transient=False):
+    from FenicsSolver.ScalarTransportSolver import ScalarTransportSolver
+    mesh = UnitSquareMesh(n, n)
+    top = AutoSubDomain(lambda x: near(x[1], 1))
+    bottom = AutoSubDomain(lambda x: near(x[1], 0))
+    bcs = OrderedDict()
+    bcs["hot"] = {'boundary': top, 'boundary_id': 1, 'values': {
+                    'temperature': {'variable': 'temperature', 'type': 'Dirichlet', 'value': Constant(T_hot)} }}
+    bcs["cold"] = {'boundary': bottom, 'boundary_id': 2, 'values': {
+                    'temperature': {'variable': 'temperature', 'type': 'Dirichlet', 'value': Constant(T_cold)} }}
+    s = _default_settings()
+    s['mesh'] = mesh
+    s['scalar_name'] = 'temperature'
+    s['boundary_conditions'] = bcs
+    s['initial_values'] = {'temperature': T_cold}
+    s['material'] = {'density': 1000, 'specific_heat_capacity': 4200, 'thermal_conductivity': 0.1}
+    s['solver_settings']['reference_values'] = {'temperature': T_cold}
+    if transient:
+        s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0, 'time_step': 100, 'ending_time': 2000}
+    return ScalarTransportSolver(s)
+
+
+def heat_conduction_transient(n):
+    return heat_conduction(n, transient=True)
+
+
+def linear_elasticity(n, dim=2, using_amg=False):
+    from FenicsSolver.LinearElasticitySolver import LinearElasticitySolver
+    length = 10
+    if dim == 3:
+        mesh = BoxMesh(Point(0, 0, 0), Point(length, 1, 1), length * n, n, n)
+    else:
+        mesh = RectangleMesh(Point(0, 0), Point(length, 1), length * n, n)
+    left = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[0], 0))
+    right = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[0], length))
+    bcs = OrderedDict()
+    bcs["fixed"] = {'boundary': left, 'boundary_id': 1, 'type': 'Dirichlet', 'value': Constant(dim*(0,))}
+    bcs["tensile"] = {'boundary': right, 'boundary_id': 2, 'type': 'stress', 'value': Constant((1e8,) + (dim-1)*(0,))}
+    s = _default_settings()
+    s['mesh'] = mesh
+    s['fe_degree'] = 2
+    s['boundary_conditions'] = bcs
+    s['temperature_distribution'] = None
+    s['material'] = {'name': 'steel', 'elastic_modulus': 2e11, 'poisson_ratio': 0.27, 'density': 7800,
+                     'thermal_expansion_coefficient': 2e-6}
+    s['solver_settings']['reference_values'] = {'temperature': 293}
+    s['solver_settings']['using_amg'] = using_amg
+    return LinearElasticitySolver(s)
+
+
+def linear_elasticity_2d(n):
+    return linear_elasticity(n, dim=2, using_amg=False)
+
+
+def linear_elasticity_2d_amg(n):
+    return linear_elasticity(n, dim=2, using_amg=True)
+
+
+def linear_elasticity_3d(n):
+    return linear_elasticity(n, dim=3, using_amg=False)
+
+
+def linear_elasticity_3d_amg(n):
+    return linear_elasticity(n, dim=3, using_amg=True)
+
+
+def _flow_settings(mesh, bcs, viscosity):
+    s = _default_settings()
+    s['mesh'] = mesh
+    s['boundary_conditions'] = bcs
+    s['solving_temperature'] = False
+    s['initial_values'] = {'velocity': (0, 0), 'temperature': T_cold, 'pressure': 1e5}
+    s['solver_settings']['reference_values'] = {'velocity': (1, 1), 'temperature': T_cold, 'pressure': 1e5}
+    s['material'] = {'name': 'oil', 'kinematic_viscosity': viscosity, 'density': 1,
+                     'specific_heat_capacity': 4200, 'thermal_conductivity': 0.1, 'Newtonian': True}
+    return s
+
+
+def elbow_flow(n):
+    # 2D elbow of examples/test_cfd_solver.py, mesh resolution is `n` cells along unit length
+    from mshr import Rectangle, generate_mesh
+    from FenicsSolver.CoupledNavierStokesSolver import CoupledNavierStokesSolver
+    elbow = Rectangle(Point(0, 0), Point(1, 2)) + Rectangle(Point(1, 1), Point(2, 2))
+    mesh = generate_mesh(elbow, n)
+    static_boundary = AutoSubDomain(lambda x, on_boundary: on_boundary \
+        and (near(x[0], 0) or near(x[1], 2) or near(x[0], 1) or near(x[1], 1)))
+    inlet = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[1], 0))
+    outlet = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[0], 2))
+    bcs = OrderedDict()
+    bcs["static"] = {'boundary': static_boundary, 'boundary_id': 1,
+                     'values': [{'variable': "velocity", 'type': 'Dirichlet', 'value': Constant((0, 0))}]}
+    bcs["inlet"] = {'boundary': inlet, 'boundary_id': 2,
+                    'values': [{'variable': "velocity", 'type': 'Dirichlet',
+                                'value': Expression(('0', '1 - pow((x[0] - 0.5)/0.5, 2)'), degree = 2)}]}
+    bcs["outlet"] = {'boundary': outlet, 'boundary_id': 3,
+                     'values': [{'variable': "pressure", 'type': 'Dirichlet', 'value': 1e5}]}
+    return CoupledNavierStokesSolver(_flow_settings(mesh, bcs, viscosity = 1.0))
+
+
+def cylinder_flow(n):
+    # flow pass cylinder of examples/test_flow_pass_cylinder.py, `n` cells along the channel height
+    from mshr import Rectangle, Circle, generate_mesh
+    from FenicsSolver.CoupledNavierStokesSolver import CoupledNavierStokesSolver
+    x_max, y_max = 2.2, 0.41
+    domain = Rectangle(Point(0, 0), Point(x_max, y_max)) - Circle(Point(0.2, 0.2), 0.05)
+    mesh = generate_mesh(domain, int(n * x_max / y_max))
+    inlet = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[0], 0))
+    outlet = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[0], x_max))
+    walls = AutoSubDomain(lambda x, on_boundary: on_boundary and (near(x[1], 0) or near(x[1], y_max)))
+    cylinder = AutoSubDomain(lambda x, on_boundary: on_boundary and x[0]>0.1 and x[0]<0.3 and x[1]>0.1 and x[1]<0.3)
+    bcs = OrderedDict()
+    bcs["wall"] = {'boundary': walls, 'boundary_id': 1,
+                   'values': [{'variable': "velocity", 'type': 'Dirichlet', 'value': Constant((0, 0))}]}
+    bcs["cylinder"] = {'boundary': cylinder, 'boundary_id': 2,
+                       'values': [{'variable': "velocity", 'type': 'Dirichlet', 'value': Constant((0, 0))}]}
+    bcs["inlet"] = {'boundary': inlet, 'boundary_id': 3,
+                    'values': [{'variable': "velocity", 'type': 'Dirichlet',
+                                'value': Expression(('6*x[1]*(0.41 - x[1]) / pow(0.41, 2)', '0'), degree = 2)}]}
+    bcs["outlet"] = {'boundary': outlet, 'boundary_id': 4,
+                     'values': [{'variable': "pressure", 'type': 'Dirichlet', 'value': 1e5}]}
+    return CoupledNavierStokesSolver(_flow_settings(mesh, bcs, viscosity = 0.03))
+
+
+def large_deformation(n):
+    # 2D beam of examples/test_large_deformation.py
+    from FenicsSolver.LargeDeformationSolver import LargeDeformationSolver
+    length = 20
+    mesh = RectangleMesh(Point(0, 0), Point(length, 1), length * n, n, 'crossed')
+    left = AutoSubDomain(lambda x: near(x[0], 0))
+    right = AutoSubDomain(lambda x: near(x[0], length))
+    bcs = OrderedDict()
+    bcs["fixed"] = {'boundary': left, 'boundary_id': 1, 'type': 'Dirichlet', 'variable': "displacement", 'value': (0.0, 0.0)}
+    bcs["fixed_velocity"] = {'boundary': left, 'boundary_id': 1, 'type': 'Dirichlet', 'variable': "velocity", 'value': (0.0, 0.0)}
+    bcs["stress_b"] = {'boundary': right, 'boundary_id': 2, 'type': 'force', 'value': (0, 5)}
+    s = _default_settings()
+    s['mesh'] = mesh
+    s['boundary_conditions'] = bcs
+    s['material'] = {'name': 'steel', 'elastic_modulus': 1e5, 'poisson_ratio': 0.3, 'density': 1000,
+                     'thermal_expansion_coefficient': 2e-6}
+    s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0, 'time_step': 0.25, 'ending_time': 2.5}
+    s['solver_settings']['reference_values'] = {'temperature': 293}
+    return LargeDeformationSolver(s)
+
+
+def fsi_channel(n):
+    # channel flow (bottom part) under an elastic wall (top strip), sharing the interface y = 0.8 of the parent mesh
+    from FenicsSolver.FSISolver import FSISolver
+    length, height, y_interface = 2.0, 1.0, 0.8
+    parent_mesh = RectangleMesh(Point(0, 0), Point(length, height), int(length * n), n)
+    solid_domain = AutoSubDomain(lambda x: x[1] >= y_interface - DOLFIN_EPS)
+    markers = MeshFunction('size_t', parent_mesh, parent_mesh.topology().dim(), 0)
+    solid_domain.mark(markers, 1)
+    fluid_mesh = SubMesh(parent_mesh, markers, 0)
+    solid_mesh = SubMesh(parent_mesh, markers, 1)
+
+    interface = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[1], y_interface))
+    inlet = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[0], 0) and x[1] < y_interface)
+    outlet = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[0], length) and x[1] < y_interface)
+    bottom = AutoSubDomain(lambda x, on_boundary: on_boundary and near(x[1], 0))
+    solid_ends = AutoSubDomain(lambda x, on_boundary: on_boundary and (near(x[0], 0) or near(x[0], length)) and x[1] > y_interface)
+
+    fluid_bcs = OrderedDict()
+    fluid_bcs["wall"] = {'boundary': bottom, 'boundary_id': 1,
+                         'values': [{'variable': "velocity", 'type': 'Dirichlet', 'value': Constant((0, 0))}]}
+    fluid_bcs["inlet"] = {'boundary': inlet, 'boundary_id': 2,
+                          'values': [{'variable': "velocity", 'type': 'Dirichlet', 'value': Constant((0.1, 0))}]}
+    fluid_bcs["outlet"] = {'boundary': outlet, 'boundary_id': 3,
+                           'values': [{'variable': "pressure", 'type': 'Dirichlet', 'value': 1e5}]}
+    fluid_bcs["interface"] = {'boundary': interface, 'boundary_id': 4, 'coupling': 'FSI',
+                              'values': [{'variable': "velocity", 'type': 'Dirichlet', 'value': Constant((0, 0))}]}
+    fluid_settings = _flow_settings(fluid_mesh, fluid_bcs, viscosity = 0.1)
+    fluid_settings['reference_frame_settings'] = {'type': 'ALE', 'mesh_velocity': None}
+
+    solid_bcs = OrderedDict()
+    solid_bcs["fixed"] = {'boundary': solid_ends, 'boundary_id': 1, 'type': 'Dirichlet', 'value': Constant((0, 0))}
+    solid_bcs["interface"] = {'boundary': interface, 'boundary_id': 4, 'coupling': 'FSI', 'type': 'stress', 'value': Constant((0, 0))}
+    solid_settings = _default_settings()
+    solid_settings['mesh'] = solid_mesh
+    solid_settings['fe_degree'] = fluid_settings['fe_degree'] + 1
+    solid_settings['boundary_conditions'] = solid_bcs
+    solid_settings['temperature_distribution'] = None
+    solid_settings['material'] = {'name': 'rubber', 'elastic_modulus': 1e6, 'poisson_ratio': 0.3, 'density': 1000,
+                                  'thermal_expansion_coefficient': 2e-6}
+    solid_settings['solver_settings']['reference_values'] = {'temperature': 293}
+
+    transient_settings = {'transient': True, 'starting_time': 0, 'time_step': 0.01, 'ending_time': 0.05}
+    for s in (fluid_settings, solid_settings):
+        s['solver_settings']['transient_settings'] = transient_settings
+    settings = {'participants': [{'solver_domain': 'fluidic', 'settings': fluid_settings},
+                                 {'solver_domain': 'elastic', 'settings': solid_settings}],
+                'parent_mesh': parent_mesh,
+                'transient_settings': transient_settings,
+                'coupling_settings': {},
+                'result_filename': None, 'profiling_file': None}
+    return FSISolver(settings)
+
+
+# case name: function(n)
+benchmark_cases = OrderedDict([
+    ('heat_conduction_steady', heat_conduction),
+    ('heat_conduction_transient', heat_conduction_transient),
+    ('linear_elasticity_2d', linear_elasticity_2d),
+    ('linear_elasticity_2d_amg', linear_elasticity_2d_amg),
+    ('linear_elasticity_3d', linear_elasticity_3d),
+    ('linear_elasticity_3d_amg', linear_elasticity_3d_amg),
+    ('elbow_flow', elbow_flow),
+    ('cylinder_flow', cylinder_flow),
+    ('large_deformation', large_deformation),
+    ('fsi_channel', fsi_channel),
+    ])
+
+# mesh resolutions for the scaling study, 3D and coupled cases use coarser meshes
+default_sizes = OrderedDict([
+    ('heat_conduction_steady', [32, 64, 128]),
+    ('heat_conduction_transient', [32, 64, 128]),
+    ('linear_elasticity_2d', [4, 8, 16]),
+    ('linear_elasticity_2d_amg', [4, 8, 16]),
+    ('linear_elasticity_3d', [2, 4, 6]),
+    ('linear_elasticity_3d_amg', [2, 4, 6]),
+    ('elbow_flow', [10, 20, 40]),
+    ('cylinder_flow', [8, 16, 32]),
+    ('large_deformation', [2, 4, 8]),
+    ('fsi_channel', [8, 16]),
+    ])
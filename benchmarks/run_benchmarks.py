@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2017 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+"""
+Performance benchmark of all solvers with mesh-size scaling, cases are defined in benchmark_cases.py
+
+usage:
+    python run_benchmarks.py                    # all cases and default sizes, compared with baseline.json if existing
+    python run_benchmarks.py -c heat_conduction_steady elbow_flow -s 16 32
+    python run_benchmarks.py --save-baseline    # save current numbers as the new baseline
+
+Each case and mesh size is run in a fresh python process, so the peak RSS belongs to that run only.
+Wall time per phase and iteration counts come from `solver.profiler`,
+mesh generation and solver construction are reported as `setup_time`, not included into `wall_time`.
+A run is reported as a regression if a metric is bigger than `(1 + tolerance) * baseline`.
+"""
+
+from __future__ import print_function, division
+import sys
+import os.path
+import json
+import argparse
+import subprocess
+import resource
+from collections import OrderedDict
+from timeit import default_timer
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+result_marker = 'BENCHMARK_RESULT:'
+compared_metrics = ['wall_time', 'peak_rss_mb', 'newton', 'krylov', 'picard']
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':  # bytes on MacOS, kilobytes on Linux
+        return rss / 1024.0**2
+    return rss / 1024.0
+
+
+def get_dofs(solver):
+    if hasattr(solver, 'solver_list'):  # coupled solver
+        return sum(s.function_space.dim() for s in solver.solver_list)
+    return solver.function_space.dim()
+
+
+def run_case(name, n):
+    # executed in the child process
+    sys.path.insert(0, os.path.join(this_dir, os.pardir))  # without installing this package
+    from benchmark_cases import benchmark_cases
+
+    start = default_timer()
+    solver = benchmark_cases[name](n)
+    setup_time = default_timer() - start
+    start = default_timer()
+    solver.solve()
+    wall_time = default_timer() - start
+
+    profiling = solver.profiler.summary()
+    record = OrderedDict([('case', name), ('size', n), ('dofs', get_dofs(solver)),
+                          ('setup_time', setup_time), ('wall_time', wall_time), ('peak_rss_mb', peak_rss_mb()),
+                          ('steps', len(profiling['steps']))])
+    for kind in ('newton', 'krylov', 'picard'):
+        record[kind] = sum(step[kind] for step in profiling['steps'] if kind in step)
+    record['phases'] = OrderedDict((k, v['wall_time']) for k, v in profiling['phases'].items())
+    return record
+
+
+def run_in_subprocess(name, n):
+    print("run benchmark case `{}` with size {}".format(name, n))
+    cmd = [sys.executable, os.path.realpath(__file__), '--child', name, str(n)]
+    try:
+        output = subprocess.check_output(cmd, cwd = this_dir, stderr = subprocess.STDOUT)
+    except subprocess.CalledProcessError as e:
+        print(e.output.decode('utf-8', 'replace')[-2000:])  # tail of the error message
+        return OrderedDict([('case', name), ('size', n), ('error', 'return code {}'.format(e.returncode))])
+    for line in output.decode('utf-8', 'replace').splitlines():
+        if line.startswith(result_marker):
+            return json.loads(line[len(result_marker):], object_pairs_hook = OrderedDict)
+    return OrderedDict([('case', name), ('size', n), ('error', 'no result is reported')])
+
+
+def _key(record):
+    return '{}:{}'.format(record['case'], record['size'])
+
+
+def compare(results, baseline, tolerance):
+    """ print the ratio of each metric to the baseline, return the list of regression (key, metric, ratio) """
+    base = dict((_key(r), r) for r in baseline)
+    regressions = []
+    print("{:<36s} {:>10s} {:>12s} {:>12s} {:>8s}".format('case:size', 'metric', 'baseline', 'current', 'ratio'))
+    for r in results:
+        k = _key(r)
+        if 'error' in r or k not in base or 'error' in base[k]:
+            continue
+        for m in compared_metrics:
+            b, c = base[k].get(m), r.get(m)
+            if not b or c is None:  # zero iteration, e.g. direct solver
+                continue
+            ratio = c / b
+            flag = ''
+            if ratio > 1 + tolerance:
+                flag = ' <- regression'
+                regressions.append((k, m, ratio))
+            print("{:<36s} {:>10s} {:>12.4g} {:>12.4g} {:>8.3f}{}".format(k, m, b, c, ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'FenicsSolver performance benchmark')
+    parser.add_argument('-c', '--cases', nargs = '+', help = 'case names, default to all cases')
+    parser.add_argument('-s', '--sizes', nargs = '+', type = int, help = 'mesh resolutions, default to sizes of each case')
+    parser.add_argument('-o', '--output', default = 'benchmark_results.json', help = 'result file')
+    parser.add_argument('-b', '--baseline', default = os.path.join(this_dir, 'baseline.json'), help = 'baseline file')
+    parser.add_argument('-t', '--tolerance', type = float, default = 0.2, help = 'relative tolerance of regression')
+    parser.add_argument('--save-baseline', action = 'store_true', help = 'save the results as the baseline')
+    parser.add_argument('--child', nargs = 2, metavar = ('CASE', 'SIZE'), help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        record = run_case(args.child[0], int(args.child[1]))
+        print(result_marker + json.dumps(record))
+        return 0
+
+    sys.path.insert(0, os.path.join(this_dir, os.pardir))
+    from benchmark_cases import benchmark_cases, default_sizes
+    names = args.cases if args.cases else list(benchmark_cases.keys())
+    for name in names:
+        if name not in benchmark_cases:
+            parser.error('case `{}` is not defined, available cases: {}'.format(name, list(benchmark_cases.keys())))
+
+    results = []
+    for name in names:
+        for n in (args.sizes if args.sizes else default_sizes[name]):
+            results.append(run_in_subprocess(name, n))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent = 2)
+    print("benchmark results are written into", args.output)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent = 2)
+        print("baseline is saved into", args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("{} regressions are found above tolerance {}".format(len(regressions), args.tolerance))
+            return 1
+    else:
+        print("baseline file `{}` does not exist, run with `--save-baseline` to create".format(args.baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
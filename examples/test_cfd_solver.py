@@ -188,7 +188,8 @@ def test_incompressible(using_elbow = True, coupling_energy_equation = True, New
     if coupling_energy_equation:
         u,p,T= split(solver.solve())
     else:
-        u,p= split(solver.solve())
+        up = solver.solve()
+        u,p= split(up)
 
     if interactively:
         solver.plot()
@@ -197,15 +198,103 @@ def test_incompressible(using_elbow = True, coupling_energy_equation = True, New
         from FenicsSolver import  ScalarTransportSolver
         solver_T = ScalarTransportSolver.ScalarTransportSolver(s)
         #Q = solver.function_space.sub(1)  # seem it is hard to share vel between. u is vectorFunction
-        Q = solver_T.function_space
-        cvel = VectorFunction(Q)
-        cvel.interpolate(u)  # degree ? 
-        selver_T.convective_velocity = cvel
+        solver_T.convective_velocity = up.split()[0]  # transferred to the velocity space of solver_T
         T = solver_T.solve()
 
+def test_incompressible_fieldsplit():
+    # block preconditioned Krylov solver should give the same flow as the default direct solver
+    results = []
+    for linear_solver_settings in (None, {'method': 'gmres', 'preconditioner': 'fieldsplit', 'relative_tolerance': 1e-10}):
+        s = setup(using_elbow = True, using_3D = False, compressible = False)
+        s['solving_temperature'] = False
+        s['material'] = {'name': 'gas', 'kinematic_viscosity': length_scale * max_vel, 'density': 1,
+                    'specific_heat_capacity': 420, 'thermal_conductivity':  0.1, 'Newtonian': True}
+        s['solver_settings'] = copy.copy(s['solver_settings'])
+        s['solver_settings']['linear_solver_settings'] = linear_solver_settings
+        from FenicsSolver import CoupledNavierStokesSolver
+        solver = CoupledNavierStokesSolver.CoupledNavierStokesSolver(s)
+        results.append(solver.solve().vector().get_local())
+    assert np.allclose(results[0], results[1], rtol=1e-4, atol=1e-6)
+
+def test_picard_anderson():
+    # Anderson mixing should converge to the same steady flow with fewer Picard iterations
+    results = []
+    iterations = []
+    for picard_settings in ({'relaxation': 0.7}, {'relaxation': 1.0, 'anderson_depth': 5, 'tolerance': 1e-6}):
+        s = setup(using_elbow = True, using_3D = False, compressible = False)
+        s['solving_temperature'] = False
+        s['material'] = {'name': 'gas', 'kinematic_viscosity': length_scale * max_vel, 'density': 1,
+                    'specific_heat_capacity': 420, 'thermal_conductivity':  0.1, 'Newtonian': True}
+        s['solver_settings'] = copy.copy(s['solver_settings'])
+        s['solver_settings']['picard_settings'] = picard_settings
+        from FenicsSolver import CoupledNavierStokesSolver
+        solver = CoupledNavierStokesSolver.CoupledNavierStokesSolver(s)
+        solver.using_nonlinear_solver = False
+        results.append(solver.solve().vector().get_local())
+        iterations.append(solver.profiler.steps[-1]['picard'])
+    assert np.allclose(results[0], results[1], rtol=1e-3, atol=1e-3)
+    assert iterations[1] <= iterations[0]
+
+def test_thermal_sub_solver():
+    # thermal sub-solver is built only once, while the time-varying wall temperature is updated for each step
+    s = setup(using_elbow = True, using_3D = False, compressible = False)
+    s['solving_temperature'] = True
+    s['material'] = {'name': 'gas', 'kinematic_viscosity': length_scale * max_vel, 'density': 1,
+                'specific_heat_capacity': 420, 'thermal_conductivity':  0.1, 'Newtonian': True}
+    t_end = 0.03
+    wall_temperature = lambda t: Constant(T_ambient + (T_wall - T_ambient) * t / t_end)
+    s['boundary_conditions']['static']['values'][1]['value'] = wall_temperature
+    s['solver_settings'] = copy.copy(s['solver_settings'])
+    s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0.0, 'time_step': 0.01, 'ending_time': t_end}
+    from FenicsSolver import CoupledNavierStokesSolver
+    solver = CoupledNavierStokesSolver.CoupledNavierStokesSolver(s)
+
+    thermal_solvers = []
+    get_thermal_solver = solver.get_thermal_solver
+    def recording_get_thermal_solver():
+        thermal_solvers.append(get_thermal_solver())
+        return thermal_solvers[-1]
+    solver.get_thermal_solver = recording_get_thermal_solver
+    up = solver.solve()
+    assert solver.current_step == 3
+    assert len(thermal_solvers) > 1
+    assert all(Tsolver is thermal_solvers[0] for Tsolver in thermal_solvers)
+
+    # temperature on the wall is the value at the end time, corner dofs may belong to inlet or outlet
+    wall_dofs = list(DirichletBC(solver.function_space.sub(2), Constant(0), solver.boundary_facets, 1).get_boundary_values().keys())
+    wall_values = up.vector().get_local()[wall_dofs]
+    assert np.isclose(np.median(wall_values), T_wall)
+
+def test_segregated_solver():
+    # a few time steps of the segregated IPCS solver should be close to the coupled solver
+    from FenicsSolver import CoupledNavierStokesSolver, SegregatedNavierStokesSolver
+    velocities = []
+    for solver_class in (CoupledNavierStokesSolver.CoupledNavierStokesSolver,
+                         SegregatedNavierStokesSolver.SegregatedNavierStokesSolver):
+        s = setup(using_elbow = True, using_3D = False, compressible = False)
+        s['solving_temperature'] = False
+        s['material'] = {'name': 'gas', 'kinematic_viscosity': length_scale * max_vel, 'density': 1,
+                    'specific_heat_capacity': 420, 'thermal_conductivity':  0.1, 'Newtonian': True}
+        s['solver_settings'] = copy.copy(s['solver_settings'])
+        s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0.0, 'time_step': 0.01, 'ending_time': 0.05}
+        solver = solver_class(s)
+        velocities.append(solver.solve().split(deepcopy=True)[0])
+    assert errornorm(velocities[0], velocities[1]) < 0.05 * norm(velocities[0])
+
+    # initial guess of the linear step systems is the previous step, predictor is rejected
+    s['solver_settings']['predictor'] = 'linear'
+    try:
+        SegregatedNavierStokesSolver.SegregatedNavierStokesSolver(s)
+        assert False, 'SolverError is expected for predictor of segregated solver'
+    except SolverBase.SolverError:
+        pass
 
 if __name__ == '__main__':
     test_incompressible(using_elbow = True, coupling_energy_equation = True, Newtonian = True)
+    test_incompressible_fieldsplit()
+    test_picard_anderson()
+    test_thermal_sub_solver()
+    test_segregated_solver()
     #test_incompressible(using_elbow = True, coupling_energy_equation = False, Newtonian = False)
     #test_incompressible(False, False, True)  # driven cavity failed
     #test_incompressible(False, True)  # Elbow 3D is slow but possible
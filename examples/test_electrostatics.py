@@ -22,6 +22,7 @@
 
 from __future__ import print_function, division
 import math
+import copy
 import numpy as np
 
 from config import is_interactive
@@ -136,5 +137,17 @@ def post_process(T):
 
     plot(T, title='electric Potential (V)')
 
+def test_capacitance():
+    # parallel plates of the unit square, C = permittivity * [[1, -1], [-1, 1]] per unit depth
+    bcs["cold"] = {'boundary': bottom, 'boundary_id': 2, 'type': 'Dirichlet', 'value': Constant(V_low)}
+    s = copy.copy(settings)
+    s['material'] = copy.copy(material)
+    s['convective_velocity'] = None
+    solver = ScalarTransportSolver(s)
+    C, potentials = solver.capacitance_matrix(['hot', 'cold'])
+    assert len(potentials) == 2
+    assert np.allclose(C, epsilon * np.array([[1, -1], [-1, 1]]), rtol=1e-6)
+
 if __name__ == '__main__':
     test()
+    test_capacitance()
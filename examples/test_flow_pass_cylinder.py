@@ -138,6 +138,20 @@ if using_fenics_solver:
     solver.transient_settings['transient'] = transient_settings
     solver.solve()  # no need to transform static bc into transient bc
 
+    # the same case by segregated IPCS solver, 3 linear solves with prefactorized matrices per time step
+    from FenicsSolver import SegregatedNavierStokesSolver
+    s['solver_settings'] = copy.copy(s['solver_settings'])
+    s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0.0, 'time_step': 1e-3, 'ending_time': 0.01}
+    s['initial_values'] = up0
+    s['solver_settings']['force_settings'] = {'boundary_ids': [1], 'frequency': 2, 'filename': None}  # on cylinder
+    segregated_solver = SegregatedNavierStokesSolver.SegregatedNavierStokesSolver(s)
+    up = segregated_solver.solve()
+    assert np.all(np.isfinite(up.vector().get_local()))
+    assert len(segregated_solver.force_history) > 0
+    for step, t, drag, lift in segregated_solver.force_history:  # time at the end of the solved step
+        assert abs(t - 1e-3 * (step + 1)) < 1e-9
+    print('drag and lift on the cylinder', segregated_solver.force_history[-1][2:])
+
     if interactively:
         solver.plot()
 
@@ -22,6 +22,8 @@
 
 from __future__ import print_function, division
 import math
+import os
+import copy
 import numpy as np
 
 from config import is_interactive
@@ -29,6 +31,8 @@ interactively = is_interactive()
 
 from dolfin import *
 from FenicsSolver.ScalarTransportSolver  import ScalarTransportSolver
+from FenicsSolver.PropertyTable import PropertyTable
+from FenicsSolver.SolverBase import SolverError, default_report_settings
 
 #mesh = UnitCubeMesh(20, 20, 20)
 mesh = UnitSquareMesh(40, 40)
@@ -217,6 +221,342 @@ def test_radiation():
     if interactively:
         solver.plot()
 
+def get_dirichlet_settings(T_hot_value=None):
+    """ copy of settings with fixed temperature on the hot (top) and cold (bottom) boundaries,
+    no convection and radiation, module-level `settings` and `bcs` are not changed
+    """
+    s = copy.copy(settings)
+    s['convective_velocity'] = None
+    s['radiation_settings'] = None
+    s['boundary_conditions'] = copy.copy(bcs)
+    if T_hot_value is None:
+        T_hot_value = Constant(T_hot)
+    for name, boundary, boundary_id, value in (("hot", top, 1, T_hot_value), ("cold", bottom, 2, Constant(T_cold))):
+        s['boundary_conditions'][name] = {'boundary': boundary, 'boundary_id': boundary_id, 'values': {
+                    'temperature': {'variable': 'temperature', 'type': 'Dirichlet', 'value': value}
+                 } }
+    return s
+
+def test_enclosure_radiation():
+    # facets of convex domain can not see each other, enclosure radiation is reduced to the radiation to ambient
+    import tempfile, shutil
+    folder = tempfile.mkdtemp()
+    s = get_dirichlet_settings()
+    s['case_folder'] = folder  # view factor cache file
+    results = []
+    try:
+        for enclosure_boundary_ids in (None, [1, 2, 3, 4]):
+            s['radiation_settings'] = {'ambient_temperature': T_ambient-20, 'emissivity': 0.9,
+                                       'enclosure_boundary_ids': enclosure_boundary_ids}
+            solver = ScalarTransportSolver(s)
+            results.append(solver.solve().vector().get_local())
+        assert np.allclose(solver.enclosure_radiation.view_factors, 0)
+        assert os.path.dirname(solver.enclosure_radiation.get_cache_filename()) == folder
+        assert os.path.exists(solver.enclosure_radiation.get_cache_filename())
+        assert np.allclose(results[0], results[1])
+    finally:
+        shutil.rmtree(folder)
+
+def test_view_factors():
+    # 2 square holes of unit size in a solid plate, walls of each hole form an enclosure,
+    # view factors of its walls are checked with Hottel's crossed-strings rule
+    import logging, tempfile, shutil
+    from FenicsSolver.ViewFactorRadiation import ViewFactorRadiation
+    in_hole_A = lambda x, tol=0.0: 1 - tol < x[0] < 2 + tol and 1 - tol < x[1] < 2 + tol
+    in_hole_B = lambda x, tol=0.0: 3 - tol < x[0] < 4 + tol and 1 - tol < x[1] < 2 + tol
+    plate = RectangleMesh(Point(0, 0), Point(5, 3), 20, 12)
+    cell_markers = MeshFunction('size_t', plate, 2, 0)
+    for c in cells(plate):
+        m = c.midpoint().array()
+        if in_hole_A(m) or in_hole_B(m):
+            cell_markers[c] = 1
+    solid = SubMesh(plate, cell_markers, 0)
+    solid.init(1, 2)
+    facet_markers = MeshFunction('size_t', solid, 1, 0)
+    for f in facets(solid):
+        m = f.midpoint().array()
+        if f.exterior() and in_hole_A(m, 1e-8):
+            facet_markers[f] = 1
+        elif f.exterior() and in_hole_B(m, 1e-8):
+            facet_markers[f] = 2
+
+    folder = tempfile.mkdtemp()
+    logger = logging.getLogger('FenicsSolver.test_view_factors')
+    try:
+        model = ViewFactorRadiation(solid, facet_markers, [1, 2], {'samples': 6, 'cache_folder': folder}, logger)
+        F, A, c = model.view_factors, model.areas, model.centroids
+        assert np.all(F.sum(axis=1) <= 1.0 + 1e-12)
+        AF = A[:, None] * F
+        assert np.allclose(AF, AF.T)  # reciprocity
+
+        def strip_view_factor(i, j):
+            return AF[np.ix_(i, j)].sum() / A[i].sum()
+        left = np.isclose(c[:, 0], 1) & (c[:, 1] > 1) & (c[:, 1] < 2)
+        right = np.isclose(c[:, 0], 2) & (c[:, 1] > 1) & (c[:, 1] < 2)
+        bottom = np.isclose(c[:, 1], 1) & (c[:, 0] > 1) & (c[:, 0] < 2)
+        assert np.isclose(strip_view_factor(left, right), math.sqrt(2) - 1, rtol=2e-2)  # facing strips
+        assert np.isclose(strip_view_factor(left, bottom), 1 - math.sqrt(2) / 2, rtol=3e-2)  # perpendicular strips
+        hole_A = left | right | bottom | (np.isclose(c[:, 1], 2) & (c[:, 0] > 1) & (c[:, 0] < 2))
+        assert np.isclose(strip_view_factor(hole_A, hole_A), 1.0, rtol=2e-2)  # closed enclosure
+
+        # left wall of hole A faces right wall of hole B, the ray is blocked by the walls between the holes
+        right_B = np.isclose(c[:, 0], 4) & (c[:, 1] > 1) & (c[:, 1] < 2)
+        assert np.all(F[np.ix_(left, right_B)] == 0)
+        unobstructed = ViewFactorRadiation(solid, facet_markers, [1, 2],
+                                           {'samples': 6, 'cache_folder': folder, 'obstruction': False}, logger)
+        assert unobstructed.view_factors[np.ix_(left, right_B)].sum() > 0
+    finally:
+        shutil.rmtree(folder)
+
+def test_transient_reusing_operator():
+    # the bilinear form of linear transient heat conduction does not change, matrix is factorized only once
+    # with `reusing_form`, the form is generated only once, the time-varying hot boundary is updated in place
+    s = get_dirichlet_settings(lambda t: Constant(T_cold + (T_hot - T_cold) * t / 1000.0))
+    results = []
+    for reusing_operator, reusing_form in ((False, False), (True, False), (True, True)):
+        s['solver_settings'] = copy.copy(settings['solver_settings'])
+        s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0, 'time_step': 100, 'ending_time': 1000}
+        s['solver_settings']['reusing_operator'] = reusing_operator
+        s['solver_settings']['reusing_form'] = reusing_form
+        solver = ScalarTransportSolver(s)
+        results.append(solver.solve().vector().get_local())
+    assert np.allclose(results[0], results[1])
+    assert np.allclose(results[0], results[2])
+
+def test_checkpoint_restart():
+    # run stopped at half time and restarted from its checkpoint should agree with the uninterrupted run
+    import tempfile, shutil
+    folder = tempfile.mkdtemp()
+    checkpoint_filename = os.path.join(folder, 'checkpoint.h5')
+    s = get_dirichlet_settings(lambda t: Constant(T_cold + (T_hot - T_cold) * t / 1000.0))
+    transient_settings = {'transient': True, 'starting_time': 0, 'time_step': 100, 'ending_time': 1000}
+    results = []
+    try:
+        for ending_time, checkpoint_settings in ((1000, None),
+                                                 (500, {'checkpoint_freq': 5, 'checkpoint_filename': checkpoint_filename}),
+                                                 (1000, {'checkpoint_freq': 0, 'restart_filename': checkpoint_filename})):
+            s['solver_settings'] = copy.copy(settings['solver_settings'])
+            s['solver_settings']['transient_settings'] = dict(transient_settings, ending_time=ending_time)
+            s['solver_settings']['checkpoint_settings'] = checkpoint_settings
+            solver = ScalarTransportSolver(s)
+            results.append(solver.solve().vector().get_local())
+        assert solver.current_step == 10
+        assert np.allclose(results[0], results[2])
+    finally:
+        shutil.rmtree(folder)
+
+def test_result_writer():
+    # all saved steps are appended into one XDMF/HDF5 file, then read back: time points, field name and values
+    import tempfile, shutil
+    import xml.etree.ElementTree as ET
+    folder = tempfile.mkdtemp()
+    result_filename = os.path.join(folder, 'result.xdmf')
+    s = get_dirichlet_settings(lambda t: Constant(T_cold + (T_hot - T_cold) * t / 1000.0))
+    s['solver_settings'] = copy.copy(settings['solver_settings'])
+    s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0, 'time_step': 100, 'ending_time': 500}
+    s['report_settings'] = dict(default_report_settings, saving_freq=1, plotting_freq=0, result_filename=result_filename)
+    try:
+        solver = ScalarTransportSolver(s)
+        T = solver.solve()
+        steps = [grid for grid in ET.parse(result_filename).iter('Grid') if grid.find('Time') is not None]
+        times = [float(grid.find('Time').get('Value')) for grid in steps]
+        assert np.allclose(times, [200, 300, 400, 500])  # step 0 is not saved, time at the end of each step
+        attributes = [grid.find('Attribute') for grid in steps]
+        assert all(a.get('Name') == 'temperature' for a in attributes)
+        h5_filename, dataset = attributes[-1].find('DataItem').text.strip().split(':')
+        hdf = HDF5File(mesh.mpi_comm(), os.path.join(folder, h5_filename), 'r')
+        last_values = Vector()
+        hdf.read(last_values, dataset, False)
+        hdf.close()
+        assert np.allclose(last_values.get_local(), T.compute_vertex_values())
+    finally:
+        shutil.rmtree(folder)
+
+def test_transient_adaptive():
+    # hot boundary is ramped up then kept constant, adaptive time step should grow in the quiet phase
+    s = get_dirichlet_settings(lambda t: Constant(T_cold + (T_hot - T_cold) * min(t, 100.0) / 100.0))
+    results = []
+    solvers = []
+    # the last adaptive run keeps the initial time step, so time-varying boundary is evaluated at the same time points
+    for adaptive_settings in (None, {'tolerance': 1e-3, 'max_time_step': 500},
+                              {'tolerance': 1e9, 'min_factor': 1.0, 'max_factor': 1.0}):
+        s['solver_settings'] = copy.copy(settings['solver_settings'])
+        s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0, 'time_step': 5, 'ending_time': 2000,
+                                                      'adaptive_settings': adaptive_settings}
+        solvers.append(ScalarTransportSolver(s))
+        results.append(solvers[-1].solve().vector().get_local())
+    assert np.allclose(results[0], results[2])
+    solver = solvers[1]
+    assert solver.current_step < 2000 / 5 / 10  # much less steps than fixed time step
+    profiling = solver.profiler.summary()
+    assert len(profiling['steps']) == solver.current_step
+    assert 'linear_solve' in profiling['phases']
+    assert np.allclose(results[0], results[1], rtol = 1e-2)
+
+def test_linear_solver_settings():
+    # Krylov solver with AMG preconditioner, configured per solver object, should agree with the default LU solver
+    s = copy.copy(settings)
+    s['convective_velocity'] = None
+    s['radiation_settings'] = None
+    results = []
+    for linear_solver_settings in (None, {'method': 'cg', 'preconditioner': 'hypre_amg', 'relative_tolerance': 1e-10,
+                                          'petsc_options': {'pc_hypre_boomeramg_strong_threshold': 0.5}}):
+        s['solver_settings'] = copy.copy(settings['solver_settings'])
+        s['solver_settings']['linear_solver_settings'] = linear_solver_settings
+        solver = ScalarTransportSolver(s)
+        results.append(solver.solve().vector().get_local())
+    assert np.allclose(results[0], results[1], rtol=1e-6)
+
+def test_property_table():
+    # linear table of conductivity in quadrature space should give the same result as the UFL expression of T
+    s = get_dirichlet_settings()
+    results = []
+    for k in (lambda T: 0.6 + 0.002 * (T - T_cold), PropertyTable([T_cold - 100, T_hot + 100], [0.4, 0.92])):
+        s['material'] = copy.copy(settings['material'])
+        s['material']['thermal_conductivity'] = k
+        solver = ScalarTransportSolver(s)
+        results.append(solver.solve().vector().get_local())
+    assert solver.linear_solver_settings is None  # Newton path with LU is chosen only for the solve
+    assert np.allclose(results[0], results[1], rtol=1e-6)
+
+def test_kirchhoff_transform():
+    # steady conduction with k(T) solved by one linear solve of Kirchhoff variable, compared with Newton solver
+    s = get_dirichlet_settings()
+    s['material'] = copy.copy(settings['material'])
+    s['material']['thermal_conductivity'] = lambda T: 0.6 + 0.002 * (T - T_cold)
+    results = []
+    for strategy in ('Newton', 'Kirchhoff'):
+        s['solver_settings'] = copy.copy(settings['solver_settings'])
+        s['solver_settings']['nonlinear_strategy'] = strategy
+        s['solver_settings']['kirchhoff_settings'] = {'temperature_range': (T_cold - 50, T_hot + 50)}
+        solver = ScalarTransportSolver(s)
+        results.append(solver.solve().vector().get_local())
+    assert np.allclose(results[0], results[1], rtol=1e-4)
+
+def test_multi_region_values():
+    # material and body source given for each subdomain are translated into single DG0 coefficients
+    s = get_dirichlet_settings()
+    results = []
+    for multi_region in (False, True):
+        s['material'] = copy.copy(settings['material'])
+        if multi_region:
+            s['material']['thermal_conductivity'] = {'left': {'subdomain_id': 1, 'value': conductivity},
+                                                     'right': {'subdomain_id': 2, 'value': conductivity}}
+            s['body_source'] = {'left': {'subdomain_id': 1, 'value': 100}, 'right': {'subdomain_id': 2, 'value': 100}}
+        else:
+            s['material']['thermal_conductivity'] = conductivity
+            s['body_source'] = 100
+        solver = ScalarTransportSolver(s)
+        solver.subdomains.set_all(1)
+        AutoSubDomain(lambda x: x[0] > 0.5 - DOLFIN_EPS).mark(solver.subdomains, 2)
+        results.append(solver.solve().vector().get_local())
+    assert len(solver._region_functions) == 2
+    assert np.allclose(results[0], results[1])
+
+    # zero conductivity in a subdomain without value is an error, while body source is zero there
+    del s['material']['thermal_conductivity']['right']
+    solver = ScalarTransportSolver(s)
+    solver.subdomains.set_all(1)
+    AutoSubDomain(lambda x: x[0] > 0.5 - DOLFIN_EPS).mark(solver.subdomains, 2)
+    try:
+        solver.solve()
+        raised = False
+    except SolverError:
+        raised = True
+    assert raised
+
+def test_convective_velocity_transfer():
+    # velocity Function on a different space (e.g. output of a flow solver) is transferred by a precomputed operator
+    s = get_dirichlet_settings()
+    s['solver_settings'] = copy.copy(settings['solver_settings'])
+    s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0, 'time_step': 100, 'ending_time': 500}
+    vel = (0.005, -0.005)
+    results = []
+    for degree in (None, 1, settings['fe_degree'] + 1):  # constant, transfer matrix, assigner
+        if degree:
+            s['convective_velocity'] = interpolate(Constant(vel), VectorFunctionSpace(mesh, 'CG', degree))
+        else:
+            s['convective_velocity'] = Constant(vel)
+        solver = ScalarTransportSolver(s)
+        results.append(solver.solve().vector().get_local())
+        if degree:
+            assert solver._velocity_transfer is not None
+    assert np.allclose(results[0], results[1])
+    assert np.allclose(results[0], results[2])
+
+    # with `reusing_form`, new values of the flow solver velocity are transferred for each time step
+    s['solver_settings']['reusing_form'] = True
+    u = interpolate(Constant(vel), VectorFunctionSpace(mesh, 'CG', 1))
+    s['convective_velocity'] = u
+    solver = ScalarTransportSolver(s)
+    assert np.allclose(results[0], solver.solve().vector().get_local())
+    u.vector().set_local(2.0 * u.vector().get_local())
+    u.vector().apply('insert')
+    solver.update_time_dependent_values()
+    expected = interpolate(Constant((2 * vel[0], 2 * vel[1])), solver.get_velocity_function_space())
+    assert np.allclose(solver._velocity_function.vector().get_local(), expected.vector().get_local())
+
+def test_logger_per_instance():
+    # logging level of one solver does not change the level of another solver of the same class
+    import logging
+    s = copy.copy(settings)
+    s['report_settings'] = dict(default_report_settings, logging_level=logging.DEBUG)
+    verbose_solver = ScalarTransportSolver(s)
+    s['report_settings'] = dict(default_report_settings, logging_profile='quiet')
+    quiet_solver = ScalarTransportSolver(s)
+    assert verbose_solver.logger is not quiet_solver.logger
+    assert verbose_solver.logger.isEnabledFor(logging.DEBUG)
+    assert not quiet_solver.logger.isEnabledFor(logging.INFO)
+
+def test_mesh_cache():
+    # xml mesh is cached into HDF5 on the first load, an edited mesh file gets a new cache file
+    import tempfile, shutil
+    folder = tempfile.mkdtemp()
+    mesh_filename = os.path.join(folder, 'square.xml')
+    File(mesh_filename) << mesh
+    s = get_dirichlet_settings()
+    s['mesh'] = mesh_filename
+    s['function_space'] = None
+    try:
+        solver = ScalarTransportSolver(s)  # miss: cache is written
+        cache_filename = solver.get_mesh_cache_filename(mesh_filename)
+        assert os.path.exists(cache_filename)
+        cache_mtime = os.path.getmtime(cache_filename)
+        solver = ScalarTransportSolver(s)  # hit: cache is read, not written again
+        assert solver.mesh.num_cells() == mesh.num_cells()
+        assert os.path.getmtime(cache_filename) == cache_mtime
+        t = os.path.getmtime(mesh_filename) + 10
+        os.utime(mesh_filename, (t, t))  # edited mesh file invalidates the cache
+        assert solver.get_mesh_cache_filename(mesh_filename) != cache_filename
+        solver = ScalarTransportSolver(s)
+        assert os.path.exists(solver.get_mesh_cache_filename(mesh_filename))
+        assert np.isclose(solver.solve().vector().norm('l2'), ScalarTransportSolver(get_dirichlet_settings()).solve().vector().norm('l2'))
+    finally:
+        shutil.rmtree(folder)
+
+def test_parameter_sweep():
+    # 2 variants of the inlet temperature solved by 2 worker processes, summary records are ordered by variant index
+    import json, tempfile, shutil
+    from FenicsSolver.ParameterSweep import ParameterSweep
+    data_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    with open(os.path.join(data_folder, 'TestHeatTransfer.json')) as f:
+        case = json.load(f)
+    case['mesh'] = os.path.join(data_folder, 'mesh.xml')
+    folder = tempfile.mkdtemp()
+    try:
+        sweep = ParameterSweep(case, {'boundary_conditions.inlet.value': [350, 400]}, output_folder = folder, processes = 2)
+        records = sweep.run()
+        assert [r['index'] for r in records] == [0, 1]
+        assert all(r['status'] == 'done' for r in records), records
+        for r, T_inlet in zip(records, (350, 400)):
+            assert r['parameters']['boundary_conditions.inlet.value'] == T_inlet
+            assert os.path.exists(r['result_filename'])
+            assert np.isclose(r['field_range']['temperature'][1], T_inlet)
+        with open(sweep.summary_filename) as f:
+            assert len(f.readlines()) == 2
+    finally:
+        shutil.rmtree(folder)
+
 def test():
     #setup(using_anisotropic_conductivity = True, using_convective_velocity = False, using_DG_solver = False, using_HTC = False)
     #setup(using_anisotropic_conductivity = False, using_convective_velocity = False, using_DG_solver = False, using_HTC = True)
@@ -225,4 +565,18 @@ def test():
 
 if __name__ == '__main__':
     test()
-    test_radiation()
\ No newline at end of file
+    test_transient_reusing_operator()
+    test_checkpoint_restart()
+    test_result_writer()
+    test_transient_adaptive()
+    test_linear_solver_settings()
+    test_convective_velocity_transfer()
+    test_property_table()
+    test_kirchhoff_transform()
+    test_multi_region_values()
+    test_radiation()
+    test_enclosure_radiation()
+    test_view_factors()
+    test_mesh_cache()
+    test_logger_per_instance()
+    test_parameter_sweep()
\ No newline at end of file
@@ -37,7 +37,7 @@ from FenicsSolver.LargeDeformationSolver import LargeDeformationSolver
 from FenicsSolver import SolverBase
 
 
-def solve_elasticity(using_2d, length, E, nu, dt, t_end, dirname):
+def solve_elasticity(using_2d, length, E, nu, dt, t_end, dirname, nonlinear_solver_settings=None, predictor=None):
     """Prepares 2D geometry. Returns facet function with 1, 2 on parts of  the boundary."""
     if using_2d:
         n = 4
@@ -82,6 +82,8 @@ def solve_elasticity(using_2d, length, E, nu, dt, t_end, dirname):
     s['solver_settings'] = {
         'transient_settings': {'transient': True, 'starting_time': 0, 'time_step': dt, 'ending_time': t_end},
         'reference_values': {'temperature': 293 },
+        'nonlinear_solver_settings': nonlinear_solver_settings,
+        'predictor': predictor,
         }
 
     # solver specific setting
@@ -90,9 +92,27 @@ def solve_elasticity(using_2d, length, E, nu, dt, t_end, dirname):
     w = solver.solve()
     if interactively:
         solver.plot()
+    return solver
+
+def test_snes():
+    # modified Newton with lagged Jacobian and backtracking line search should converge to the same solution
+    s0 = solve_elasticity(True, 20, 1e5, 0.3, 0.25, 1, 'results_2d_comp')
+    s1 = solve_elasticity(True, 20, 1e5, 0.3, 0.25, 1, 'results_2d_comp',
+                          {'method': 'snes', 'line_search': 'bt', 'lag_jacobian': 2, 'lag_preconditioner': 2})
+    assert np.allclose(s0.result.vector().get_local(), s1.result.vector().get_local(), rtol=1e-5, atol=1e-8)
+
+def test_predictor():
+    # extrapolated initial guess should not change the solution, but reduce Newton iterations
+    s0 = solve_elasticity(True, 20, 1e5, 0.3, 0.25, 2, 'results_2d_comp', predictor='constant')
+    s1 = solve_elasticity(True, 20, 1e5, 0.3, 0.25, 2, 'results_2d_comp', predictor='quadratic')
+    assert np.allclose(s0.result.vector().get_local(), s1.result.vector().get_local(), rtol=1e-5, atol=1e-8)
+    iterations = [sum(step.get('newton', 0) for step in s.profiler.steps) for s in (s0, s1)]
+    assert iterations[1] <= iterations[0]
 
 if __name__ == '__main__':
     solve_elasticity(True, 20, 1e5, 0.3, 0.25, 5, 'results_2d_comp')
     solve_elasticity(True, 20, 1e5, 0.5, 0.25, 5, 'results_2d_incomp')
+    test_snes()
+    test_predictor()
     #solve_elasticity(geometry_2d(80.0), 1e5, 0.3, 0.25, 5.0, 'results_2d_long_comp')
     #solve_elasticity(False, 20, 1e5, 0.3, 0.50, 5.0, 'results_3d_comp')
@@ -159,7 +159,104 @@ def test(has_thermal_stress, has_body_source, transient = False, boundary_type =
         File("stress.pvd") << stress
     #####################################
 
+def test_load_cases():
+    # independent load cases share one factorization, compliance matrix is symmetric and superposition holds
+    mesh = BoxMesh(Point(0, 0, 0), Point(10, 1, 1), 20, 4, 4)
+    V = VectorFunctionSpace(mesh, "Lagrange", 1)
+    from collections import OrderedDict
+    bcs = OrderedDict()
+    bcs["fixed"] = {'boundary': AutoSubDomain(lambda x: near(x[0], 0)), 'boundary_id': 1, 'type': 'Dirichlet', 'value': Constant((0, 0, 0))}
+    right = AutoSubDomain(lambda x: near(x[0], 10))
+    bcs["load"] = {'boundary': right, 'boundary_id': 2, 'type': 'stress', 'value': Constant((0, 0, 0))}
+
+    import copy
+    s = copy.copy(SolverBase.default_case_settings)
+    s['material'] = {'name': 'steel', 'elastic_modulus': 2e11, 'poisson_ratio': 0.27, 'density': 7800,
+                                'thermal_expansion_coefficient': 2e-6}
+    s['function_space'] = V
+    s['boundary_conditions'] = bcs
+    s['temperature_distribution']=None
+    s['solver_settings'] = copy.copy(s['solver_settings'])
+    s['solver_settings']['reference_values'] = {'temperature':293 }
+    solver = LinearElasticitySolver.LinearElasticitySolver(s)
+
+    loads = [(1e6, 0, 0), (0, 1e4, 0), (1e6, 1e4, 0)]
+    load_cases = [{'boundary_conditions': {'load': {'boundary': right, 'boundary_id': 2, 'type': 'stress', 'value': Constant(f)}}}
+                  for f in loads]
+    C, displacements = solver.compliance_matrix(load_cases)
+    assert np.allclose(C, C.T, rtol=1e-6)
+    u = displacements
+    assert np.allclose(u[2].vector().get_local(), u[0].vector().get_local() + u[1].vector().get_local())
+
+    # a case releasing the fixed boundary can not share the operator
+    released = {'fixed': {'boundary': bcs['fixed']['boundary'], 'boundary_id': 1, 'type': 'stress', 'value': Constant((0, 0, 0))}}
+    try:
+        solver.solve_load_cases(load_cases[:1] + [{'boundary_conditions': released}])
+        assert False, 'SolverError is expected for different Dirichlet boundary'
+    except SolverBase.SolverError:
+        pass
+
+def test_amg_reuse():
+    # for a transient load, AMG solver, operator and near nullspace are built once and reused for all steps
+    mesh = BoxMesh(Point(0, 0, 0), Point(10, 1, 1), 20, 4, 4)
+    V = VectorFunctionSpace(mesh, "Lagrange", 1)
+    from collections import OrderedDict
+    bcs = OrderedDict()
+    bcs["fixed"] = {'boundary': AutoSubDomain(lambda x: near(x[0], 0)), 'boundary_id': 1, 'type': 'Dirichlet', 'value': Constant((0, 0, 0))}
+    bcs["tensile"] = {'boundary': AutoSubDomain(lambda x: near(x[0], 10)), 'boundary_id': 2, 'type': 'stress',
+                      'value': lambda t: Constant((1e8*t, 0, 0))}
+
+    import copy
+    s = copy.copy(SolverBase.default_case_settings)
+    s['material'] = {'name': 'steel', 'elastic_modulus': 2e11, 'poisson_ratio': 0.27, 'density': 7800,
+                                'thermal_expansion_coefficient': 2e-6}
+    s['function_space'] = V
+    s['boundary_conditions'] = bcs
+    s['temperature_distribution']=None
+    s['solver_settings'] = copy.copy(s['solver_settings'])
+    s['solver_settings']['reference_values'] = {'temperature':293 }
+    s['solver_settings']['transient_settings'] = {'transient': True, 'starting_time': 0.0, 'time_step': 0.001, 'ending_time': 0.004}
+    s['solver_settings']['using_amg'] = True
+    solver = LinearElasticitySolver.LinearElasticitySolver(s)
+
+    reused = []
+    solve_amg = solver.solve_amg
+    def recording_solve_amg(F, u, bcs):
+        u = solve_amg(F, u, bcs)
+        reused.append((id(solver._amg_solver), id(solver._amg_cache['A']), id(solver._near_nullspace[1])))
+        return u
+    solver.solve_amg = recording_solve_amg
+    u = solver.solve()
+    assert len(reused) > 1
+    assert all(r == reused[0] for r in reused)
+    assert np.all(np.isfinite(u.vector().get_local()))
+
+def test_near_nullspace_2d():
+    # rigid body modes do not depend on the values of the vector used as template
+    mesh = UnitSquareMesh(8, 8)
+    V = VectorFunctionSpace(mesh, "Lagrange", 1)
+    import copy
+    s = copy.copy(SolverBase.default_case_settings)
+    s['material'] = {'name': 'steel', 'elastic_modulus': 2e11, 'poisson_ratio': 0.27, 'density': 7800,
+                                'thermal_expansion_coefficient': 2e-6}
+    s['function_space'] = V
+    s['boundary_conditions'] = {"fixed": {'boundary': AutoSubDomain(lambda x: near(x[0], 0)), 'boundary_id': 1,
+                                          'type': 'Dirichlet', 'value': Constant((0, 0))}}
+    s['temperature_distribution']=None
+    s['solver_settings'] = copy.copy(s['solver_settings'])
+    s['solver_settings']['reference_values'] = {'temperature':293 }
+    solver = LinearElasticitySolver.LinearElasticitySolver(s)
+    u = interpolate(Constant((1.0, 2.0)), V)
+    basis = solver.build_nullspace(V, u.vector())
+    assert basis.dim() == 3 and basis.is_orthonormal()
+    zero_basis = solver.build_nullspace(V, Function(V).vector())
+    for i in range(3):
+        assert np.allclose(basis[i].get_local(), zero_basis[i].get_local())
+
 if __name__ == '__main__':
+    test_load_cases()
+    test_amg_reuse()
+    test_near_nullspace_2d()
     #test(has_thermal_stress = True, has_body_source=True, transient = False, boundary_type =2)
     test(has_thermal_stress = True, has_body_source=True, transient = True)
     test(has_thermal_stress = True, has_body_source=True)